@@ -1,11 +1,15 @@
-from tools.data_fetch import fetch_price_history
-from tools.metrics import compute_all_metrics, compare_metrics
+from tools.data_fetch import fetch_price_histories, fetch_price_history
+from tools.metrics import (
+    build_close_frame, compute_all_metrics_incremental, compute_correlation_matrix, rank_metrics,
+)
 from pathlib import Path
-from tools.charts import plot_close_price_line, plot_comparison_normalized
+from tools.charts import plot_close_price_line, plot_growth_comparison
 from tools.analyst import fetch_analyst_view
+from tools.asset_prefetch import prefetch_assets
 from tools.earnings import fetch_earnings_snapshot
 from tools.fundamentals import fetch_company_fundamentals
 from tools.news import fetch_stock_news
+from tools.risk import benchmark_for_metrics, compute_risk_metrics
 from tools.crypto import is_crypto_symbol
 from agent_trace import AgentTracer
 import logging
@@ -62,8 +66,36 @@ class Agent:
         # without a supplied tracer still works — it just records into its own.
         self.tracer = tracer or AgentTracer()
 
+    # Multi-ticker plans fetch every price history up front in one batched
+    # request; the fetch_data tasks then just pick up their result (or error).
+    def _prefetch_prices(self, tasks):
+        fetch_tasks = [task for task in tasks if task["task"] == "fetch_data"]
+        windows = {(t["period"], t.get("start_date"), t.get("end_date")) for t in fetch_tasks}
+        if len(fetch_tasks) < 2 or len(windows) != 1:
+            return {}
+        period, start_date, end_date = windows.pop()
+        tickers = [task["ticker"] for task in fetch_tasks]
+
+        started = self.tracer.now()
+        try:
+            fetched, errors = fetch_price_histories(tickers, period, start_date, end_date)
+        except Exception as e:
+            logging.warning(f"Batch price fetch failed, fetching one by one: {e}")
+            return {}
+        self.tracer.record(
+            "data", "Batch fetch price histories", "ok" if fetched else "error",
+            detail=f"{len(fetched)}/{len(tickers)} tickers in one batch",
+            duration_ms=self.tracer.elapsed_ms(started),
+        )
+        prefetched = {ticker: ValueError(message) for ticker, message in errors.items()}
+        prefetched.update(fetched)
+        return prefetched
+
     # Execute a list of tasks in order.
     def run(self, tasks):
+        # Logos and brand colours warm in the background while prices load.
+        prefetch_assets([task["ticker"] for task in tasks if task["task"] == "fetch_data"])
+        prefetched = self._prefetch_prices(tasks)
         # Go through each task one at a time
         for task in tasks:
             # Task: fetch historical price data
@@ -75,8 +107,12 @@ class Agent:
 
                 started = self.tracer.now()
                 try:
-                    # Pull price history from the data source
-                    price_data = fetch_price_history(ticker, period, start_date, end_date)
+                    # Pull price history from the data source (or the batch)
+                    price_data = prefetched.get(ticker)
+                    if isinstance(price_data, Exception):
+                        raise price_data
+                    if price_data is None:
+                        price_data = fetch_price_history(ticker, period, start_date, end_date)
                     # Store successful results in memory
                     self.memory.set(f"{ticker}_data", price_data)
                     self.memory.set(f"{ticker}_status", "ok")
@@ -120,17 +156,24 @@ class Agent:
                     continue
 
                 price_data = self.memory.get(f"{ticker}_data")
+                # Benchmark (SPY / BTC-USD) prices for beta; a failure only drops beta.
+                benchmark_data = benchmark_for_metrics(ticker, price_data, self.memory, self.tracer)
 
-                # Compute return, volatility, Sharpe ratio, etc.
+                # Compute return, volatility, Sharpe ratio, etc., plus the
+                # extended risk pack (Sortino, Calmar, VaR/CVaR, beta).
                 started = self.tracer.now()
-                metrics = compute_all_metrics(price_data)
+                metrics = compute_all_metrics_incremental(
+                    price_data, (ticker, self.memory.get(f"{ticker}_period")),
+                )
+                metrics.update(compute_risk_metrics(price_data, benchmark_data, metrics))
                 self.memory.set(f"{ticker}_metrics", metrics)
                 self.tracer.record(
                     "metrics", "Compute performance metrics", "ok",
                     detail=(
                         f"Return {_fmt_pct(metrics.get('total_return'))} · "
                         f"Sharpe {_fmt_num(metrics.get('sharpe_ratio'))} · "
-                        f"Max DD {_fmt_pct(metrics.get('max_drawdown'))}"
+                        f"Max DD {_fmt_pct(metrics.get('max_drawdown'))} · "
+                        f"Beta {_fmt_num(metrics.get('beta'))}"
                     ),
                     ticker=ticker,
                     duration_ms=self.tracer.elapsed_ms(started),
@@ -296,55 +339,47 @@ class Agent:
                         duration_ms=self.tracer.elapsed_ms(started),
                     )
 
-            # Task: compare two stocks
+            # Task: compare (rank) two or more stocks
             elif task["task"] == "compare_metrics":
-                # Find tickers that have computed metrics
-                metric_keys = [key for key in self.memory.keys() if key.endswith("_metrics")]
-                # We can only compare exactly two tickers
-                if len(metric_keys) != 2:
-                    raise ValueError("Comparison requires exactly two valid tickers.")
-                # Extract ticker symbols from memory keys
-                ticker_a = metric_keys[0].replace("_metrics", "")
-                ticker_b = metric_keys[1].replace("_metrics", "")
-                # Load metrics for both stocks
-                metrics_a = self.memory.get(f"{ticker_a}_metrics")
-                metrics_b = self.memory.get(f"{ticker_b}_metrics")
-                # Compare metrics (return, Sharpe, etc.)
+                # Find tickers that have computed metrics, in plan order
+                tickers = [key[: -len("_metrics")] for key in self.memory.keys()
+                           if key.endswith("_metrics")]
+                # A comparison needs at least two valid tickers
+                if len(tickers) < 2:
+                    raise ValueError("Comparison requires at least two valid tickers.")
+                metrics_by_ticker = {t: self.memory.get(f"{t}_metrics") for t in tickers}
+                price_data_by_ticker = {t: self.memory.get(f"{t}_data") for t in tickers}
+
+                # Rank on Sharpe ratio, then total return; correlate daily returns
                 started = self.tracer.now()
-                comparison = compare_metrics(metrics_a, metrics_b, ticker_a, ticker_b)
+                comparison = rank_metrics(metrics_by_ticker)
+                comparison["correlation"] = compute_correlation_matrix(
+                    build_close_frame(price_data_by_ticker)
+                )
                 self.memory.set("comparison", comparison)
-                logging.info(f"Created comparison for {ticker_a} vs {ticker_b}")
+                label = " vs ".join(tickers) if len(tickers) == 2 else f"{len(tickers)} tickers"
+                logging.info(f"Created comparison for {label}")
 
-                # Build comparison chart
-                price_data_a = self.memory.get(f"{ticker_a}_data")
-                price_data_b = self.memory.get(f"{ticker_b}_data")
-                # Use the same period for both stocks
-                period = self.memory.get(f"{ticker_a}_period", "unknown")
+                # Build the normalized growth chart. Use the same period for all
+                period = self.memory.get(f"{tickers[0]}_period", "unknown")
                 charts_dir = Path("output") / "charts"
-                # Create comparison chart
-                compare_chart_path = plot_comparison_normalized(
-                    price_data_a,
-                    price_data_b,
-                    ticker_a,
-                    ticker_b,
-                    period,
-                    charts_dir,
+                compare_chart_path = plot_growth_comparison(
+                    price_data_by_ticker, period, charts_dir,
                 )
 
                 # Store chart path so HTML dashboard can display it
                 self.memory.set("comparison_chart_path", str(compare_chart_path.resolve()))
-                logging.info(f"Saved comparison chart for {ticker_a} vs {ticker_b}")
+                logging.info(f"Saved comparison chart for {label}")
 
-                try:
-                    return_a = metrics_a.get("total_return")
-                    return_b = metrics_b.get("total_return")
-                    if return_a is not None and return_b is not None:
-                        leader = ticker_a if float(return_a) >= float(return_b) else ticker_b
-                        detail = f"{ticker_a} vs {ticker_b} · {leader} leads on total return"
-                    else:
-                        detail = f"{ticker_a} vs {ticker_b} · normalized growth chart built"
-                except Exception:
-                    detail = f"{ticker_a} vs {ticker_b}"
+                returns = {
+                    t: float(m["total_return"]) for t, m in metrics_by_ticker.items()
+                    if m.get("total_return") is not None
+                }
+                leader = max(returns, key=returns.get) if returns else None
+                if leader:
+                    detail = f"{label} · {leader} leads on total return"
+                else:
+                    detail = f"{label} · normalized growth chart built"
                 self.tracer.record(
                     "compare", "Compare & build growth chart", "ok",
                     detail=detail, duration_ms=self.tracer.elapsed_ms(started),
@@ -1,5 +1,7 @@
 import time
 
+from tools.swr import pop_stale_note
+
 """
 Lightweight execution tracer.
 
@@ -46,7 +48,12 @@ class AgentTracer:
 
         status is one of: "ok", "warn" (ran but data unavailable),
         "skip" (not applicable), or "error" (the call failed).
+        A step whose data came from a stale cache entry (see tools/swr.py)
+        gets "served stale (age Xm)" appended to its detail.
         """
+        stale_note = pop_stale_note(tool, ticker)
+        if stale_note:
+            detail = f"{detail} · {stale_note}" if detail else stale_note
         self._seq += 1
         event = {
             "seq": self._seq,
@@ -1,33 +1,71 @@
 from flask import Flask, render_template, request, send_file, abort, redirect, url_for, jsonify
 from pathlib import Path
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 import math
+import os
 import re
 import threading
 import time
 import uuid
-import yfinance as yf
 from main import run_analysis_from_request
 from agent_trace import AgentTracer
-from history import clear_history, delete_history_file, load_recent_history
+from history import (
+    SEARCHABLE_METRICS,
+    clear_history,
+    delete_history_entry,
+    load_history_page,
+    load_recent_history,
+    search_history,
+)
 from watchlist import (
     add_to_watchlist,
+    build_watchlist_analytics,
     build_watchlist_summary,
     clear_watchlist,
     load_watchlist,
     remove_from_watchlist,
 )
 from tools.interactive_charts import (
-    build_comparison_chart_json,
+    build_growth_comparison_chart_json,
     build_price_chart_json,
 )
-from tools.analyst import brand_color_for_ticker, logo_candidates_for_ticker, logo_url_for_ticker
+from tools.analyst import logo_candidates_for_ticker
+from tools.asset_prefetch import cached_brand_color, prefetch_assets
+from tools.logo_images import fetch_logo_image, normalize_logo_symbol
 from tools.crypto import is_crypto_symbol, normalize_crypto_symbol
-from tools.symbol_search import search_symbols
+from tools.lazy_modules import lazy_module, preload
+from tools import data_fetch, disk_janitor, http_session, io_executor, market_calendar, rate_limit, resilience
+from tools.io_executor import run_all
+from tools.quotes import fetch_batch_prices
+from tools.metrics import MAX_COMPARISON_TICKERS, build_close_frame, compute_horizon_scores
+from tools.symbol_search import LookupDeferred, cache_stats as symbol_search_stats, search_symbols
+
+yf = lazy_module("yfinance")
 
 app = Flask(__name__)
+
+# Gunicorn serves every request from a fixed set of threads (Procfile:
+# --threads 8). Counting the busy ones shows how close polling and analyses
+# come to starving each other; /api/stats reports it.
+REQUEST_THREADS = int(os.getenv("GUNICORN_THREADS", "8"))
+_request_threads = {"busy": 0, "peak_busy": 0}
+_request_threads_lock = threading.Lock()
+
+
+@app.before_request
+def _count_request_thread():
+    with _request_threads_lock:
+        _request_threads["busy"] += 1
+        _request_threads["peak_busy"] = max(_request_threads["peak_busy"], _request_threads["busy"])
+
+
+@app.teardown_request
+def _release_request_thread(exc=None):
+    with _request_threads_lock:
+        _request_threads["busy"] -= 1
+
+
 PROJECT_ROOT = Path(__file__).resolve().parent
 ALLOWED_FILE_DIRS = [
     PROJECT_ROOT / "output",
@@ -442,8 +480,10 @@ def build_fundamentals_card(fundamentals, logo_url=None):
         "error": fundamentals.get("error"),
     }
 
-def build_report_metric_card(ticker, metrics, logo_url=None):
+def build_report_metric_card(ticker, metrics, logo_url=None, benchmark=None):
     metrics = metrics or {}
+    beta_label = f"Beta vs {benchmark}" if benchmark else "Beta"
+    correlation_label = f"Correlation vs {benchmark}" if benchmark else "Correlation"
     return {
         "ticker": ticker,
         "logo_url": logo_url,
@@ -457,6 +497,15 @@ def build_report_metric_card(ticker, metrics, logo_url=None):
             {"label": "Max drawdown", "value": format_percent(metrics.get("max_drawdown"))},
             {"label": "20-day moving average", "value": format_number(metrics.get("ma_20"))},
             {"label": "50-day moving average", "value": format_number(metrics.get("ma_50"))},
+            {"label": "Sortino ratio", "value": format_number(metrics.get("sortino_ratio"))},
+            {"label": "Calmar ratio", "value": format_number(metrics.get("calmar_ratio"))},
+            {"label": "Downside deviation", "value": format_percent(metrics.get("downside_deviation"))},
+            {"label": "VaR 95% (historical)", "value": format_percent(metrics.get("var_95"))},
+            {"label": "CVaR 95% (historical)", "value": format_percent(metrics.get("cvar_95"))},
+            {"label": "VaR 95% (parametric)", "value": format_percent(metrics.get("var_95_parametric"))},
+            {"label": "CVaR 95% (parametric)", "value": format_percent(metrics.get("cvar_95_parametric"))},
+            {"label": beta_label, "value": format_number(metrics.get("beta"))},
+            {"label": correlation_label, "value": format_number(metrics.get("correlation"))},
         ],
     }
 
@@ -542,13 +591,36 @@ def build_trace_view(trace):
     }
 
 
+def build_quote(symbol, price, previous_close):
+    """Presentation-ready quote dict shared by the single and batch paths."""
+    change = None
+    change_percent = None
+    if previous_close not in (None, 0):
+        change = price - previous_close
+        change_percent = change / previous_close
+
+    return {
+        "ticker": symbol,
+        "price": price,
+        "price_text": (f"{price:,.2f}" if symbol.startswith("^") else format_currency(price)),
+        "change": change,
+        "change_text": format_signed_currency(change),
+        "change_percent": change_percent,
+        "change_percent_text": format_signed_percent(change_percent),
+        "direction": "positive" if change and change > 0 else "negative" if change and change < 0 else "neutral",
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "is_crypto": is_crypto_symbol(symbol),
+        "source": "Yahoo Finance",
+    }
+
+
 def fetch_live_quote(ticker):
     symbol = ticker.strip().upper()
     if not symbol:
         raise ValueError("Ticker is required.")
 
     yahoo_symbol = normalize_crypto_symbol(symbol)
-    stock = yf.Ticker(yahoo_symbol)
+    stock = yf.Ticker(yahoo_symbol, session=http_session.shared_session())
     fast_info = {}
     try:
         fast_info = stock.fast_info or {}
@@ -573,25 +645,8 @@ def fetch_live_quote(ticker):
     if price is None:
         raise ValueError(f"No live quote found for {symbol}.")
 
-    change = None
-    change_percent = None
-    if previous_close not in (None, 0):
-        change = price - previous_close
-        change_percent = change / previous_close
+    return build_quote(symbol, price, previous_close)
 
-    return {
-        "ticker": symbol,
-        "price": price,
-        "price_text": (f"{price:,.2f}" if symbol.startswith("^") else format_currency(price)),
-        "change": change,
-        "change_text": format_signed_currency(change),
-        "change_percent": change_percent,
-        "change_percent_text": format_signed_percent(change_percent),
-        "direction": "positive" if change and change > 0 else "negative" if change and change < 0 else "neutral",
-        "updated_at": datetime.now().isoformat(timespec="seconds"),
-        "is_crypto": is_crypto_symbol(symbol),
-        "source": "Yahoo Finance",
-    }
 
 @app.route("/open")
 def open_file():
@@ -618,15 +673,15 @@ def open_file():
 
 @app.route("/history/delete", methods=["POST"])
 def delete_history_run():
-    history_path = request.form.get("history_path", "").strip()
+    history_id = request.form.get("history_id", "").strip()
 
-    if not history_path:
+    if not history_id:
         abort(400)
 
     try:
-        delete_history_file(history_path)
+        delete_history_entry(history_id)
     except ValueError:
-        abort(403)
+        abort(400)
 
     return redirect(url_for("index"))
 
@@ -636,6 +691,88 @@ def clear_history_runs():
     clear_history()
     return redirect(url_for("index"))
 
+
+@app.route("/api/history")
+def history_page():
+    try:
+        page = int(request.args.get("page", 1))
+        per_page = int(request.args.get("per_page", 20))
+    except ValueError:
+        return jsonify({"error": "page and per_page must be integers"}), 400
+
+    result = load_history_page(page=page, per_page=per_page)
+    for run in result["runs"]:
+        run["display_time"] = format_history_timestamp(run.get("timestamp"))
+    return jsonify(result)
+
+
+# e.g. /api/history/search?ticker=NVDA&min_sharpe_ratio=1&from=2025-01-01&q=earnings
+@app.route("/api/history/search")
+def history_search():
+    args = request.args
+    comparison = args.get("comparison", "").strip().lower()
+
+    try:
+        metric_filters = {}
+        for metric in SEARCHABLE_METRICS:
+            minimum = args.get(f"min_{metric}", "").strip()
+            maximum = args.get(f"max_{metric}", "").strip()
+            if minimum or maximum:
+                metric_filters[metric] = (
+                    float(minimum) if minimum else None,
+                    float(maximum) if maximum else None,
+                )
+
+        result = search_history(
+            text=args.get("q", "").strip() or None,
+            ticker=args.get("ticker", "").strip() or None,
+            start_date=args.get("from", "").strip() or None,
+            end_date=args.get("to", "").strip() or None,
+            metric_filters=metric_filters,
+            comparison={"1": True, "true": True, "0": False, "false": False}.get(comparison),
+            page=int(args.get("page", 1)),
+            per_page=int(args.get("per_page", 20)),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    for run in result["runs"]:
+        run["display_time"] = format_history_timestamp(run.get("timestamp"))
+    return jsonify(result)
+
+# Live quotes for many symbols come from one batch provider (tools/quotes.py,
+# a handful of multi-symbol requests); only the symbols it misses fall back to
+# the per-symbol fetch_live_quote. Everything runs on the shared I/O pool
+# (tools/io_executor.py), each endpoint under its own budget so one poller
+# can't take every thread. A fallback quote that hasn't arrived by the
+# deadline is reported as an error for this poll.
+QUOTE_DEADLINE_SECONDS = 8
+
+
+def _fetch_live_quotes(tickers, budget):
+    quotes = {}
+    errors = {}
+    yahoo_symbols = {ticker: normalize_crypto_symbol(ticker) for ticker in tickers}
+    with rate_limit.priority("quotes"):
+        batch = fetch_batch_prices(yahoo_symbols.values(), budget)
+
+        missing = []
+        for ticker, yahoo_symbol in yahoo_symbols.items():
+            prices = batch.get(yahoo_symbol)
+            if prices:
+                quotes[ticker] = build_quote(ticker, prices["price"], prices["previous_close"])
+            else:
+                missing.append(ticker)
+
+        for ticker, quote, error in run_all(budget, fetch_live_quote, missing,
+                                            timeout=QUOTE_DEADLINE_SECONDS):
+            if quote:
+                quotes[ticker] = quote
+            else:
+                errors[ticker] = str(error) if error is not None else None
+    return quotes, errors
+
+
 @app.route("/api/quotes")
 def live_quotes():
     raw_tickers = request.args.get("tickers", "")
@@ -644,18 +781,12 @@ def live_quotes():
         for ticker in raw_tickers.split(",")
         if ticker.strip()
     ]
-    tickers = list(dict.fromkeys(tickers))[:2]
+    tickers = list(dict.fromkeys(tickers))[:MAX_COMPARISON_TICKERS]
 
     if not tickers:
         return jsonify({"quotes": {}, "errors": {"request": "No tickers provided."}}), 400
 
-    quotes = {}
-    errors = {}
-    for ticker in tickers:
-        try:
-            quotes[ticker] = fetch_live_quote(ticker)
-        except Exception as exc:
-            errors[ticker] = str(exc)
+    quotes, errors = _fetch_live_quotes(tickers, "quotes")
 
     return jsonify({
         "quotes": quotes,
@@ -666,7 +797,7 @@ def live_quotes():
 
 @app.route("/api/tape-quotes")
 def tape_quotes():
-    """Bulk quote fetch for the ticker tape — parallel, up to 20 symbols."""
+    """Bulk quote fetch for the ticker tape, parallel under the "tape" budget."""
     raw_tickers = request.args.get("tickers", "")
     tickers = [t.strip().upper() for t in raw_tickers.split(",") if t.strip()]
     tickers = list(dict.fromkeys(tickers))[:60]
@@ -674,21 +805,7 @@ def tape_quotes():
     if not tickers:
         return jsonify({"quotes": {}, "errors": {}}), 400
 
-    quotes = {}
-    errors = {}
-
-    def _fetch(ticker):
-        try:
-            return ticker, fetch_live_quote(ticker), None
-        except Exception as exc:
-            return ticker, None, str(exc)
-
-    with ThreadPoolExecutor(max_workers=min(len(tickers), 20)) as pool:
-        for ticker, quote, err in pool.map(_fetch, tickers):
-            if quote:
-                quotes[ticker] = quote
-            else:
-                errors[ticker] = err
+    quotes, errors = _fetch_live_quotes(tickers, "tape")
 
     return jsonify({
         "quotes": quotes,
@@ -699,59 +816,22 @@ def tape_quotes():
 
 def _fetch_watchlist_quotes(items):
     """Fetch live quotes for every watchlist ticker in parallel."""
-    tickers = [item["ticker"] for item in items]
-    quotes = {}
-    errors = {}
-    if not tickers:
-        return quotes, errors
-
-    def _fetch(ticker):
-        try:
-            return ticker, fetch_live_quote(ticker), None
-        except Exception as exc:
-            return ticker, None, str(exc)
-
-    with ThreadPoolExecutor(max_workers=min(len(tickers), 20)) as pool:
-        for ticker, quote, err in pool.map(_fetch, tickers):
-            if quote:
-                quotes[ticker] = quote
-            else:
-                errors[ticker] = err
-    return quotes, errors
+    return _fetch_live_quotes([item["ticker"] for item in items], "watchlist")
 
 
 # Logo sources are resolved over the network the first time a ticker is seen,
 # then cached on disk. That network work must never run inside the 30-second
 # watchlist poll: a slow probe would stall the (single-shared) request handling
 # and freeze every live price. So the poll path reads logos from cache only, and
-# this warmer resolves them once per ticker in the background.
-_logo_warm_seen = set()
-_logo_warm_lock = threading.Lock()
-
-
-def _warm_logos_async(tickers):
-    """Resolve + cache logo sources for new tickers off the request path."""
-    with _logo_warm_lock:
-        fresh = [t for t in tickers if t and t not in _logo_warm_seen]
-        _logo_warm_seen.update(fresh)
-    if not fresh:
-        return
-
-    def _run():
-        for ticker in fresh:
-            try:
-                logo_candidates_for_ticker(ticker, allow_network=True)
-            except Exception:
-                pass
-
-    threading.Thread(target=_run, daemon=True).start()
+# the shared asset-prefetch service (tools/asset_prefetch.py) resolves them once
+# per ticker in the background.
 
 
 def _watchlist_items_payload(items):
-    """Attach ordered logo candidates to each item for client-side rendering.
+    """Attach each item's same-origin logo URL for client-side rendering.
 
-    Cache-only (allow_network=False) so a poll never blocks on the network;
-    `_warm_logos_async` populates that cache in the background.
+    The /logo route never blocks on the network; `prefetch_assets` fills its
+    cache in the background.
     """
     if not items:
         return []
@@ -760,16 +840,46 @@ def _watchlist_items_payload(items):
         {
             "ticker": item["ticker"],
             "shares": item.get("shares"),
-            "logos": logo_candidates_for_ticker(item["ticker"], allow_network=False),
+            "logos": [url_for("logo_image", ticker=item["ticker"])],
         }
         for item in items
     ]
 
 
+# Logos are immutable enough to cache for a week; the ETag covers the rest.
+LOGO_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+
+@app.route("/logo/<ticker>")
+def logo_image(ticker):
+    """Same-origin, resized logo from the disk cache.
+
+    Not cached yet: queue the warmup and redirect (uncached) to the best
+    remote source already known, so the first view still shows a logo without
+    this request waiting on downloads.
+    """
+    symbol = normalize_logo_symbol(ticker)
+    if symbol is None:
+        abort(404)
+
+    path = fetch_logo_image(symbol, allow_network=False)
+    if path is not None:
+        return send_file(path.resolve(), mimetype="image/png",
+                         max_age=LOGO_MAX_AGE_SECONDS, etag=True, conditional=True)
+
+    prefetch_assets([symbol])
+    candidates = logo_candidates_for_ticker(symbol, allow_network=False)
+    if not candidates:
+        abort(404)
+    response = redirect(candidates[0])
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
 @app.route("/api/watchlist")
 def watchlist_summary():
     items = load_watchlist()
-    _warm_logos_async([item["ticker"] for item in items])
+    prefetch_assets([item["ticker"] for item in items])
     quotes, errors = _fetch_watchlist_quotes(items)
     summary = build_watchlist_summary(items, quotes)
     return jsonify({
@@ -780,13 +890,177 @@ def watchlist_summary():
     })
 
 
+# Watchlist risk/return table: one year of daily history for every symbol,
+# fetched in one batched download (tools/data_fetch.py) and scored in single
+# NumPy passes. Daily bars only move once per session, so the scored table is
+# cached per ticker set until the price cache would expire too (the session's
+# close, or the next open) — every poll in between is a dictionary lookup. Adding a ticker re-scores the list, but only the new
+# symbol goes to the network; the rest come from the price cache.
+WATCHLIST_ANALYTICS_PERIOD = "1y"
+WATCHLIST_ERROR_RETRY_SECONDS = 60
+_watchlist_analytics_cache = {}
+_watchlist_analytics_lock = threading.Lock()
+
+
+def _current_trading_day():
+    """Today's date in New York, rolled back over weekends and NYSE holidays."""
+    return market_calendar.last_trading_day().isoformat()
+
+
+def _watchlist_scores(tickers):
+    """{ticker: horizon scores} plus {ticker: error}, cached until the daily
+    bars can change (market_calendar.cache_expiry, as the price cache uses).
+
+    A result with errors (a transient Yahoo failure, or a fetch the limiter
+    shed) is only kept for WATCHLIST_ERROR_RETRY_SECONDS. The retry reads the
+    symbols that did load from the price cache, so only the failed ones go
+    back to the network.
+    """
+    key = (_current_trading_day(), tuple(sorted(tickers)))
+    with _watchlist_analytics_lock:
+        cached = _watchlist_analytics_cache.get(key)
+    if cached is not None and time.time() < cached["expires_at"]:
+        return cached["scores"], cached["errors"]
+
+    with rate_limit.priority("quotes"):
+        fetched, errors = data_fetch.fetch_price_histories(tickers, WATCHLIST_ANALYTICS_PERIOD)
+    scores = compute_horizon_scores(build_close_frame(fetched)) if fetched else {}
+    degraded = bool(errors) or not fetched
+    now = time.time()
+    expires_at = market_calendar.cache_expiry(now, data_fetch.CACHE_MAX_AGE_SECONDS)
+    if degraded:
+        expires_at = min(expires_at, now + WATCHLIST_ERROR_RETRY_SECONDS)
+    with _watchlist_analytics_lock:
+        # Entries from previous trading days are dead weight; drop them.
+        for stale in [k for k in _watchlist_analytics_cache if k[0] != key[0]]:
+            del _watchlist_analytics_cache[stale]
+        _watchlist_analytics_cache[key] = {
+            "scores": scores,
+            "errors": errors,
+            "expires_at": expires_at,
+        }
+    return scores, errors
+
+
+@app.route("/api/watchlist/analytics")
+def watchlist_analytics():
+    items = load_watchlist()
+    tickers = [normalize_crypto_symbol(item["ticker"]) for item in items]
+    scores, errors = _watchlist_scores(tickers) if tickers else ({}, {})
+    # Scores are keyed by Yahoo symbol; rows by the ticker as saved.
+    by_item = {item["ticker"]: scores.get(symbol)
+               for item, symbol in zip(items, tickers)}
+    return jsonify({
+        "rows": build_watchlist_analytics(items, by_item),
+        "errors": errors,
+        "period": WATCHLIST_ANALYTICS_PERIOD,
+        "trading_day": _current_trading_day(),
+    })
+
+
 # Typeahead suggestions are served through tools/symbol_search.py, which hits
-# Yahoo's search endpoint behind a small TTL cache shared with the LLM agent's
+# Yahoo's search endpoint behind an LRU + TTL cache shared with the LLM agent's
 # resolve_symbol tool — both for speed and to stay clear of Yahoo throttling.
+#
+# Only the latest keystroke matters, and Gunicorn has just 8 threads shared
+# with analyses and quote polling. So each browser tab sends a `client` id and
+# an increasing `seq`: a request that a newer one from the same client has
+# superseded skips its Yahoo lookup, and Yahoo lookups are capped per client
+# and overall. Over the cap → 429 with Retry-After: the browser keeps its last
+# list and asks again after the delay if that query is still the latest.
+# Lookups run at the Yahoo rate limiter's "typeahead" priority; one it sheds
+# gets the same 429.
+TYPEAHEAD_MAX_PER_CLIENT = 2
+TYPEAHEAD_MAX_TOTAL = 3
+_typeahead_latest_seq = {}
+_typeahead_active = {}
+_typeahead_lock = threading.Lock()
+
+
+def _typeahead_client_key():
+    forwarded = request.headers.get("X-Forwarded-For", "")
+    address = forwarded.split(",")[0].strip() or request.remote_addr or ""
+    return address, (request.args.get("client") or "")[:64]
+
+
+class _TypeaheadGate:
+    """Admits one client's Yahoo lookup if it is current and under the caps."""
+
+    def __init__(self, client_key, seq):
+        self.client_key = client_key
+        self.seq = seq
+
+    def __enter__(self):
+        with _typeahead_lock:
+            if self.seq < _typeahead_latest_seq.get(self.client_key, 0):
+                raise LookupDeferred("superseded")
+            if (_typeahead_active.get(self.client_key, 0) >= TYPEAHEAD_MAX_PER_CLIENT
+                    or sum(_typeahead_active.values()) >= TYPEAHEAD_MAX_TOTAL):
+                raise LookupDeferred("busy")
+            _typeahead_active[self.client_key] = _typeahead_active.get(self.client_key, 0) + 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with _typeahead_lock:
+            remaining = _typeahead_active.get(self.client_key, 0) - 1
+            if remaining > 0:
+                _typeahead_active[self.client_key] = remaining
+            else:
+                _typeahead_active.pop(self.client_key, None)
+        return False
+
+
 @app.route("/api/symbol-search")
 def symbol_search():
     """Symbol suggestions for the watchlist add box (Google-style typeahead)."""
-    return jsonify({"results": search_symbols(request.args.get("q"))})
+    client_key = _typeahead_client_key()
+    try:
+        seq = int(request.args.get("seq", 0))
+    except ValueError:
+        seq = 0
+    with _typeahead_lock:
+        if seq > _typeahead_latest_seq.get(client_key, 0):
+            _typeahead_latest_seq[client_key] = seq
+        if len(_typeahead_latest_seq) > 5000:   # forget idle tabs
+            _typeahead_latest_seq.clear()
+            _typeahead_latest_seq[client_key] = seq
+
+    try:
+        with rate_limit.priority("typeahead"):
+            results = search_symbols(request.args.get("q"),
+                                     network_gate=lambda: _TypeaheadGate(client_key, seq))
+    except LookupDeferred as deferred:
+        if deferred.reason in ("busy", "rate_limited"):
+            return jsonify({"results": [], "deferred": deferred.reason}), 429, {"Retry-After": "1"}
+        return jsonify({"results": [], "deferred": deferred.reason})
+    return jsonify({"results": results})
+
+
+@app.route("/api/stats")
+def service_stats():
+    """Cache and saturation counters for monitoring."""
+    with _request_threads_lock:
+        request_threads = {
+            "capacity": REQUEST_THREADS,
+            "busy": _request_threads["busy"],
+            "peak_busy": _request_threads["peak_busy"],
+            "utilization": round(_request_threads["busy"] / REQUEST_THREADS, 3),
+        }
+    return jsonify({
+        "request_threads": request_threads,
+        "io_budgets": io_executor.stats(),
+        "http": http_session.stats(),
+        "yahoo_rate_limit": rate_limit.stats(),
+        "upstream_circuits": resilience.stats(),
+        "symbol_search": symbol_search_stats(),
+        "disk_janitor": disk_janitor.stats(),
+    })
+
+
+@app.route("/api/disk-usage")
+def disk_usage():
+    """Usage per output category and what the janitor would remove (dry run)."""
+    return jsonify(disk_janitor.usage_report())
 
 
 @app.route("/watchlist/add", methods=["POST"])
@@ -810,14 +1084,9 @@ def watchlist_add():
     except ValueError as exc:
         return jsonify({"ok": False, "error": str(exc)}), 400
 
-    # Warm this ticker's logo cache once (network) so the cache-only payload
-    # below returns its real brand mark on the very first render.
-    try:
-        logo_candidates_for_ticker(ticker, allow_network=True)
-        with _logo_warm_lock:
-            _logo_warm_seen.add(ticker)
-    except Exception:
-        pass
+    # Warm the logo and brand colour in the background; until it lands the
+    # /logo route redirects to the best known remote source.
+    prefetch_assets([ticker])
 
     return jsonify({"ok": True, "items": _watchlist_items_payload(items)})
 
@@ -836,6 +1105,44 @@ def watchlist_clear():
     return jsonify({"ok": True, "items": _watchlist_items_payload(items)})
 
 
+def build_ranking_rows(comparison):
+    """Formatted ranking rows for an N-way comparison (empty for two tickers,
+    where the winner strip already says everything)."""
+    ranking = (comparison or {}).get("ranking") or []
+    if len(ranking) < 3:
+        return []
+    return [{
+        "rank": row.get("rank"),
+        "ticker": row.get("ticker"),
+        "sharpe_ratio": format_number(row.get("sharpe_ratio")),
+        "total_return": format_percent(row.get("total_return")),
+        "volatility": format_percent(row.get("volatility")),
+        "max_drawdown": format_percent(row.get("max_drawdown")),
+    } for row in ranking]
+
+
+def build_correlation_view(comparison):
+    """Correlation matrix as rows of {value, label, alpha} cells for the heatmap
+    table; alpha is |correlation| so the tint tracks strength, not sign."""
+    correlation = (comparison or {}).get("correlation") or {}
+    tickers = correlation.get("tickers") or []
+    matrix = correlation.get("matrix") or []
+    if len(tickers) < 2 or len(matrix) != len(tickers):
+        return None
+    rows = []
+    for ticker, values in zip(tickers, matrix):
+        cells = []
+        for value in values:
+            number = as_float(value)
+            cells.append({
+                "label": f"{number:.2f}" if number is not None else "—",
+                "positive": number is None or number >= 0,
+                "alpha": round(min(abs(number), 1.0) * 0.55, 3) if number is not None else 0,
+            })
+        rows.append({"ticker": ticker, "cells": cells})
+    return {"tickers": tickers, "rows": rows}
+
+
 def build_result_context(result):
     """Convert a completed analysis result into the template's result-derived
     kwargs (cards, charts, trace). Shared by the synchronous POST path and the
@@ -853,6 +1160,8 @@ def build_result_context(result):
         "analyst_cards": [],
         "news_cards": [],
         "comparison_result": None,
+        "comparison_ranking": [],
+        "correlation_matrix": None,
         "trace": None,
         "analyst_gauge": ANALYST_GAUGE,
     }
@@ -866,6 +1175,7 @@ def build_result_context(result):
         return context
 
     # Collect per-ticker charts, metrics, and research cards
+    prefetch_assets(tickers)   # no-op for tickers already warmed
     brand_by_ticker = {}
     for ticker in tickers:
         is_crypto = is_crypto_symbol(ticker)
@@ -877,9 +1187,11 @@ def build_result_context(result):
         period = result.get("period", "")
         metrics = memory.get(f"{ticker}_metrics", {}) or {}
         analyst_view = memory.get(f"{ticker}_analyst_view") or {}
-        logo_url = analyst_view.get("logo_url") or logo_url_for_ticker(ticker)
+        logo_url = url_for("logo_image", ticker=ticker)
         # Company brand hue, extracted from the logo, used to tint each card.
-        brand_rgb = brand_color_for_ticker(ticker, logo_url)
+        # Cache-only: the agent queued the warmup when it fetched prices, and
+        # an un-warmed ticker renders with the default surface until it lands.
+        brand_rgb = cached_brand_color(ticker)
         brand_by_ticker[ticker] = brand_rgb
 
         if price_data is not None:
@@ -898,8 +1210,12 @@ def build_result_context(result):
             "total_return": format_percent(metrics.get("total_return")),
             "volatility": format_percent(metrics.get("volatility")),
             "sharpe_ratio": format_number(metrics.get("sharpe_ratio")),
+            "sortino_ratio": format_number(metrics.get("sortino_ratio")),
+            "var_95": format_percent(metrics.get("var_95")),
         })
-        report_card = build_report_metric_card(ticker, metrics, logo_url)
+        report_card = build_report_metric_card(
+            ticker, metrics, logo_url, memory.get(f"{ticker}_benchmark"),
+        )
         report_card["brand_rgb"] = brand_rgb
         context["report_metric_cards"].append(report_card)
 
@@ -931,21 +1247,22 @@ def build_result_context(result):
             "items": ticker_news[:3],
         })
 
-    # Collect comparison chart if it exists
+    # Collect comparison chart if it exists. The card gradient runs from the
+    # first to the last compared ticker's brand hue.
     context["comparison_chart_path"] = memory.get("comparison_chart_path")
     context["comparison_result"] = memory.get("comparison")
-    if len(tickers) == 2:
-        price_data_a = memory.get(f"{tickers[0]}_data")
-        price_data_b = memory.get(f"{tickers[1]}_data")
-        if price_data_a is not None and price_data_b is not None:
-            context["interactive_comparison_chart"] = {
-                "id": "interactive-comparison-chart",
-                "brand_rgb_a": brand_by_ticker.get(tickers[0]),
-                "brand_rgb_b": brand_by_ticker.get(tickers[1]),
-                "figure_json": build_comparison_chart_json(
-                    price_data_a, price_data_b, tickers[0], tickers[1], result.get("period", ""),
-                ),
-            }
+    context["comparison_ranking"] = build_ranking_rows(context["comparison_result"])
+    context["correlation_matrix"] = build_correlation_view(context["comparison_result"])
+    compared = [t for t in tickers if memory.get(f"{t}_data") is not None]
+    if len(tickers) >= 2 and len(compared) >= 2:
+        context["interactive_comparison_chart"] = {
+            "id": "interactive-comparison-chart",
+            "brand_rgb_a": brand_by_ticker.get(compared[0]),
+            "brand_rgb_b": brand_by_ticker.get(compared[-1]),
+            "figure_json": build_growth_comparison_chart_json(
+                {t: memory.get(f"{t}_data") for t in compared}, result.get("period", ""),
+            ),
+        }
 
     # Collect optional LLM summaries (tinted with the company's brand hue; the
     # comparison summary gets both hues split like the comparison chart).
@@ -959,9 +1276,9 @@ def build_result_context(result):
     comparison_llm = memory.get("comparison_llm_summary")
     if comparison_llm:
         summary_card = build_llm_summary_card("Comparison AI Summary", comparison_llm)
-        if len(tickers) == 2:
+        if len(tickers) >= 2:
             summary_card["brand_rgb_a"] = brand_by_ticker.get(tickers[0])
-            summary_card["brand_rgb_b"] = brand_by_ticker.get(tickers[1])
+            summary_card["brand_rgb_b"] = brand_by_ticker.get(tickers[-1])
         context["llm_summaries"].append(summary_card)
 
     return context
@@ -1129,6 +1446,36 @@ def index():
         **result_context,
     )
 
+# ── Boot warmup ──
+# The heavy libraries (pandas, yfinance, Matplotlib, Plotly, OpenAI) are bound
+# lazily — see tools/lazy_modules.py — so a Gunicorn worker can accept traffic
+# within a fraction of a second of a deploy or restart. The warmup then imports
+# them on a background thread so the first analysis doesn't pay for them
+# either. Set WARMUP_ON_BOOT=0 to skip it (e.g. when measuring boot cost).
+def warm_up():
+    """Import the heavy libraries now; logs (never raises) on failure."""
+    started = time.perf_counter()
+    errors = preload()
+    for name, message in errors.items():
+        logging.warning("Warmup could not import %s: %s", name, message)
+    logging.info("Warmup finished in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+def start_background_warmup():
+    thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+if os.getenv("WARMUP_ON_BOOT", "1") != "0":
+    start_background_warmup()
+
+# Keep output/, reports/generated and the caches within their disk budgets
+# (tools/disk_janitor.py). Set DISK_JANITOR=0 to disable.
+if os.getenv("DISK_JANITOR", "1") != "0":
+    disk_janitor.start_janitor()
+
+
 if __name__ == "__main__":
     # threaded=True so a slow request (e.g. a first-time logo probe) can never
     # block the live-quote endpoints that poll every few seconds.
@@ -1,18 +1,218 @@
+"""
+Run history, stored in SQLite.
+
+One row per analysis run in `runs` (the full saved record lives in its JSON
+`payload` column) plus one row per analyzed ticker in `run_tickers`, so the
+Recent Runs list and ticker lookups are index scans instead of a directory
+glob + stat + open of every file ever written. The database runs in WAL mode:
+the web app's request threads can read while a finished analysis is writing.
+
+Runs saved by older versions as output/history/run_*.json are imported on
+first use and the files moved to output/history/migrated/.
+
+`search_history` filters on ticker, date range and per-ticker metric
+thresholds, plus full-text search (SQLite FTS5) over the request text and
+the generated report.
+"""
+
 import json
-from datetime import datetime
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List
 
 # Sets the history folder
 HISTORY_DIR = Path("output") / "history"
+HISTORY_DB_NAME = "history.db"
+SCHEMA_VERSION = 2
+BUSY_TIMEOUT_MS = 5000
 
-# Save one analysis run as a JSON file in output/history/.
-def save_run_history(user_input, result):
-    HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at     REAL    NOT NULL,
+    timestamp      TEXT    NOT NULL,
+    user_input     TEXT,
+    period         TEXT,
+    is_comparison  INTEGER NOT NULL DEFAULT 0,
+    payload        TEXT    NOT NULL,
+    source_file    TEXT    UNIQUE
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS run_tickers (
+    run_id         INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    ticker         TEXT    NOT NULL,
+    total_return   REAL,
+    volatility     REAL,
+    sharpe_ratio   REAL,
+    max_drawdown   REAL,
+    PRIMARY KEY (run_id, ticker)
+);
+CREATE INDEX IF NOT EXISTS idx_run_tickers_ticker ON run_tickers (ticker, run_id);
+"""
+
+# Version 2: full-text index over the request and the report, keyed by run id.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5 (
+    user_input, report, tokenize = 'unicode61'
+);
+"""
+
+# Per-ticker metric columns that search_history can threshold on.
+SEARCHABLE_METRICS = ("total_return", "volatility", "sharpe_ratio", "max_drawdown")
+
+_initialized = set()          # database paths whose schema + migration ran
+_init_lock = threading.Lock()
+
+
+def history_db_path():
+    return HISTORY_DIR / HISTORY_DB_NAME
+
+
+@contextmanager
+def _connect():
+    """Open a connection, commit on success, and always close it."""
+    db_path = history_db_path()
+    _ensure_initialized(db_path)
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _ensure_initialized(db_path):
+    key = str(db_path)
+    if key in _initialized:
+        return
+    with _init_lock:
+        if key in _initialized:
+            return
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+        try:
+            # WAL is persistent: set once, every later connection inherits it.
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA foreign_keys = ON")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            conn.executescript(_SCHEMA)
+            conn.executescript(_FTS_SCHEMA)
+            if 0 < version < 2:
+                _backfill_fts(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            _migrate_json_runs(conn, db_path.parent)
+            conn.commit()
+        finally:
+            conn.close()
+        _initialized.add(key)
+
+
+def _as_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _read_report(report_path):
+    if not report_path:
+        return ""
+    try:
+        return Path(report_path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+
+def _backfill_fts(conn):
+    """Index runs saved before the full-text table existed."""
+    rows = conn.execute("SELECT id, user_input, payload FROM runs").fetchall()
+    conn.executemany(
+        "INSERT INTO runs_fts (rowid, user_input, report) VALUES (?, ?, ?)",
+        [
+            (run_id, user_input or "", _read_report(json.loads(payload).get("report_path")))
+            for run_id, user_input, payload in rows
+        ],
+    )
+
+
+def _insert_run(conn, history_data, created_at, source_file=None, report_text=None):
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO runs "
+        "(created_at, timestamp, user_input, period, is_comparison, payload, source_file) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            created_at,
+            history_data.get("timestamp") or "",
+            history_data.get("user_input"),
+            history_data.get("period"),
+            1 if history_data.get("is_comparison") else 0,
+            json.dumps(history_data, default=str),
+            source_file,
+        ),
+    )
+    if not cursor.rowcount:
+        return None  # this source file was imported before
+    run_id = cursor.lastrowid
+
+    metrics = history_data.get("metrics") or {}
+    tickers = list(dict.fromkeys(history_data.get("tickers") or []))
+    conn.executemany(
+        "INSERT INTO run_tickers "
+        "(run_id, ticker, total_return, volatility, sharpe_ratio, max_drawdown) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (
+                run_id, str(ticker),
+                _as_float((metrics.get(ticker) or {}).get("total_return")),
+                _as_float((metrics.get(ticker) or {}).get("volatility")),
+                _as_float((metrics.get(ticker) or {}).get("sharpe_ratio")),
+                _as_float((metrics.get(ticker) or {}).get("max_drawdown")),
+            )
+            for ticker in tickers
+        ],
+    )
+    if report_text is None:
+        report_text = _read_report(history_data.get("report_path"))
+    conn.execute(
+        "INSERT INTO runs_fts (rowid, user_input, report) VALUES (?, ?, ?)",
+        (run_id, history_data.get("user_input") or "", report_text),
+    )
+    return run_id
+
+
+def _migrate_json_runs(conn, history_dir):
+    """Import legacy run_*.json files, oldest first, then move them aside."""
+    legacy_files = sorted(history_dir.glob("run_*.json"), key=lambda p: p.stat().st_mtime)
+    if not legacy_files:
+        return 0
+
+    migrated_dir = history_dir / "migrated"
+    migrated_dir.mkdir(exist_ok=True)
+    imported = 0
+    for history_file in legacy_files:
+        try:
+            with open(history_file, "r", encoding="utf-8") as f:
+                history_data = json.load(f)
+        except Exception:
+            continue  # leave broken files where they are, as the old loader did
+        if not isinstance(history_data, dict):
+            continue
+        if _insert_run(conn, history_data, history_file.stat().st_mtime, history_file.name):
+            imported += 1
+        history_file.replace(migrated_dir / history_file.name)
+    return imported
 
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    history_path = HISTORY_DIR / f"run_{timestamp}.json"
 
+# Save one analysis run. Returns the new run's id.
+def save_run_history(user_input, result):
     memory = result.get("memory")
     tickers = result.get("tickers", [])
 
@@ -22,7 +222,7 @@ def save_run_history(user_input, result):
             ticker_metrics[ticker] = memory.get(f"{ticker}_metrics", {})
 
     history_data = {
-        "timestamp": timestamp,
+        "timestamp": datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
         "user_input": user_input,
         "tickers": tickers,
         "period": result.get("period"),
@@ -33,62 +233,147 @@ def save_run_history(user_input, result):
         "comparison": memory.get("comparison") if memory is not None else None,
     }
 
-    with open(history_path, "w", encoding="utf-8") as f:
-        json.dump(history_data, f, indent=2, default=str)
+    with _connect() as conn:
+        return _insert_run(conn, history_data, time.time(),
+                           report_text=result.get("report") or "")
 
-    # Returns path to the saved JSON history file.
-    return history_path
 
-# Loads the most recent analysis runs from output/history/.
-def load_recent_history(limit=5):
-    if not HISTORY_DIR.exists():
-        return []
+def _row_to_run(row):
+    run_data = json.loads(row["payload"])
+    run_data["id"] = row["id"]
+    return run_data
 
-    history_files = sorted(
-        HISTORY_DIR.glob("run_*.json"),
-        key=lambda p: p.stat().st_mtime,
-        reverse=True
-    )
 
-    recent_runs = []
+# Loads a page of saved runs, newest first.
+def load_recent_history(limit=5, offset=0):
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT id, payload FROM runs ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            (int(limit), int(offset)),
+        ).fetchall()
+    return [_row_to_run(row) for row in rows]
 
-    for history_file in history_files[:limit]:
-        try:
-            with open(history_file, "r", encoding="utf-8") as f:
-                run_data = json.load(f)
 
-            # Store path too so the UI can show it
-            run_data["history_path"] = str(history_file)
-            recent_runs.append(run_data)
+def count_history():
+    with _connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
 
-        except Exception:
-            # Skip broken history files instead of crashing the app
-            continue
-        
-    # Most the most recent history entries, newest first in the form of a list
-    return recent_runs
 
-def delete_history_file(history_path):
-    history_file = Path(history_path).resolve()
-    history_dir = HISTORY_DIR.resolve()
+def load_history_page(page=1, per_page=20):
+    """One page of runs plus the paging totals the UI needs."""
+    per_page = max(1, min(int(per_page), 100))
+    total = count_history()
+    pages = max(1, -(-total // per_page))
+    page = max(1, min(int(page), pages))
+    return {
+        "runs": load_recent_history(limit=per_page, offset=(page - 1) * per_page),
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "pages": pages,
+    }
+
 
-    if history_dir not in history_file.parents:
-        raise ValueError("History file is outside the history directory.")
+def delete_history_entry(run_id):
+    try:
+        run_id = int(run_id)
+    except (TypeError, ValueError):
+        raise ValueError("History run id must be an integer.")
 
-    if not history_file.name.startswith("run_") or history_file.suffix != ".json":
-        raise ValueError("Only saved run history files can be deleted.")
+    with _connect() as conn:
+        conn.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+        conn.execute("DELETE FROM runs_fts WHERE rowid = ?", (run_id,))
 
-    if history_file.exists():
-        history_file.unlink()
 
 def clear_history():
-    if not HISTORY_DIR.exists():
-        return 0
+    with _connect() as conn:
+        deleted_count = conn.execute("DELETE FROM runs").rowcount
+        conn.execute("DELETE FROM runs_fts")
+    return deleted_count
 
-    deleted_count = 0
-    for history_file in HISTORY_DIR.glob("run_*.json"):
-        if history_file.is_file():
-            history_file.unlink()
-            deleted_count += 1
 
-    return deleted_count
+def _fts_query(text):
+    """Turn free text into a safe FTS5 query: every word, prefix-matched."""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _day_bound(value, end=False):
+    """Epoch seconds for a YYYY-MM-DD day (start of day, or start of the next)."""
+    day = datetime.strptime(value, "%Y-%m-%d")
+    if end:
+        day += timedelta(days=1)
+    return day.timestamp()
+
+
+def search_history(text=None, ticker=None, start_date=None, end_date=None,
+                   metric_filters=None, comparison=None, page=1, per_page=20):
+    """Saved runs matching every given filter, newest first, paginated.
+
+    text: free text matched against the request and the report (all words,
+        prefix match).
+    ticker: only runs that analyzed this ticker.
+    start_date / end_date: inclusive YYYY-MM-DD bounds on when the run was saved.
+    metric_filters: {metric: (minimum, maximum)} over SEARCHABLE_METRICS; either
+        bound may be None. With a ticker the thresholds apply to that ticker,
+        otherwise to any ticker in the run.
+    comparison: True / False to keep only comparison / single-ticker runs.
+
+    Raises ValueError for a malformed date or an unknown metric.
+    """
+    clauses, params = [], []
+
+    ticker_clauses, ticker_params = [], []
+    if ticker:
+        ticker_clauses.append("ticker = ?")
+        ticker_params.append(str(ticker).strip().upper())
+    for metric, (minimum, maximum) in (metric_filters or {}).items():
+        if metric not in SEARCHABLE_METRICS:
+            raise ValueError(f"Unknown metric filter: {metric}")
+        if minimum is not None:
+            ticker_clauses.append(f"{metric} >= ?")
+            ticker_params.append(float(minimum))
+        if maximum is not None:
+            ticker_clauses.append(f"{metric} <= ?")
+            ticker_params.append(float(maximum))
+    if ticker_clauses:
+        clauses.append(
+            "r.id IN (SELECT run_id FROM run_tickers WHERE " + " AND ".join(ticker_clauses) + ")"
+        )
+        params.extend(ticker_params)
+
+    match = _fts_query(text)
+    if match:
+        clauses.append("r.id IN (SELECT rowid FROM runs_fts WHERE runs_fts MATCH ?)")
+        params.append(match)
+
+    if start_date:
+        clauses.append("r.created_at >= ?")
+        params.append(_day_bound(start_date))
+    if end_date:
+        clauses.append("r.created_at < ?")
+        params.append(_day_bound(end_date, end=True))
+
+    if comparison is not None:
+        clauses.append("r.is_comparison = ?")
+        params.append(1 if comparison else 0)
+
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    per_page = max(1, min(int(per_page), 100))
+    page = max(1, int(page))
+
+    with _connect() as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM runs r{where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT r.id, r.payload FROM runs r{where} "
+            "ORDER BY r.created_at DESC, r.id DESC LIMIT ? OFFSET ?",
+            [*params, per_page, (page - 1) * per_page],
+        ).fetchall()
+
+    return {
+        "runs": [_row_to_run(row) for row in rows],
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "pages": max(1, -(-total // per_page)),
+    }
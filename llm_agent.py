@@ -25,13 +25,16 @@ _SYSTEM_PROMPT = (
     "render_chart, fetch_news, and (for stocks only, never crypto) "
     "fetch_analyst_view, fetch_fundamentals, fetch_earnings.\n"
     "Rules:\n"
-    "- Analyze at most TWO tickers. If the user names more, pick the first two "
+    "- Analyze at most 20 tickers. If the user names more, pick the first 20 "
     "and mention that in finish().\n"
+    "- When the user names several tickers, fetch them together with one "
+    "fetch_price_histories call.\n"
     "- Use resolve_symbol whenever the user gives a company name, a possible "
     "typo, or a symbol you are not certain about. Never guess tickers.\n"
     "- Default period is 1y. Valid periods: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, "
     "or an explicit start_date/end_date range when the user gives dates.\n"
-    "- If exactly two tickers were analyzed successfully, call compare_tickers.\n"
+    "- If two or more tickers were analyzed successfully, call compare_tickers "
+    "once with all of them.\n"
     "- If a tool returns an error, adapt: retry with a fix or move on — never "
     "abandon tickers that worked.\n"
     "- use_llm_summary is true unless the user asked for no summary.\n"
@@ -149,10 +152,8 @@ def _ensure_complete(executor):
                 logging.warning("Backfill %s(%s) failed: %s",
                                 tool_name, ticker, result["error"])
 
-    if len(ok_tickers) == 2 and memory.get("comparison") is None:
-        executor.execute("compare_tickers",
-                         {"ticker_a": ok_tickers[0], "ticker_b": ok_tickers[1]},
-                         backfill=True)
+    if len(ok_tickers) >= 2 and memory.get("comparison") is None:
+        executor.execute("compare_tickers", {"tickers": ok_tickers}, backfill=True)
 
 
 def _final_metadata(executor, user_input):
@@ -10,6 +10,9 @@ import logging
 import os
 from history import save_run_history
 from llm_agent import LLMAgentError, run_llm_agent
+from tools import rate_limit, resilience
+from tools.http_session import record_timings
+from tools.swr import track_stale
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,8 +21,9 @@ logging.basicConfig(
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Finance Agent Workflow")
-    parser.add_argument("--tickers", nargs=2, metavar=("TICKER1", "TICKER2"),
-                        help="Two tickers to analyze (e.g., --tickers AAPL NVDA)")
+    parser.add_argument("--tickers", nargs="+", metavar="TICKER",
+                        help="Tickers to analyze and compare, up to 20 "
+                             "(e.g., --tickers AAPL NVDA MSFT)")
     parser.add_argument("--range", default="1y",
                         help="Time range like 3mo, 6mo, 1y, 2y (default: 1y)")
     parser.add_argument("--summary", action="store_true",
@@ -33,23 +37,22 @@ def run_analysis_from_request(user_input, tracer=None):
     # A caller (e.g. the background job) may inject one wired to stream live.
     tracer = tracer or AgentTracer()
 
-    # Primary path: the LLM tool-calling agent decides which tools to run.
-    # Fallback path: the original regex Planner → Agent pipeline, used when no
-    # API key is configured or the LLM path fails for any reason.
-    if os.getenv("OPENAI_API_KEY"):
-        try:
-            meta = run_llm_agent(user_input, memory, tracer)
-            tickers, period = meta["tickers"], meta["period"]
-        except LLMAgentError as exc:
-            logging.warning("LLM agent unavailable, using fallback planner: %s", exc)
-            memory.clear()
-            tracer.record("planner", "LLM agent unavailable — regex fallback", "warn",
-                          detail=str(exc))
-            tickers, period = _run_regex_pipeline(user_input, memory, tracer)
-    else:
-        tickers, period = _run_regex_pipeline(user_input, memory, tracer)
-
-    is_comparison = len(tickers) == 2
+    # Every HTTP call the run makes (including its I/O pool fan-out) is timed,
+    # so the trace shows how many connections were opened vs. reused; cache
+    # entries served stale are noted so their trace steps can say so, and so
+    # are circuit-breaker trips, retries and hedged requests. Its Yahoo calls
+    # run at the limiter's top priority.
+    with record_timings() as http, track_stale(), resilience.record_events() as upstream, \
+            rate_limit.priority("analysis"):
+        tickers, period = _run_pipeline(user_input, memory, tracer)
+    if http.requests:
+        tracer.record("data", "HTTP connections", "warn" if http.errors else "ok",
+                      detail=http.summary())
+    if upstream.summary():
+        tracer.record("data", "Upstream resilience", "warn" if upstream.degraded else "ok",
+                      detail=upstream.summary())
+
+    is_comparison = len(tickers) >= 2
 
     # Build the HTML dashboard after tasks complete
     dashboard_path = build_dashboard(
@@ -65,8 +68,10 @@ def run_analysis_from_request(user_input, tracer=None):
     # Build filename
     if len(tickers) == 1:
         filename = f"analysis_{tickers[0]}_{period}.txt"
-    else:
+    elif len(tickers) == 2:
         filename = f"comparison_{tickers[0]}_{tickers[1]}_{period}.txt"
+    else:
+        filename = f"ranking_{tickers[0]}_{len(tickers)}_tickers_{period}.txt"
 
     # Save report to disk
     synthesizer.save_report(report, filename)
@@ -84,12 +89,27 @@ def run_analysis_from_request(user_input, tracer=None):
         "trace": tracer.export(),
     }
 
-    history_path = save_run_history(user_input, result)
-    result["history_path"] = str(history_path)
+    result["history_id"] = save_run_history(user_input, result)
 
     return result
 
 
+# Primary path: the LLM tool-calling agent decides which tools to run.
+# Fallback path: the original regex Planner → Agent pipeline, used when no
+# API key is configured or the LLM path fails for any reason.
+def _run_pipeline(user_input, memory, tracer):
+    if os.getenv("OPENAI_API_KEY"):
+        try:
+            meta = run_llm_agent(user_input, memory, tracer)
+            return meta["tickers"], meta["period"]
+        except LLMAgentError as exc:
+            logging.warning("LLM agent unavailable, using fallback planner: %s", exc)
+            memory.clear()
+            tracer.record("planner", "LLM agent unavailable — regex fallback", "warn",
+                          detail=str(exc))
+    return _run_regex_pipeline(user_input, memory, tracer)
+
+
 # The original Planner → Agent path, kept verbatim as the fallback.
 def _run_regex_pipeline(user_input, memory, tracer):
     planner = Planner()
@@ -169,8 +189,8 @@ def main():
     args = parse_args()
 
     if args.tickers:
-        t1, t2 = args.tickers[0].upper(), args.tickers[1].upper()
-        user_input = f"Analyze {t1} and {t2} for {args.range}"
+        tickers = [ticker.upper() for ticker in args.tickers]
+        user_input = f"Analyze {' and '.join(tickers)} for {args.range}"
         if args.summary:
             user_input += " with summary"
     else:
@@ -189,7 +209,7 @@ def main():
     print(result["report"])
     print(f"\nReport saved to {result['report_path']}")
     print(f"Dashboard created: {result['dashboard_path']}")
-    print(f"History saved to: {result['history_path']}")
+    print(f"History saved as run #{result['history_id']}")
 
 if __name__ == "__main__":
     main()
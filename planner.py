@@ -2,6 +2,7 @@ import re
 from calendar import monthrange
 from datetime import date
 from tools.crypto import CRYPTO_NAME_TO_SYMBOL, normalize_crypto_symbol
+from tools.metrics import MAX_COMPARISON_TICKERS
 
 MONTH_NAMES = {
     "jan": 1,
@@ -249,9 +250,9 @@ class Planner:
         # At least one ticker is required
         if len(tickers) == 0:
             raise ValueError("No valid ticker symbols found in input.")
-        # System will take at most two tickers
-        if len(tickers) > 2:
-            raise ValueError("Please specify at most two tickers.")
+        # System will take at most MAX_COMPARISON_TICKERS tickers
+        if len(tickers) > MAX_COMPARISON_TICKERS:
+            raise ValueError(f"Please specify at most {MAX_COMPARISON_TICKERS} tickers.")
 
         # Construct task plan
         tasks = []
@@ -265,8 +266,8 @@ class Planner:
             tasks.append(fetch_task)
             # Calculate performance metrics
             tasks.append({"task" : "compute_metrics", "ticker" : ticker})
-        # If exactly two stocks were provided, then compare them
-        if len(tickers) == 2:
+        # If two or more stocks were provided, then compare (rank) them
+        if len(tickers) >= 2:
             tasks.append({"task" : "compare_metrics"})
         # Return both the task list and the LLM summary control flag
         return {"tasks": tasks, "use_llm_summary": use_llm_summary}
@@ -109,6 +109,21 @@ def build_dashboard(memory, out_html_path: Path) -> Path:
         if comparison_chart_path:
             rel_compare_chart = _relpath_str(comparison_chart_path, out_html_path.parent)
 
+        # Three or more tickers: list the full ranking under the winner
+        ranking_rows = ""
+        ranking = comparison.get("ranking") or []
+        if len(ranking) > 2:
+            for row in ranking:
+                sharpe = row.get("sharpe_ratio")
+                total_return = row.get("total_return")
+                sharpe_text = f"{sharpe:.2f}" if sharpe is not None else "N/A"
+                return_text = f"{total_return:.2%}" if total_return is not None else "N/A"
+                ranking_rows += (
+                    f"<tr><td>{_escape_html(row.get('rank'))}. {_escape_html(row.get('ticker'))}</td>"
+                    f"<td class='num'>Sharpe {_escape_html(sharpe_text)} · "
+                    f"Return {_escape_html(return_text)}</td></tr>"
+                )
+
         comparison_html = f"""
         <div class="section">
           <h2>Comparison</h2>
@@ -116,6 +131,7 @@ def build_dashboard(memory, out_html_path: Path) -> Path:
             <table class="metrics">
               <tr><td>Winner</td><td class="num">{_escape_html(winner)}</td></tr>
               <tr><td>Reason</td><td class="num">{_escape_html(reason)}</td></tr>
+              {ranking_rows}
             </table>
           </div>
 
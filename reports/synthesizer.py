@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from tools.llm_client import generate_llm_summary, summary_to_text
+from tools.risk import RISK_METRIC_KEYS
 
 """
 Helper function used by the report generator.
@@ -58,6 +59,13 @@ def _build_ticker_payload(memory, ticker):
             )
         },
     }
+    risk = {key: _f(metrics.get(key)) for key in RISK_METRIC_KEYS}
+    if any(value is not None for value in risk.values()):
+        # VaR/CVaR are positive one-bar loss fractions at 95% confidence.
+        payload["risk"] = {
+            "benchmark": memory.get(f"{ticker}_benchmark"),
+            **risk,
+        }
     if fundamentals.get("available"):
         payload["fundamentals"] = {
             "company_name": fundamentals.get("company_name"),
@@ -315,6 +323,83 @@ class ReportSynthesizer:
                     )
 
             return "\n".join(report)
+        # RANKING REPORT (three or more tickers)
+        if len(tickers) > 2:
+            report = []
+            report.append("=== MULTI-TICKER RANKING REPORT ===\n")
+            report.append(f"Tickers: {', '.join(tickers)}")
+            report.append(f"Time Period: {period}\n")
+
+            # Failed tickers are listed, the rest are still ranked
+            failed = [t for t in tickers if self.memory.get(f"{t}_status") != "ok"]
+            if failed:
+                report.append("Unavailable:")
+                for ticker in failed:
+                    report.append(f"- {ticker}: {self.memory.get(f'{ticker}_error', 'Unknown error')}")
+                report.append("")
+
+            comparison = self.memory.get("comparison") or {}
+            ranking = comparison.get("ranking") or []
+            if not ranking:
+                report.append(
+                    "Ranking could not be performed because fewer than two tickers "
+                    "returned valid data."
+                )
+                return "\n".join(report)
+
+            # One line per ticker, best first
+            report.append("Ranking (Sharpe ratio, then total return):")
+            for row in ranking:
+                tr = row.get("total_return")
+                vol = row.get("volatility")
+                sharpe = row.get("sharpe_ratio")
+                report.append(
+                    f"{row['rank']:>2}. {row['ticker']:<9} "
+                    f"Return {f'{float(tr):.2%}' if tr is not None else 'N/A'} · "
+                    f"Volatility {f'{float(vol):.2%}' if vol is not None else 'N/A'} · "
+                    f"Sharpe {f'{float(sharpe):.2f}' if sharpe is not None else 'N/A'}"
+                )
+            report.append("")
+
+            winner = comparison.get("winner", "N/A")
+            reason = comparison.get("reason", "N/A")
+            report.append(f"Winner: {winner}")
+            report.append(f"Reason: {reason}\n")
+
+            # Optional LLM summary over every ranked ticker
+            ranked = [row["ticker"] for row in ranking]
+            payload = {
+                "mode": "comparison",
+                "period": period,
+                "tickers": ranked,
+                "by_ticker": {t: _build_ticker_payload(self.memory, t) for t in ranked},
+                "comparison": {"winner": winner, "reason": reason, "ranking": ranking},
+            }
+            use_llm = self.memory.get("use_llm_summary", True)
+            llm_summary = generate_llm_summary(payload, use_llm)
+
+            if llm_summary:
+                self.memory.set("comparison_llm_summary", llm_summary)
+                report.append("AI Summary:")
+                report.append(summary_to_text(llm_summary))
+                report.append("")
+            else:
+                report.append("Conclusion:")
+                if winner in ("Tie", None, "N/A"):
+                    report.append(
+                        f"Over the selected period, no single ticker among the {len(ranked)} "
+                        "analyzed led on a risk-adjusted basis."
+                    )
+                else:
+                    report.append(
+                        f"Over the selected period, {winner} ranked first of {len(ranked)} "
+                        f"tickers and {ranked[-1]} ranked last on risk-adjusted performance. "
+                        "Reading the ranking alongside volatility gives a more complete "
+                        "picture than raw returns alone."
+                    )
+
+            return "\n".join(report)
+
         # Catch-all fallback (should not normally happen)
         return "Unable to generate report."
 
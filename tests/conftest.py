@@ -20,3 +20,29 @@ def price_data():
     dates = pd.date_range("2025-01-02", periods=60, freq="B")
     closes = [100 + i * 0.5 for i in range(60)]
     return pd.DataFrame({"Close": closes}, index=dates)
+
+
+@pytest.fixture(autouse=True)
+def no_asset_prefetch(monkeypatch):
+    """Keep background logo/brand warmups from hitting the network in tests."""
+    from tools import asset_prefetch
+
+    warmed = []
+    monkeypatch.setattr(asset_prefetch, "_warm", warmed.append)
+    monkeypatch.setattr(asset_prefetch, "_in_flight", set())
+    monkeypatch.setattr(asset_prefetch, "_warmed_at", {})
+    return warmed
+
+
+@pytest.fixture(autouse=True)
+def no_background_refresh(monkeypatch):
+    """Queue stale-while-revalidate refreshes instead of running them, and
+    start every test with empty enrichment caches."""
+    from tools import swr
+
+    queued = []
+    monkeypatch.setattr(swr, "_submit", queued.append)
+    monkeypatch.setattr(swr, "_in_flight", set())
+    for cache in swr._caches:
+        cache.clear()
+    return queued
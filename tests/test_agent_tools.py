@@ -8,7 +8,8 @@ from tools.agent_tools import ToolExecutor, TOOL_SCHEMAS
 def test_schemas_cover_all_tools():
     names = {schema["function"]["name"] for schema in TOOL_SCHEMAS}
     assert names == {
-        "resolve_symbol", "fetch_price_history", "compute_metrics", "render_chart",
+        "resolve_symbol", "fetch_price_history", "fetch_price_histories",
+        "compute_metrics", "render_chart",
         "fetch_analyst_view", "fetch_fundamentals", "fetch_earnings", "fetch_news",
         "compare_tickers", "finish",
     }
@@ -49,17 +50,32 @@ def test_fetch_price_history_error_is_reported_not_raised(memory, tracer):
     assert executor.tickers == []
 
 
-def test_third_distinct_ticker_is_refused(memory, tracer, price_data):
+def test_ticker_beyond_cap_is_refused(memory, tracer, price_data):
     executor = ToolExecutor(memory, tracer)
+    executor.MAX_TICKERS = 2
     with patch.object(agent_tools.data_fetch, "fetch_price_history", return_value=price_data):
         executor.execute("fetch_price_history", {"ticker": "AAPL", "period": "1y"})
         executor.execute("fetch_price_history", {"ticker": "NVDA", "period": "1y"})
         result = executor.execute("fetch_price_history", {"ticker": "MSFT", "period": "1y"})
-    assert "error" in result and "two tickers" in result["error"]
+    assert "error" in result and "At most 2 tickers" in result["error"]
     assert executor.tickers == ["AAPL", "NVDA"]
     assert memory.get("MSFT_status") is None
 
 
+def test_fetch_price_histories_batches_and_reports_misses(memory, tracer, price_data):
+    executor = ToolExecutor(memory, tracer)
+    fetched = ({"AAPL": price_data, "NVDA": price_data}, {"XXXX": "No data found for ticker: XXXX"})
+    with patch.object(agent_tools.data_fetch, "fetch_price_histories",
+                      return_value=fetched) as batch:
+        result = executor.execute("fetch_price_histories",
+                                  {"tickers": ["aapl", "NVDA", "XXXX"], "period": "1y"})
+    batch.assert_called_once_with(["AAPL", "NVDA", "XXXX"], "1y", None, None)
+    assert executor.tickers == ["AAPL", "NVDA"]
+    assert result["results"]["AAPL"]["rows"] == 60
+    assert "error" in result["results"]["XXXX"]
+    assert memory.get("XXXX_status") == "error"
+
+
 def test_compute_metrics_requires_fetched_data(memory, tracer):
     executor = ToolExecutor(memory, tracer)
     result = executor.execute("compute_metrics", {"ticker": "AAPL"})
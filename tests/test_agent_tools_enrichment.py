@@ -1,5 +1,7 @@
 from unittest.mock import patch
 
+import numpy as np
+
 from tools import agent_tools
 from tools.agent_tools import ToolExecutor
 
@@ -56,7 +58,7 @@ def test_compare_tickers_happy_path(memory, tracer, price_data, tmp_path):
     for ticker in ("AAPL", "NVDA"):
         _fetch(executor, ticker, price_data)
         executor.execute("compute_metrics", {"ticker": ticker})
-    with patch.object(agent_tools.charts, "plot_comparison_normalized",
+    with patch.object(agent_tools.charts, "plot_growth_comparison",
                       return_value=tmp_path / "compare.png"):
         result = executor.execute("compare_tickers", {"ticker_a": "AAPL", "ticker_b": "NVDA"})
     assert memory.get("comparison")["winner"] in ("AAPL", "NVDA", "Tie", None)
@@ -64,6 +66,25 @@ def test_compare_tickers_happy_path(memory, tracer, price_data, tmp_path):
     assert "winner" in result
 
 
+def test_compare_tickers_ranks_many(memory, tracer, price_data, tmp_path):
+    executor = ToolExecutor(memory, tracer)
+    tickers = ["AAPL", "NVDA", "MSFT", "AMZN"]
+    rng = np.random.default_rng(7)
+    for ticker in tickers:
+        noise = rng.normal(0, 0.01, len(price_data))
+        _fetch(executor, ticker, price_data.assign(Close=price_data["Close"] * (1 + noise)))
+        executor.execute("compute_metrics", {"ticker": ticker})
+    with patch.object(agent_tools.charts, "plot_growth_comparison",
+                      return_value=tmp_path / "compare.png") as plot:
+        result = executor.execute("compare_tickers", {"tickers": tickers})
+    assert sorted(plot.call_args.args[0]) == sorted(tickers)
+    comparison = memory.get("comparison")
+    assert [row["rank"] for row in comparison["ranking"]] == [1, 2, 3, 4]
+    assert result["ranking"][0] == comparison["winner"]
+    assert comparison["correlation"]["tickers"] == tickers
+    assert len(comparison["correlation"]["matrix"]) == 4
+
+
 def test_compare_tickers_degrades_when_one_side_missing(memory, tracer, price_data):
     executor = ToolExecutor(memory, tracer)
     _fetch(executor, "AAPL", price_data)
@@ -0,0 +1,42 @@
+import time
+from unittest.mock import patch
+
+from tools import asset_prefetch
+
+_real_warm = asset_prefetch._warm      # conftest swaps it out for every test
+
+
+def _wait_for(warmed, count):
+    deadline = time.time() + 5
+    while len(warmed) < count and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_prefetch_dedupes_and_skips_recently_warmed(no_asset_prefetch):
+    assert asset_prefetch.prefetch_assets(["aapl", "AAPL", "", "msft"]) == ["AAPL", "MSFT"]
+    # Still in flight: not queued again.
+    assert asset_prefetch.prefetch_assets(["AAPL"]) == []
+
+    asset_prefetch._in_flight.clear()
+    asset_prefetch._warmed_at["AAPL"] = time.time()
+    assert asset_prefetch.prefetch_assets(["AAPL"]) == []
+    asset_prefetch._warmed_at["AAPL"] = time.time() - asset_prefetch.RETRY_AFTER_SECONDS
+    assert asset_prefetch.prefetch_assets(["AAPL"]) == ["AAPL"]
+
+    _wait_for(no_asset_prefetch, 3)
+    assert sorted(no_asset_prefetch) == ["AAPL", "AAPL", "MSFT"]
+
+
+def test_cached_brand_color_never_uses_the_network():
+    with patch.object(asset_prefetch, "brand_color_for_ticker", return_value=None) as brand:
+        assert asset_prefetch.cached_brand_color("ZZZZ") is None
+    assert brand.call_args.kwargs == {"allow_network": False}
+
+
+def test_finished_warmups_prune_expired_entries():
+    asset_prefetch._warmed_at["OLD"] = time.time() - asset_prefetch.RETRY_AFTER_SECONDS - 1
+    with patch.object(asset_prefetch, "fetch_logo_image"), \
+         patch.object(asset_prefetch, "brand_color_for_ticker"), \
+         patch.object(asset_prefetch, "logo_url_for_ticker"):
+        _real_warm("NEW")
+    assert list(asset_prefetch._warmed_at) == ["NEW"]
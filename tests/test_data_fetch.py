@@ -0,0 +1,157 @@
+import os
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agent_trace import AgentTracer
+from tools import data_fetch
+from tools.swr import track_stale
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_fetch, "CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def plain_ttl(monkeypatch):
+    """Expire equity caches on the plain TTL, whatever the wall-clock session."""
+    monkeypatch.setattr(data_fetch.market_calendar, "cache_expiry",
+                        lambda fetched_at, ttl: fetched_at + ttl)
+
+
+def _download_frame(symbols, periods=30):
+    index = pd.date_range("2025-01-02", periods=periods, freq="B")
+    columns = pd.MultiIndex.from_product([symbols, ["Open", "Close"]])
+    frame = pd.DataFrame(100.0, index=index, columns=columns)
+    for i, symbol in enumerate(symbols):
+        frame[(symbol, "Close")] = [100.0 + i + day for day in range(periods)]
+    return frame
+
+
+def test_batch_fetch_downloads_stocks_in_one_request(cache_dir):
+    with patch.object(data_fetch.yf, "download",
+                      return_value=_download_frame(["AAPL", "MSFT", "NVDA"])) as download, \
+         patch.object(data_fetch.yf, "Ticker", side_effect=AssertionError("no per-ticker fetch")):
+        fetched, errors = data_fetch.fetch_price_histories(["AAPL", "MSFT", "NVDA"], "1y")
+    download.assert_called_once()
+    assert list(fetched) == ["AAPL", "MSFT", "NVDA"]
+    assert errors == {}
+    assert list(fetched["MSFT"].columns) == ["Close"]
+    assert fetched["MSFT"]["Close"].iloc[0] == 101.0
+    assert (cache_dir / "NVDA_1y.csv").exists()
+
+
+def test_cache_keeps_compact_ohlcv_and_callers_get_a_close_view(cache_dir):
+    index = pd.date_range("2025-01-02", periods=3, freq="B", tz="America/New_York")
+    history = pd.DataFrame({"Open": [99.5, 100.25, 101.0], "High": [101.0, 102.0, 103.5],
+                            "Low": [99.0, 100.0, 100.5], "Close": [100.5, 101.75, None],
+                            "Volume": [1_200_000, None, 900_000], "Dividends": 0.0},
+                           index=index)
+    with patch.object(data_fetch.yf, "Ticker") as ticker:
+        ticker.return_value.history.return_value = history
+        close = data_fetch.fetch_price_history("AAPL", "1y")
+    bars = data_fetch.fetch_price_bars("AAPL", "1y")     # served from the cache file
+
+    assert list(bars.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert bars.dtypes.to_dict() == {"Open": "float32", "High": "float32", "Low": "float32",
+                                     "Close": "float32", "Volume": "int64"}
+    assert bars["Volume"].tolist() == [1_200_000, 0]
+    assert list(close.columns) == ["Close"]
+    assert close["Close"].tolist() == [100.5, 101.75]
+
+    view = data_fetch._close_view(bars)
+    assert np.shares_memory(view["Close"].to_numpy(), bars["Close"].to_numpy())
+
+
+def test_intraday_periods_resample_one_cached_download(cache_dir, plain_ttl):
+    sessions = pd.bdate_range("2026-10-12", periods=5)
+    index = pd.DatetimeIndex([day + pd.Timedelta(minutes=570 + 5 * i)
+                              for day in sessions for i in range(78)]).tz_localize("America/New_York")
+    history = pd.DataFrame({"Open": 100.0, "High": 101.0, "Low": 99.0,
+                            "Close": [100.0 + i for i in range(len(index))], "Volume": 10},
+                           index=index)
+    with patch.object(data_fetch.yf, "Ticker") as ticker:
+        ticker.return_value.history.return_value = history
+        week = data_fetch.fetch_price_bars("AAPL", "5d")
+        day = data_fetch.fetch_price_bars("AAPL", "1d")
+    ticker.return_value.history.assert_called_once_with(period="5d", interval="5m")
+    assert list(cache_dir.iterdir()) == [cache_dir / "AAPL_intraday_5m.csv"]
+
+    assert len(week) == 5 * 7                     # hourly bars from 9:30, 15:30 is half an hour
+    assert week.index[1] == pd.Timestamp("2026-10-12 10:30")
+    assert week["Volume"].iloc[0] == 120 and week["Close"].iloc[0] == 111.0
+    assert len(day) == 78 and day.index[0] == pd.Timestamp("2026-10-16 09:30")
+
+
+def test_batch_miss_falls_back_to_single_fetch(cache_dir, price_data):
+    with patch.object(data_fetch.yf, "download",
+                      return_value=_download_frame(["AAPL"])), \
+         patch.object(data_fetch, "fetch_price_history",
+                      side_effect=ValueError("No data found for ticker: XXXX")) as single:
+        fetched, errors = data_fetch.fetch_price_histories(["AAPL", "XXXX"], "1y")
+    single.assert_called_once_with("XXXX", "1y", None, None)
+    assert list(fetched) == ["AAPL"]
+    assert errors == {"XXXX": "No data found for ticker: XXXX"}
+
+
+def _age_file(path, seconds):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_stale_cache_is_served_while_refreshing_in_background(cache_dir, price_data, plain_ttl,
+                                                              no_background_refresh):
+    cache_path = cache_dir / "AAPL_1y.csv"
+    price_data.to_csv(cache_path)
+    _age_file(cache_path, data_fetch.CACHE_MAX_AGE_SECONDS + 60 * 60)
+
+    with track_stale(), \
+         patch.object(data_fetch, "_download_price_history", return_value=price_data) as download:
+        served = data_fetch.fetch_price_history("AAPL", "1y")
+        data_fetch.fetch_price_history("AAPL", "1y")   # refresh already queued
+        download.assert_not_called()
+        assert len(served) == len(price_data)
+        assert len(no_background_refresh) == 1
+
+        tracer = AgentTracer()
+        tracer.record("data", "Fetch price history", detail="60 bars", ticker="AAPL")
+        assert tracer.events[0]["detail"] == "60 bars · served stale (age 25h)"
+
+        no_background_refresh[0]()
+        download.assert_called_once_with("AAPL", "1y", None, None)
+
+
+def test_cache_past_the_stale_window_blocks_on_a_fetch(cache_dir, price_data, plain_ttl,
+                                                       no_background_refresh):
+    cache_path = cache_dir / "AAPL_1y.csv"
+    price_data.to_csv(cache_path)
+    _age_file(cache_path, data_fetch.CACHE_MAX_AGE_SECONDS + data_fetch._stale_window_seconds("1y") + 1)
+
+    with patch.object(data_fetch, "_download_price_history", return_value=price_data) as download:
+        data_fetch.fetch_price_history("AAPL", "1y")
+    download.assert_called_once()
+    assert no_background_refresh == []
+
+
+def test_equity_cache_fetched_after_the_close_stays_fresh_until_the_open(cache_dir, price_data):
+    from datetime import datetime
+    from tools.market_calendar import EXCHANGE_TZ
+
+    friday_night = datetime(2026, 10, 16, 21, 0, tzinfo=EXCHANGE_TZ).timestamp()
+    sunday = datetime(2026, 10, 18, 12, 0, tzinfo=EXCHANGE_TZ).timestamp()
+    monday_open = datetime(2026, 10, 19, 9, 30, tzinfo=EXCHANGE_TZ).timestamp()
+    cache_path = cache_dir / "AAPL_1d.csv"
+    price_data.to_csv(cache_path)
+    os.utime(cache_path, (friday_night, friday_night))
+
+    assert data_fetch._cache_state(cache_path, "1d", now=sunday)[0] == "fresh"
+    # Friday's intraday chart isn't served stale once Monday's session opens.
+    assert data_fetch._cache_state(cache_path, "1d", now=monday_open + 60)[0] == "expired"
+    assert data_fetch._cache_state(cache_path, "5d", now=monday_open + 60)[0] == "stale"
+    # Crypto ignores the equity calendar.
+    assert data_fetch._cache_state(cache_path, "1d", is_crypto=True, now=sunday)[0] == "expired"
@@ -0,0 +1,75 @@
+import os
+import time
+
+import pytest
+
+from tools import disk_janitor
+
+NOW = time.time()
+DAY = disk_janitor.DAY
+
+
+def _file(directory, name, size, used_days_ago, modified_days_ago=None):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    used = NOW - used_days_ago * DAY
+    modified = NOW - (used_days_ago if modified_days_ago is None else modified_days_ago) * DAY
+    os.utime(path, (used, modified))
+    return path
+
+
+@pytest.fixture
+def categories(tmp_path):
+    cache = tmp_path / "cache"
+    history = tmp_path / "history"
+    cache.mkdir()
+    history.mkdir()
+    return {
+        "price_cache": {"path": cache, "pattern": "*.csv", "max_bytes": 250, "max_age_days": 30},
+        "history_db": {"path": history, "pattern": "history.db*", "max_bytes": None, "max_age_days": None},
+    }
+
+
+def test_sweep_evicts_expired_then_least_recently_used(categories):
+    cache = categories["price_cache"]["path"]
+    expired = _file(cache, "OLD_1y.csv", 100, used_days_ago=40)
+    lru = _file(cache, "AAPL_1y.csv", 100, used_days_ago=5)
+    # Written long ago but read yesterday: its access time keeps it.
+    read_recently = _file(cache, "MSFT_1y.csv", 100, used_days_ago=1, modified_days_ago=20)
+    fresh = _file(cache, "NVDA_1y.csv", 100, used_days_ago=0)
+    temp = _file(cache, ".NVDA_1y.csv.1.2.tmp", 10, used_days_ago=1)
+    db = _file(categories["history_db"]["path"], "history.db", 500, used_days_ago=90)
+
+    preview = disk_janitor.sweep(dry_run=True, now=NOW, categories=categories)
+    assert all(path.exists() for path in (expired, lru, temp))
+    assert preview["price_cache"]["evicted"] == [str(expired), str(temp), str(lru)]
+
+    report = disk_janitor.sweep(now=NOW, categories=categories)
+    assert report == preview
+    assert sorted(path.name for path in cache.iterdir()) == ["MSFT_1y.csv", "NVDA_1y.csv"]
+    assert report["price_cache"]["bytes"] == 200 and report["price_cache"]["evicted_bytes"] == 210
+    assert read_recently.exists() and fresh.exists() and db.exists()
+    assert report["history_db"] == {
+        "path": str(categories["history_db"]["path"]), "files": 1, "bytes": 500,
+        "max_bytes": None, "max_age_days": None,
+        "evicted_files": 0, "evicted_bytes": 0, "evicted": [],
+    }
+
+
+def test_files_being_written_are_not_size_evicted(categories):
+    cache = categories["price_cache"]["path"]
+    for name in ("A_1y.csv", "B_1y.csv", "C_1y.csv"):
+        _file(cache, name, 100, used_days_ago=0)
+    report = disk_janitor.sweep(now=NOW, categories=categories)
+    assert report["price_cache"]["evicted_files"] == 0       # over budget, but all just written
+
+
+def test_disk_usage_route_is_a_dry_run(categories, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(disk_janitor, "CATEGORIES", categories)
+    stale = _file(categories["price_cache"]["path"], "OLD_1y.csv", 100, used_days_ago=40)
+    payload = app_module.app.test_client().get("/api/disk-usage").get_json()
+    assert payload["dry_run"] is True
+    assert payload["categories"]["price_cache"]["evicted"] == [str(stale)]
+    assert stale.exists()
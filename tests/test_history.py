@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+
+import history
+
+
+@pytest.fixture
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_DIR", tmp_path)
+    return tmp_path
+
+
+def _result(tickers, total_return=0.1):
+    memory = {f"{t}_metrics": {"total_return": total_return} for t in tickers}
+    return {"tickers": tickers, "period": "1y", "is_comparison": len(tickers) > 1,
+            "memory": memory}
+
+
+def test_runs_saved_in_the_same_second_stay_distinct(history_dir):
+    first = history.save_run_history("AAPL", _result(["AAPL"]))
+    second = history.save_run_history("MSFT", _result(["MSFT"]))
+
+    assert first != second
+    runs = history.load_recent_history(limit=5)
+    assert [run["user_input"] for run in runs] == ["MSFT", "AAPL"]
+    assert runs[0]["id"] == second
+    assert runs[0]["metrics"]["MSFT"]["total_return"] == 0.1
+
+
+def test_history_pages_and_deletes(history_dir):
+    ids = [history.save_run_history(f"run {i}", _result(["AAPL"])) for i in range(7)]
+
+    page = history.load_history_page(page=2, per_page=3)
+    assert (page["total"], page["pages"], page["page"]) == (7, 3, 2)
+    assert [run["id"] for run in page["runs"]] == ids[3:0:-1]
+
+    history.delete_history_entry(str(ids[0]))
+    assert history.count_history() == 6
+    with pytest.raises(ValueError):
+        history.delete_history_entry("../run.json")
+
+    assert history.clear_history() == 6
+    assert history.load_recent_history() == []
+
+
+def test_legacy_json_runs_are_imported_once(history_dir):
+    for i, stamp in enumerate(["2025-01-01_10-00-00", "2025-01-02_10-00-00"]):
+        path = history_dir / f"run_{stamp}.json"
+        path.write_text(json.dumps({"timestamp": stamp, "user_input": f"old {i}",
+                                    "tickers": ["TSLA"], "metrics": {}}))
+        os.utime(path, (1_700_000_000 + i, 1_700_000_000 + i))
+    (history_dir / "run_broken.json").write_text("{not json")
+
+    runs = history.load_recent_history()
+    assert [run["user_input"] for run in runs] == ["old 1", "old 0"]
+    assert sorted(p.name for p in history_dir.glob("run_*.json")) == ["run_broken.json"]
+    assert len(list((history_dir / "migrated").glob("run_*.json"))) == 2
+
+    history.save_run_history("new", _result(["TSLA"]))
+    assert history.load_recent_history(limit=1)[0]["user_input"] == "new"
+
+
+def test_search_filters_by_ticker_metric_text_and_date(history_dir):
+    nvda_hot = history.save_run_history(
+        "NVDA 1y", {**_result(["NVDA"]), "report": "Strong data center growth."})
+    history.save_run_history("NVDA vs AMD", {**_result(["NVDA", "AMD"], total_return=-0.2)})
+    tsla = history.save_run_history("TSLA vs F", _result(["TSLA", "F"]))
+
+    def ids(**filters):
+        return [run["id"] for run in history.search_history(**filters)["runs"]]
+
+    assert len(ids(ticker="nvda")) == 2
+    assert ids(ticker="NVDA", metric_filters={"total_return": (0, None)}) == [nvda_hot]
+    assert ids(text="data cent") == [nvda_hot]
+    assert ids(text="tsla") == [tsla]
+    assert len(ids(comparison=True)) == 2
+    assert ids(start_date="2000-01-01", end_date="2000-12-31") == []
+
+    history.delete_history_entry(nvda_hot)
+    assert ids(text="growth") == []
+
+    with pytest.raises(ValueError):
+        history.search_history(metric_filters={"payload": (0, None)})
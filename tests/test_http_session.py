@@ -0,0 +1,55 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tools import http_session
+from tools.io_executor import run_all
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+
+    def do_GET(self):
+        body = b"missing" if self.path == "/404" else b"ok"
+        self.send_response(404 if self.path == "/404" else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_run_timings_count_reuse_and_follow_pool_tasks(local_server):
+    http_session.fetch(f"{local_server}/before", timeout=5)   # outside the run
+
+    with http_session.record_timings() as timings:
+        assert http_session.fetch(f"{local_server}/a", timeout=5).content == b"ok"
+        http_session.fetch(f"{local_server}/b", timeout=5)
+        [(_, response, error)] = run_all(
+            "analysis", lambda path: http_session.fetch(local_server + path, timeout=5),
+            ["/c"], timeout=10)
+        assert error is None and response.status_code == 200
+
+    snapshot = timings.snapshot()
+    assert snapshot["requests"] == 3 and snapshot["hosts"] == 1
+    if http_session.stats()["backend"] == "curl_cffi":
+        assert snapshot["reused_connections"] >= 2   # the first fetch warmed this thread's handle
+    assert "3 requests to 1 hosts" in timings.summary()
+
+
+def test_fetch_raises_on_http_errors_like_urlopen(local_server):
+    with http_session.record_timings() as timings:
+        with pytest.raises(Exception):
+            http_session.fetch(f"{local_server}/404", timeout=5)
+    assert timings.snapshot()["errors"] == 1
@@ -0,0 +1,67 @@
+"""Boot-time import budget for the web app.
+
+`import app` is what every Gunicorn worker pays before serving its first
+request, so the heavy libraries must stay behind tools/lazy_modules.py. These
+tests run `python -X importtime` in a fresh interpreter (warmup disabled) and
+fail if one of them creeps back onto the boot path or total cost regresses.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from tools.lazy_modules import LazyModule, lazy_module
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Top-level packages that must not be imported by `import app`.
+DEFERRED_PACKAGES = {"numpy", "pandas", "yfinance", "matplotlib", "plotly", "openai", "PIL"}
+
+# Cumulative microseconds for `import app`. Lazy boot measures ~0.3 s locally
+# against ~3 s eager; the headroom absorbs slow CI machines.
+BOOT_IMPORT_BUDGET_US = 1_500_000
+
+
+def _import_profile(module="app"):
+    """Return {module name: cumulative µs} from `python -X importtime`."""
+    env = dict(os.environ, WARMUP_ON_BOOT="0")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    profile = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        if cumulative.isdigit():
+            profile[name] = int(cumulative)
+    return profile
+
+
+def test_heavy_libraries_are_not_imported_at_boot():
+    profile = _import_profile()
+    loaded = {name.split(".")[0] for name in profile}
+    assert not loaded & DEFERRED_PACKAGES
+
+
+def test_boot_import_time_within_budget():
+    profile = _import_profile()
+    assert profile["app"] < BOOT_IMPORT_BUDGET_US
+
+
+def test_lazy_module_defers_import_until_attribute_access():
+    proxy = lazy_module("json")
+    assert isinstance(proxy, LazyModule)
+    assert "not loaded" in repr(proxy)
+    assert proxy.dumps({"a": 1}) == '{"a": 1}'
+    assert "not loaded" not in repr(proxy)
+
+
+def test_patching_through_proxy_is_restored():
+    proxy = lazy_module("json")
+    with patch.object(proxy, "dumps", return_value="patched"):
+        assert proxy.dumps({}) == "patched"
+    assert proxy.dumps({}) == "{}"
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from tools import io_executor
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    """A small private budget so tests don't disturb the real counters."""
+    test_budget = io_executor._Budget("test", 2)
+    monkeypatch.setitem(io_executor._budgets, "test", test_budget)
+    return test_budget
+
+
+def test_results_keep_item_order_and_carry_errors(budget):
+    def work(n):
+        if n == 3:
+            raise ValueError("bad ticker")
+        return n * 10
+
+    results = io_executor.run_all("test", work, [1, 2, 3, 4], timeout=5)
+    assert [(item, value) for item, value, _ in results] == [(1, 10), (2, 20), (3, None), (4, 40)]
+    assert isinstance(results[2][2], ValueError)
+    assert budget.snapshot()["failed"] == 1
+
+
+def test_budget_caps_concurrency(budget):
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def work(_):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    io_executor.run_all("test", work, range(8), timeout=5)
+    assert peak[0] == 2
+    assert budget.snapshot()["peak_active"] == 2
+
+
+def test_deadline_reports_unfinished_tasks_as_timeouts(budget):
+    release = threading.Event()
+    started = time.monotonic()
+    results = io_executor.run_all("test", lambda _: release.wait(5), range(3), timeout=0.1)
+    release.set()
+
+    assert time.monotonic() - started < 1
+    assert all(isinstance(error, TimeoutError) for _, _, error in results)
+    assert budget.snapshot()["timed_out"] == 3
@@ -15,7 +15,7 @@ def patched_tools(price_data, tmp_path):
                       return_value=price_data), \
          patch.object(agent_tools.charts, "plot_close_price_line",
                       return_value=tmp_path / "chart.png"), \
-         patch.object(agent_tools.charts, "plot_comparison_normalized",
+         patch.object(agent_tools.charts, "plot_growth_comparison",
                       return_value=tmp_path / "compare.png"), \
          patch.object(agent_tools.analyst, "fetch_analyst_view",
                       return_value={"ticker": "X", "available": False}), \
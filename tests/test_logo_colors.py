@@ -0,0 +1,68 @@
+import io
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from tools import analyst
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _png(pixels):
+    buffer = io.BytesIO()
+    Image.fromarray(np.asarray(pixels, dtype=np.uint8), "RGBA").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _logo_fixtures():
+    rng = np.random.default_rng(7)
+    solid_red = np.zeros((48, 48, 4)); solid_red[...] = (200, 30, 40, 255)
+    transparent = np.zeros((32, 32, 4))
+    white = np.full((40, 40, 4), 255)
+    near_white = np.full((40, 40, 4), 250); near_white[:20, :, 3] = 0
+    wordmark = np.full((48, 48, 4), 255); wordmark[10:30, 5:40, :3] = 20
+    two_tone = np.full((48, 48, 4), 255); two_tone[:24, :, :3] = (0, 120, 215); two_tone[24:, :, :3] = (240, 80, 0)
+    noise = [rng.integers(0, 256, (64, 64, 4)) for _ in range(6)]
+    return [solid_red, transparent, white, near_white, wordmark, two_tone, *noise]
+
+
+# The original per-pixel implementations, kept as the reference.
+def _reference_blank(data):
+    im = Image.open(io.BytesIO(data)).convert("RGBA").resize((32, 32))
+    visible = [(r, g, b) for (r, g, b, a) in np.asarray(im).reshape(-1, 4).tolist() if a > 16]
+    if not visible:
+        return True
+    return all(r > 244 and g > 244 and b > 244 for r, g, b in visible)
+
+
+def _reference_color(data):
+    im = Image.open(io.BytesIO(data)).convert("RGBA").resize((48, 48))
+    buckets, members = Counter(), {}
+    for (r, g, b, a) in np.asarray(im).reshape(-1, 4).tolist():
+        if a < 128:
+            continue
+        hi, lo = max(r, g, b), min(r, g, b)
+        if hi > 240 and lo > 240 or hi < 28 or hi == 0 or (hi - lo) / hi < 0.22:
+            continue
+        key = (r // 24, g // 24, b // 24)
+        buckets[key] += 1
+        members.setdefault(key, []).append((r, g, b))
+    if not buckets:
+        return None
+    pixels = members[buckets.most_common(1)[0][0]]
+    n = len(pixels)
+    return ",".join(str(sum(p[i] for p in pixels) // n) for i in range(3))
+
+
+@pytest.mark.parametrize("pixels", _logo_fixtures())
+def test_vectorized_logo_analysis_matches_reference(pixels):
+    data = _png(pixels)
+    assert analyst._image_is_blank(data) == _reference_blank(data)
+    assert analyst._dominant_brand_color(data) == _reference_color(data)
+
+
+def test_brand_color_accepts_larger_samples():
+    pixels = np.zeros((48, 48, 4)); pixels[...] = (200, 30, 40, 255)
+    assert analyst._dominant_brand_color(_png(pixels), sample_size=128) == "200,30,40"
+    assert analyst._image_is_blank(b"not an image") is False
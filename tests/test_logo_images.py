@@ -0,0 +1,83 @@
+import io
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from tools import analyst, logo_images
+from tools.persistent_cache import PersistentCache
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _png(rgba, size=200):
+    buffer = io.BytesIO()
+    pixels = np.zeros((size, size, 4), dtype=np.uint8)
+    pixels[...] = rgba
+    Image.fromarray(pixels, "RGBA").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def logo_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(logo_images, "LOGO_IMAGE_DIR", tmp_path)
+    monkeypatch.setattr(logo_images, "_misses", PersistentCache())
+    monkeypatch.setattr(analyst, "_brand_cache", PersistentCache())
+    return tmp_path
+
+
+def test_fallback_chain_skips_blank_and_broken_sources(logo_dir):
+    downloads = {"blank": _png((255, 255, 255, 255)), "broken": b"<html>", "real": _png((200, 30, 40, 255))}
+    with patch.object(logo_images, "logo_candidates_for_ticker", return_value=["blank", "broken", "real"]), \
+         patch.object(logo_images, "_download", side_effect=downloads.get) as download:
+        path = logo_images.fetch_logo_image("uber")
+        assert logo_images.fetch_logo_image("UBER") == path   # served from disk
+    assert download.call_count == 3
+
+    assert path == logo_dir / "UBER.png"
+    assert Image.open(path).size == (logo_images.LOGO_IMAGE_SIZE, logo_images.LOGO_IMAGE_SIZE)
+    assert analyst._brand_cache.get("UBER") == "200,30,40"
+    assert logo_images._ticker_locks == {}     # dropped once the download finished
+
+
+def test_misses_are_remembered_and_cache_only_reads_skip_network(logo_dir):
+    with patch.object(logo_images, "logo_candidates_for_ticker", return_value=["x"]) as candidates, \
+         patch.object(logo_images, "_download", return_value=None):
+        assert logo_images.fetch_logo_image("NOPE") is None
+        assert logo_images.fetch_logo_image("NOPE") is None
+        assert logo_images.fetch_logo_image("AAPL", allow_network=False) is None
+    assert candidates.call_count == 1
+    assert logo_images.fetch_logo_image("../etc/passwd") is None
+
+
+def test_logo_route_serves_cached_file_with_caching_headers(logo_dir):
+    import app as app_module
+
+    (logo_dir / "AAPL.png").write_bytes(_png((0, 0, 0, 255), size=64))
+    client = app_module.app.test_client()
+
+    response = client.get("/logo/aapl")
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+    assert "max-age=604800" in response.headers["Cache-Control"]
+    etag = response.headers["ETag"]
+    assert client.get("/logo/AAPL", headers={"If-None-Match": etag}).status_code == 304
+
+    with patch.object(app_module, "logo_candidates_for_ticker", return_value=["https://x/l.png"]):
+        response = client.get("/logo/MSFT")
+    assert response.status_code == 302
+    assert response.headers["Cache-Control"] == "no-store"
+
+
+def test_without_pillow_nothing_is_cached_and_the_route_redirects(logo_dir, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(logo_images, "_pillow_available", lambda: False)
+    with patch.object(logo_images, "_download") as download:
+        assert logo_images.fetch_logo_image("UBER") is None
+    download.assert_not_called()
+    assert list(logo_dir.iterdir()) == []
+
+    with patch.object(app_module, "logo_candidates_for_ticker", return_value=["https://x/l.svg"]):
+        response = app_module.app.test_client().get("/logo/UBER")
+    assert response.status_code == 302 and response.headers["Location"] == "https://x/l.svg"
@@ -0,0 +1,49 @@
+from datetime import date, datetime, time
+
+from tools import market_calendar as cal
+from tools.market_calendar import EXCHANGE_TZ
+
+
+def _closed_weekdays(year):
+    day, closed = date(year, 1, 1), []
+    while day.year == year:
+        if day.weekday() < 5 and not cal.is_trading_day(day):
+            closed.append(day.isoformat())
+        day = date.fromordinal(day.toordinal() + 1)
+    return closed
+
+
+def test_nyse_holidays_and_early_closes():
+    assert _closed_weekdays(2025) == [
+        "2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26",
+        "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25",
+    ]
+    # Independence Day on a Saturday is observed Friday the 3rd.
+    assert _closed_weekdays(2026) == [
+        "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25",
+        "2026-06-19", "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25",
+    ]
+    # New Year's Day on a Saturday (2022) isn't observed on the Friday before.
+    assert cal.is_trading_day(date(2021, 12, 31))
+
+    early = [d for d in ("2025-07-03", "2025-11-28", "2025-12-24", "2026-07-02", "2026-12-24")
+             if cal.session_bounds(date.fromisoformat(d))[1].time() == time(13, 0)]
+    assert early == ["2025-07-03", "2025-11-28", "2025-12-24", "2026-12-24"]
+
+
+def test_cache_expiry_waits_for_the_next_possible_bar():
+    def ts(*args):
+        return datetime(*args, tzinfo=EXCHANGE_TZ).timestamp()
+
+    # Mid-session: the plain TTL.
+    assert cal.cache_expiry(ts(2026, 10, 14, 11, 0), 600) == ts(2026, 10, 14, 11, 10)
+    # Near the close: capped at the close plus the settle period.
+    assert cal.cache_expiry(ts(2026, 10, 14, 15, 55), 86400) == ts(2026, 10, 14, 16, 20)
+    # Friday evening: nothing new until Monday's open.
+    assert cal.cache_expiry(ts(2026, 10, 16, 21, 0), 600) == ts(2026, 10, 19, 9, 30)
+    # After the Thanksgiving half-day: the following Monday.
+    assert cal.cache_expiry(ts(2026, 11, 27, 14, 0), 600) == ts(2026, 11, 30, 9, 30)
+    # Pre-market: today's open.
+    assert cal.cache_expiry(ts(2026, 10, 19, 7, 0), 600) == ts(2026, 10, 19, 9, 30)
+
+    assert cal.last_trading_day(datetime(2026, 4, 5, 12, 0, tzinfo=EXCHANGE_TZ)) == date(2026, 4, 2)
@@ -0,0 +1,190 @@
+import math
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import metrics
+
+
+def _prices(n, seed=0, start="2024-01-01", freq="B"):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({"Close": closes}, index=pd.date_range(start, periods=n, freq=freq))
+
+
+def test_single_ticker_matches_per_metric_functions():
+    price_data = _prices(120)
+    daily_returns = metrics.compute_daily_returns(price_data)
+    result = metrics.compute_all_metrics(price_data)
+
+    expected = {
+        "total_return": metrics.compute_total_return(price_data),
+        "volatility": metrics.compute_volatility(daily_returns),
+        "sharpe_ratio": metrics.compute_sharpe_ratio(daily_returns),
+        "annualized_volatility": metrics.compute_annualized_volatility(daily_returns),
+        "annualized_sharpe_ratio": metrics.compute_annualized_sharpe_ratio(daily_returns),
+        "cagr": metrics.compute_cagr(price_data),
+        "max_drawdown": metrics.compute_max_drawdown(price_data),
+        **metrics.compute_moving_averages(price_data),
+    }
+    assert set(result) == set(metrics.METRIC_KEYS)
+    for key, value in expected.items():
+        assert result[key] == pytest.approx(value, rel=1e-9), key
+
+
+def test_short_and_flat_series_degrade_to_none():
+    short = metrics.compute_all_metrics(_prices(10))
+    assert short["ma_20"] is None and short["ma_50"] is None
+
+    flat = pd.DataFrame({"Close": [5.0] * 30}, index=pd.date_range("2024-01-01", periods=30))
+    result = metrics.compute_all_metrics(flat)
+    assert result["volatility"] == 0
+    assert result["sharpe_ratio"] is None
+    assert result["annualized_sharpe_ratio"] is None
+
+
+def test_batch_matches_single_ticker_with_misaligned_calendars():
+    # A 7-day crypto-style calendar, a weekday-only equity, and a late listing.
+    frames = {
+        "BTC-USD": _prices(300, seed=1, freq="D"),
+        "AAPL": _prices(300, seed=2, freq="D").pipe(lambda df: df[df.index.dayofweek < 5]),
+        "NEW": _prices(300, seed=3, freq="D").iloc[200:],
+    }
+    batch = metrics.compute_metrics_batch(metrics.build_close_frame(frames))
+
+    for ticker, price_data in frames.items():
+        single = metrics.compute_all_metrics(price_data)
+        for key in metrics.METRIC_KEYS:
+            assert batch[ticker][key] == pytest.approx(single[key], rel=1e-9), (ticker, key)
+
+
+def test_build_close_frame_skips_unusable_tickers():
+    frames = {"AAPL": _prices(30), "BAD": pd.DataFrame({"Close": ["n/a"]})}
+    frame = metrics.build_close_frame(frames)
+    assert list(frame.columns) == ["AAPL"]
+    with pytest.raises(ValueError):
+        metrics.build_close_frame({"BAD": pd.DataFrame({"Close": [math.nan]})})
+
+
+def _assert_metrics_close(actual, expected):
+    for key in metrics.METRIC_KEYS:
+        if expected[key] is None:
+            assert actual[key] is None, key
+        else:
+            assert actual[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-12), key
+
+
+def test_incremental_appends_match_full_recomputation():
+    close = _prices(400)["Close"]
+    state = metrics.IncrementalMetrics().extend(close.iloc[:300])
+    with patch.object(metrics.IncrementalMetrics, "rebuild") as rebuild:
+        for end in range(301, 401):
+            state.sync(close.iloc[:end])
+    rebuild.assert_not_called()
+    assert state.count == 400
+    _assert_metrics_close(state.metrics(), metrics.compute_all_metrics(close.to_frame()))
+
+
+def test_incremental_rebuilds_when_series_does_not_continue():
+    close = _prices(120)["Close"]
+    state = metrics.IncrementalMetrics().extend(close.iloc[:100])
+    shifted = close.iloc[10:]          # rolling window moved: start changed
+    state.sync(shifted)
+    assert state.count == len(shifted)
+    _assert_metrics_close(state.metrics(), metrics.compute_all_metrics(shifted.to_frame()))
+
+
+def test_incremental_rebuilds_when_earlier_bars_are_revised():
+    close = _prices(120)["Close"]
+    state = metrics.IncrementalMetrics().extend(close.iloc[:100])
+    revised = close.copy()
+    revised.iloc[90] *= 0.5            # a corrected recent print
+    adjusted = close.copy()
+    adjusted.iloc[:100] *= 0.98        # a dividend adjustment of the history
+    assert state.continues(close)
+    assert not state.continues(revised) and not state.continues(adjusted)
+    with patch.object(metrics.IncrementalMetrics, "update") as update:
+        state.sync(revised)            # rebuilt in one vectorized pass
+    update.assert_not_called()
+    _assert_metrics_close(state.metrics(), metrics.compute_all_metrics(revised.to_frame()))
+
+
+def test_incremental_state_round_trips_through_dict():
+    close = _prices(90)["Close"]
+    state = metrics.IncrementalMetrics().extend(close.iloc[:80])
+    restored = metrics.IncrementalMetrics.from_dict(state.to_dict())
+    assert restored.continues(close)
+    restored.sync(close)
+    _assert_metrics_close(restored.metrics(), metrics.compute_all_metrics(close.to_frame()))
+
+
+def test_compute_all_metrics_incremental_reuses_state():
+    price_data = _prices(70)
+    key = ("TEST", "incremental")
+    metrics._incremental_states.pop(key, None)
+    metrics.compute_all_metrics_incremental(price_data.iloc[:60], key)
+    result = metrics.compute_all_metrics_incremental(price_data, key)
+    assert metrics._incremental_states[key].count == 70
+    _assert_metrics_close(result, metrics.compute_all_metrics(price_data))
+
+
+def test_rank_metrics_matches_two_way_comparison():
+    a, b = metrics.compute_all_metrics(_prices(80, seed=1)), metrics.compute_all_metrics(_prices(80, seed=2))
+    ranked = metrics.rank_metrics({"AAA": a, "BBB": b})
+    two_way = metrics.compare_metrics(a, b, "AAA", "BBB")
+    assert (ranked["winner"], ranked["reason"]) == (two_way["winner"], two_way["reason"])
+    assert ranked["ranking"][0]["ticker"] == two_way["winner"]
+
+
+def test_rank_metrics_orders_many_by_sharpe_then_return():
+    ranked = metrics.rank_metrics({
+        "LOW": {"sharpe_ratio": 0.1, "total_return": 0.5},
+        "NONE": {"sharpe_ratio": None, "total_return": 0.9},
+        "HIGH": {"sharpe_ratio": 0.3, "total_return": 0.1},
+        "MID": {"sharpe_ratio": 0.1, "total_return": 0.7},
+    })
+    assert [row["ticker"] for row in ranked["ranking"]] == ["HIGH", "MID", "LOW", "NONE"]
+    assert ranked["winner"] == "HIGH"
+
+
+def test_correlation_matrix_aligns_equity_with_crypto_calendar():
+    crypto = _prices(140, seed=3, start="2024-01-01", freq="D")
+    # An equity that is the crypto series sampled on weekdays only.
+    equity = crypto[crypto.index.dayofweek < 5]
+    frame = metrics.build_close_frame({"EQ": equity, "CRYPTO": crypto, "OTHER": _prices(100, seed=4)})
+    result = metrics.compute_correlation_matrix(frame)
+    matrix = np.array(result["matrix"], dtype=float)
+    assert result["tickers"] == ["EQ", "CRYPTO", "OTHER"]
+    assert np.allclose(np.diag(matrix), 1.0)
+    assert np.allclose(matrix, matrix.T)
+    assert matrix[0, 1] > 0.6   # same prices; only Monday returns differ in span
+
+
+def test_growth_frame_starts_every_series_at_one_on_common_date():
+    growth, closes = metrics.build_growth_frame({
+        "EARLY": _prices(100, seed=5, start="2024-01-01"),
+        "LATE": _prices(60, seed=6, start="2024-03-01"),
+    })
+    assert growth.index[0] == pd.Timestamp("2024-03-01")
+    assert growth.iloc[0].tolist() == [1.0, 1.0]
+    assert not growth.isna().any().any()
+    assert (closes.index == growth.index).all()
+
+
+def test_horizon_scores_match_direct_computation():
+    prices = _prices(260, seed=8, start="2024-01-01")
+    late = _prices(40, seed=9, start="2024-11-01")
+    scores = metrics.compute_horizon_scores(metrics.build_close_frame({"FULL": prices, "LATE": late}))
+    close = prices["Close"]
+    last_date = max(close.index[-1], late.index[-1])
+
+    month_ago = close[close.index >= last_date - pd.DateOffset(months=1)].iloc[0]
+    assert scores["FULL"]["return_1m"] == pytest.approx(close.iloc[-1] / month_ago - 1)
+    assert scores["FULL"]["volatility"] == pytest.approx(
+        metrics.compute_annualized_volatility(metrics.compute_daily_returns(prices)))
+    assert scores["FULL"]["max_drawdown"] == pytest.approx(metrics.compute_max_drawdown(prices))
+    # Two months of history: no 3M or 1Y figure rather than a misleading one.
+    assert scores["LATE"]["return_3m"] is None and scores["LATE"]["return_1y"] is None
+    assert scores["LATE"]["return_1m"] is not None
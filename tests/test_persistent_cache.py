@@ -0,0 +1,68 @@
+import json
+import threading
+import time
+
+from tools.persistent_cache import MISSING, PersistentCache
+
+
+def test_writes_are_coalesced_and_atomic(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = PersistentCache(path, flush_delay=60)
+    for i in range(50):
+        cache.set(f"T{i}", f"t{i}.com")
+    assert not path.exists()          # nothing written until the flush
+
+    cache.flush()
+    assert json.loads(path.read_text())["entries"]["T7"]["value"] == "t7.com"
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.json"]
+
+    reloaded = PersistentCache(path)
+    assert reloaded.get("T49") == "t49.com"
+    assert reloaded.get("NOPE") is MISSING
+
+
+def test_concurrent_flushes_leave_the_latest_snapshot(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = PersistentCache(path, flush_delay=60)
+
+    def writer(n):
+        for i in range(20):
+            cache.set(f"T{n}", i)
+            cache.flush()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    entries = json.loads(path.read_text())["entries"]
+    assert {key: entry["value"] for key, entry in entries.items()} == {f"T{n}": 19 for n in range(8)}
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.json"]
+
+
+def test_negative_entries_expire_and_positive_ones_do_not(tmp_path, monkeypatch):
+    cache = PersistentCache(tmp_path / "cache.json", negative_ttl=60, flush_delay=60)
+    cache.set("UBER", "")
+    cache.set("AAPL", "apple.com")
+
+    later = time.time() + 120
+    monkeypatch.setattr("tools.persistent_cache.time.time", lambda: later)
+    assert "UBER" not in cache
+    assert cache.get("AAPL") == "apple.com"
+
+
+def test_size_limit_evicts_oldest_entries():
+    cache = PersistentCache(max_entries=3)
+    for key in "ABCD":
+        cache.set(key, key.lower())
+    assert cache.get("A") is MISSING
+    assert [cache.get(key) for key in "BCD"] == ["b", "c", "d"]
+
+
+def test_reads_legacy_plain_json_files(tmp_path):
+    path = tmp_path / "legacy.json"
+    path.write_text(json.dumps({"MSFT": "microsoft.com", "XYZ": ""}))
+    cache = PersistentCache(path, negative_ttl=3600)
+    assert cache.get("MSFT") == "microsoft.com"
+    assert cache.get("XYZ") == ""
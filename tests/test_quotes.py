@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from tools import quotes
+
+
+def test_parses_current_spark_shape():
+    payload = {
+        "AAPL": {"symbol": "AAPL", "close": [190.0, 191.5, None],
+                 "previousClose": None, "chartPreviousClose": 189.0},
+        "BTC-USD": {"symbol": "BTC-USD", "close": [None, None], "chartPreviousClose": 60000.0},
+    }
+    assert quotes._parse_spark(payload) == {
+        "AAPL": {"price": 191.5, "previous_close": 189.0},
+        "BTC-USD": {"price": None, "previous_close": 60000.0},
+    }
+
+
+def test_parses_legacy_spark_shape():
+    payload = {"spark": {"result": [{"symbol": "MSFT", "response": [{
+        "meta": {"regularMarketPrice": 410.0, "previousClose": 405.0},
+        "indicators": {"quote": [{"close": [409.0]}]},
+    }]}]}}
+    assert quotes._parse_spark(payload) == {"MSFT": {"price": 410.0, "previous_close": 405.0}}
+
+
+def test_batches_in_chunks_and_drops_misses():
+    calls = []
+
+    def fake_chunk(symbols):
+        calls.append(symbols)
+        if "BAD0" in symbols:
+            raise OSError("upstream down")
+        return {s: {"price": 1.0, "previous_close": None} for s in symbols if s != "S003"}
+
+    symbols = [f"S{i:03d}" for i in range(45)] + ["BAD0"]
+    with patch.object(quotes, "_fetch_spark_chunk", side_effect=fake_chunk):
+        prices = quotes.fetch_batch_prices(symbols)
+
+    assert sorted(len(chunk) for chunk in calls) == [6, 20, 20]
+    assert "S003" not in prices and "S044" not in prices   # S044 shares BAD0's chunk
+    assert len(prices) == 39
+
+
+def test_live_quotes_fall_back_per_symbol_only_for_misses():
+    import app as app_module
+
+    batch = {"AAPL": {"price": 200.0, "previous_close": 100.0}}
+    single = {"ticker": "ZZZ", "price": 1.0}
+    with patch.object(app_module, "fetch_batch_prices", return_value=batch), \
+         patch.object(app_module, "fetch_live_quote", return_value=single) as fallback:
+        result, errors = app_module._fetch_live_quotes(["AAPL", "ZZZ"], "quotes")
+
+    fallback.assert_called_once_with("ZZZ")
+    assert result["AAPL"]["change_percent"] == 1.0
+    assert result["ZZZ"] is single and errors == {}
@@ -0,0 +1,70 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from tools import rate_limit, symbol_search
+from tools.rate_limit import RateLimited, TokenBucket
+
+FAST_PRIORITIES = {
+    "analysis":   {"reserve": 0.0, "max_wait": 1.0,  "max_queued": None},
+    "background": {"reserve": 0.5, "max_wait": 0.05, "max_queued": 1},
+}
+
+
+def test_low_priority_keeps_a_reserve_and_is_shed_first():
+    bucket = TokenBucket(rate=0.001, burst=4, priorities=FAST_PRIORITIES)
+    bucket.acquire("background")
+    bucket.acquire("background")
+    with pytest.raises(RateLimited):
+        bucket.acquire("background")       # would dip into the analysis reserve
+    bucket.acquire("analysis")
+    bucket.acquire("analysis")
+
+    stats = bucket.stats()["priorities"]
+    assert stats["background"] == {"admitted": 2, "throttled": 0, "deferred": 1,
+                                   "waiting": 0, "avg_wait_ms": None}
+    assert stats["analysis"]["admitted"] == 2
+
+
+def test_callers_wait_for_refill_and_yield_to_higher_priorities():
+    bucket = TokenBucket(rate=20, burst=1, priorities={
+        "analysis": {"reserve": 0.0, "max_wait": 2.0, "max_queued": None},
+        "background": {"reserve": 0.0, "max_wait": 2.0, "max_queued": None},
+    })
+    bucket.acquire("analysis")
+    order = []
+    background_waiting = threading.Event()
+
+    def background():
+        background_waiting.set()
+        bucket.acquire("background")
+        order.append("background")
+
+    worker = threading.Thread(target=background)
+    worker.start()
+    background_waiting.wait()
+    bucket.acquire("analysis")             # arrives later but is served first
+    order.append("analysis")
+    worker.join()
+
+    assert order == ["analysis", "background"]
+    assert bucket.stats()["priorities"]["analysis"]["throttled"] == 1
+
+
+def test_shed_typeahead_lookup_is_deferred_with_retry_after(monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(symbol_search, "lookup_symbols", lambda query, max_results: [])
+    symbol_search._cache.clear()
+    seen = []
+
+    def shed(*args, **kwargs):
+        seen.append(rate_limit._current_priority.get())
+        raise RateLimited(seen[-1])
+
+    with patch.object(symbol_search.yf, "Search", side_effect=shed):
+        response = app_module.app.test_client().get("/api/symbol-search?q=zzqx&client=rl&seq=1")
+    assert seen == ["typeahead"]
+    assert response.status_code == 429
+    assert response.get_json() == {"results": [], "deferred": "rate_limited"}
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from tools import rate_limit, resilience
+from tools.resilience import CircuitOpen
+
+URL = "https://query2.finance.yahoo.com/v8/finance/chart/AAPL?range=1d"
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class ReadTimeout(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+
+
+def test_endpoint_keeps_the_api_path_but_not_the_symbol():
+    assert resilience.endpoint_for(URL) == "query2.finance.yahoo.com/v8/finance/chart"
+    assert (resilience.endpoint_for("https://financialmodelingprep.com/image-stock/BRK-B.png")
+            == "financialmodelingprep.com/image-stock")
+
+
+def test_circuit_opens_fails_fast_and_closes_after_a_good_probe(monkeypatch):
+    calls = []
+
+    def timing_out():
+        calls.append(1)
+        raise ReadTimeout("timed out")
+
+    with resilience.record_events() as events:
+        for _ in range(resilience.FAILURE_THRESHOLD):
+            with pytest.raises(ReadTimeout):
+                resilience.call("GET", URL, timing_out)
+        with pytest.raises(CircuitOpen):
+            resilience.call("GET", URL, timing_out)
+
+    assert len(calls) == resilience.FAILURE_THRESHOLD     # timeouts aren't retried
+    assert events.trips == ["query2.finance.yahoo.com/v8/finance/chart"]
+    assert events.fast_failures == 1 and events.degraded
+    assert resilience.stats()["endpoints"][events.trips[0]]["state"] == "open"
+
+    breaker = resilience._breakers[events.trips[0]]
+    breaker.open_until = time.monotonic() - 1          # open window over: half-open
+    assert resilience.call("GET", URL, lambda: FakeResponse(200)).status_code == 200
+    assert resilience.stats()["endpoints"][events.trips[0]]["state"] == "closed"
+
+
+def test_server_errors_are_retried_but_429s_are_not():
+    statuses = iter([503, 502, 200])
+    with resilience.record_events() as events:
+        assert resilience.call("GET", URL, lambda: FakeResponse(next(statuses))).status_code == 200
+        throttled = []
+        response = resilience.call("GET", URL, lambda: throttled.append(1) or FakeResponse(429))
+    assert response.status_code == 429 and throttled == [1]
+    assert events.retries == 2
+    assert "2 retries" in events.summary()
+
+
+def test_slow_request_is_hedged_and_the_faster_duplicate_wins(monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_MIN_DELAY_SECONDS", 0.01)
+    breaker = resilience._breaker(resilience.endpoint_for(URL))
+    breaker.latencies.extend([0.01] * resilience.HEDGE_MIN_SAMPLES)
+    release = threading.Event()
+    attempts = []
+
+    def attempt():
+        attempts.append(1)
+        if len(attempts) == 1:
+            release.wait(5)              # the primary hangs past the p95
+            return FakeResponse(500)
+        return FakeResponse(200)
+
+    with resilience.record_events() as events:
+        response = resilience.call("GET", URL, attempt)
+    release.set()
+    assert response.status_code == 200
+    assert (events.hedges, events.hedge_wins) == (1, 1)
+    assert not events.degraded
+
+
+def test_probe_shed_by_the_rate_limiter_does_not_wedge_the_circuit():
+    def failing():
+        raise ConnectionError("reset")
+
+    def shed():
+        raise rate_limit.RateLimited("background")
+
+    for _ in range(resilience.FAILURE_THRESHOLD):
+        with pytest.raises(ConnectionError):
+            resilience.call("POST", URL, failing)
+    breaker = resilience._breakers[resilience.endpoint_for(URL)]
+    breaker.open_until = time.monotonic() - 1
+
+    with pytest.raises(rate_limit.RateLimited):
+        resilience.call("GET", URL, shed)         # the probe never went out
+    assert resilience.call("GET", URL, lambda: FakeResponse(200)).status_code == 200
+    assert resilience.stats()["endpoints"][breaker.endpoint]["state"] == "closed"
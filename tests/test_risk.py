@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import risk
+from tools.metrics import compute_all_metrics
+
+
+def _prices(seed=0, n=250, vol=0.02):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0005, vol, n)))
+    return pd.DataFrame({"Close": closes}, index=pd.date_range("2024-01-01", periods=n, freq="B"))
+
+
+def test_risk_pack_matches_reference_formulas():
+    price_data = _prices()
+    metrics = compute_all_metrics(price_data)
+    result = risk.compute_risk_metrics(price_data, metrics=metrics)
+
+    returns = price_data["Close"].pct_change().dropna()
+    downside = np.sqrt((returns.clip(upper=0) ** 2).mean())
+    cutoff = returns.quantile(0.05)
+    assert result["downside_deviation"] == pytest.approx(downside)
+    assert result["sortino_ratio"] == pytest.approx(returns.mean() / downside * np.sqrt(252))
+    assert result["var_95"] == pytest.approx(-cutoff)
+    assert result["cvar_95"] == pytest.approx(-returns[returns <= cutoff].mean())
+    assert result["var_95_parametric"] == pytest.approx(-(returns.mean() - 1.6448536 * returns.std()))
+    assert result["cvar_95"] >= result["var_95"]
+    assert result["calmar_ratio"] == pytest.approx(metrics["cagr"] / abs(metrics["max_drawdown"]))
+    assert result["beta"] is None and result["correlation"] is None
+
+
+def test_beta_against_scaled_benchmark():
+    benchmark = _prices(seed=1)
+    bench_returns = benchmark["Close"].pct_change().fillna(0).to_numpy()
+    # An asset that moves exactly 1.5x the benchmark every bar.
+    asset_close = 50 * np.cumprod(1 + 1.5 * bench_returns)
+    asset = pd.DataFrame({"Close": asset_close}, index=benchmark.index)
+    result = risk.compute_risk_metrics(asset, benchmark)
+    assert result["beta"] == pytest.approx(1.5)
+    assert result["correlation"] == pytest.approx(1.0)
+
+
+def test_too_short_series_returns_all_none():
+    result = risk.compute_risk_metrics(_prices(n=2))
+    assert set(result) == set(risk.RISK_METRIC_KEYS)
+    assert all(value is None for value in result.values())
+
+
+def test_benchmark_selection_and_custom_range():
+    assert risk.benchmark_symbol_for("AAPL") == "SPY"
+    assert risk.benchmark_symbol_for("ETH") == "BTC-USD"
+    assert risk.fetch_benchmark_history("BTC", "1y") == ("BTC-USD", None)
+    with patch.object(risk.data_fetch, "fetch_price_history", return_value="bars") as fetch:
+        assert risk.fetch_benchmark_history("AAPL", "2024-01-01 to 2024-06-30") == ("SPY", "bars")
+    fetch.assert_called_once_with("SPY", "2024-01-01 to 2024-06-30", "2024-01-01", "2024-06-30")
+
+
+def test_benchmark_for_metrics_records_the_step_and_tolerates_failures():
+    from agent_trace import AgentTracer
+    from memory.store import MemoryStore
+
+    memory, tracer = MemoryStore(), AgentTracer()
+    memory.set("AAPL_period", "1y")
+    with patch.object(risk.data_fetch, "fetch_price_history", return_value=_prices()) as fetch:
+        bars = risk.benchmark_for_metrics("AAPL", "asset", memory, tracer, label="[b] Benchmark")
+    fetch.assert_called_once_with("SPY", "1y")
+    assert len(bars) == 250 and memory.get("AAPL_benchmark") == "SPY"
+    assert risk.benchmark_for_metrics("BTC", "asset", memory, tracer) == "asset"
+
+    with patch.object(risk.data_fetch, "fetch_price_history", side_effect=ValueError("down")):
+        assert risk.benchmark_for_metrics("MSFT", "asset", memory, tracer) is None
+    assert [(e["label"], e["status"]) for e in tracer.events] == [
+        ("[b] Benchmark", "ok"), ("Fetch benchmark history", "warn")]
@@ -19,7 +19,7 @@ def _finish_run_stubs():
         patch.object(main, "build_dashboard", return_value="output/dashboard/index.html"),
         patch.object(main.ReportSynthesizer, "generate_report", return_value="REPORT"),
         patch.object(main.ReportSynthesizer, "save_report"),
-        patch.object(main, "save_run_history", return_value="output/history/run.json"),
+        patch.object(main, "save_run_history", return_value=1),
     )
 
 
@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+from agent_trace import AgentTracer
+from tools import analyst, swr
+from tools.news import fetch_stock_news
+
+
+def test_expired_entry_is_served_and_refreshed_once(no_background_refresh):
+    cache = swr.SWRCache("fundamentals", ttl=60, stale_ttl=3600)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"available": True, "pe": len(calls)}
+
+    assert cache.get("AAPL", fetch) == {"available": True, "pe": 1}
+    assert cache.get("AAPL", fetch)["pe"] == 1 and len(calls) == 1   # fresh
+
+    with patch.object(swr.time, "time", return_value=swr.time.time() + 600), swr.track_stale():
+        assert cache.get("AAPL", fetch)["pe"] == 1                   # stale, not blocking
+        assert cache.get("AAPL", fetch)["pe"] == 1
+        assert len(no_background_refresh) == 1 and len(calls) == 1
+
+        tracer = AgentTracer()
+        tracer.record("fundamentals", "Fetch company fundamentals", ticker="AAPL")
+        tracer.record("fundamentals", "Fetch company fundamentals", ticker="AAPL")
+        assert tracer.events[0]["detail"] == "served stale (age 10m)"
+        assert tracer.events[1]["detail"] == ""                      # note consumed
+
+        no_background_refresh[0]()
+    assert cache.get("AAPL", fetch)["pe"] == 2
+
+
+def test_uncacheable_payloads_are_refetched():
+    with patch("tools.news._download_news", side_effect=[[], [{"title": "Hi"}]]) as download:
+        assert fetch_stock_news("AAPL") == []
+        assert fetch_stock_news("AAPL") == [{"title": "Hi"}]
+        assert fetch_stock_news("AAPL") == [{"title": "Hi"}]
+    assert download.call_count == 2
+
+
+def test_analyst_upside_follows_the_latest_close_not_the_cached_one(monkeypatch):
+    monkeypatch.setattr(analyst, "_view_cache", swr.SWRCache("analyst", ttl=60, stale_ttl=3600))
+    view = {"ticker": "AAPL", "available": True, "target_mean": 120.0, "quoted_price": None}
+    with patch.object(analyst, "_download_analyst_view", return_value=view) as download:
+        first = analyst.fetch_analyst_view("AAPL", latest_close=100)
+        second = analyst.fetch_analyst_view("AAPL", latest_close=80)
+    assert download.call_count == 1
+    assert (first["current_price"], round(first["upside"], 4)) == (100, 0.2)
+    assert (second["current_price"], round(second["upside"], 4)) == (80, 0.5)
+    assert "quoted_price" not in second and "upside" not in view
@@ -0,0 +1,51 @@
+import time
+
+from tools.symbol_directory import SymbolDirectory, import_directory, read_directory_csv
+
+ROWS = [
+    {"symbol": "AAPL", "name": "Apple Inc.", "exchange": "NASDAQ", "type": "Equity"},
+    {"symbol": "APP", "name": "AppLovin Corporation", "exchange": "NASDAQ", "type": "Equity"},
+    {"symbol": "AMAT", "name": "Applied Materials, Inc.", "exchange": "NASDAQ", "type": "Equity"},
+    {"symbol": "A", "name": "Agilent Technologies, Inc.", "exchange": "NYSE", "type": "Equity"},
+    {"symbol": "BTC-USD", "name": "Bitcoin USD", "exchange": "CCC", "type": "Cryptocurrency"},
+]
+
+
+def _symbols(results):
+    return [r["symbol"] for r in results]
+
+
+def test_exact_symbol_then_symbol_prefix_then_name_words():
+    directory = SymbolDirectory(ROWS)
+    assert _symbols(directory.lookup("a", 3)) == ["A", "APP", "AAPL"]
+    assert _symbols(directory.lookup("appl")) == ["AAPL", "APP", "AMAT"]
+    assert _symbols(directory.lookup("applied mat")) == ["AMAT"]
+    assert _symbols(directory.lookup("bitcoin")) == ["BTC-USD"]
+    assert directory.lookup("zzzz") == []
+
+
+def test_reads_pipe_delimited_listing_dumps(tmp_path):
+    dump = tmp_path / "nasdaqlisted.txt"
+    dump.write_text(
+        "Symbol|Security Name|Market Category|Test Issue\n"
+        "ZZZT|Test Corp - Common Stock|Q|Y\n"
+        "ASTS|AST SpaceMobile, Inc. - Class A Common Stock|Q|N\n"
+        "File Creation Time: 0101202600:00|||\n"
+    )
+    assert _symbols(read_directory_csv(dump)) == ["ASTS"]
+
+    destination = tmp_path / "directory.csv"
+    count = import_directory(dump, destination=destination)
+    rows = read_directory_csv(destination)
+    assert count == len(rows) and rows[-1]["symbol"] == "ASTS"
+    assert _symbols(SymbolDirectory(rows).lookup("spacemob")) == ["ASTS"]
+
+
+def test_lookup_stays_fast_on_a_large_directory():
+    rows = [{"symbol": f"S{i:05d}", "name": f"Company {i} Holdings"} for i in range(50_000)]
+    directory = SymbolDirectory(rows)
+    started = time.perf_counter()
+    for _ in range(100):
+        directory.lookup("S4999")
+        directory.lookup("holdings")
+    assert (time.perf_counter() - started) / 200 < 0.005
@@ -1,6 +1,11 @@
 from unittest.mock import patch, MagicMock
 
-from tools import symbol_search
+import threading
+import time
+
+import pytest
+
+from tools import symbol_directory, symbol_search
 
 
 def _mock_search(quotes):
@@ -9,8 +14,36 @@ def _mock_search(quotes):
     return MagicMock(return_value=search)
 
 
-def setup_function():
+@pytest.fixture(autouse=True)
+def yahoo_only(monkeypatch):
+    """These tests cover the Yahoo path; start with an empty local directory."""
     symbol_search._cache.clear()
+    monkeypatch.setattr(symbol_search, "lookup_symbols", lambda query, max_results: [])
+
+
+def test_directory_answers_exact_symbols_before_yahoo(monkeypatch):
+    monkeypatch.setattr(symbol_search, "lookup_symbols", symbol_directory.lookup_symbols)
+    with patch.object(symbol_search.yf, "Search", side_effect=AssertionError("no network")):
+        assert symbol_search.search_symbols("nvda")[0]["symbol"] == "NVDA"
+
+
+def test_partial_directory_hits_are_merged_with_yahoo(monkeypatch):
+    monkeypatch.setattr(symbol_search, "lookup_symbols", symbol_directory.lookup_symbols)
+    quotes = [
+        {"symbol": "AAPL", "quoteType": "EQUITY", "longname": "Apple Inc."},
+        {"symbol": "APP", "quoteType": "EQUITY", "longname": "AppLovin Corporation"},
+    ]
+    with patch.object(symbol_search.yf, "Search", _mock_search(quotes)):
+        symbols = [r["symbol"] for r in symbol_search.search_symbols("app")]
+    assert symbols[0] == "AAPL"            # directory rows lead
+    assert "APP" in symbols and symbols.count("AAPL") == 1
+
+    def shed(*args, **kwargs):
+        raise symbol_search.RateLimited("typeahead")
+
+    symbol_search._cache.clear()
+    with patch.object(symbol_search.yf, "Search", side_effect=shed):
+        assert "AAPL" in [r["symbol"] for r in symbol_search.search_symbols("app")]
 
 
 def test_search_returns_normalized_results():
@@ -33,7 +66,7 @@ def test_blank_query_returns_empty_without_network():
 def test_lookup_failure_returns_empty_and_is_not_cached():
     with patch.object(symbol_search.yf, "Search", side_effect=RuntimeError("boom")):
         assert symbol_search.search_symbols("nvidia") == []
-    assert symbol_search._cache == {}
+    assert len(symbol_search._cache) == 0
 
 
 def test_results_are_cached_by_query():
@@ -44,3 +77,104 @@ def test_results_are_cached_by_query():
         symbol_search.search_symbols("apple")
         symbol_search.search_symbols("APPLE")
     assert mock.call_count == 1
+
+
+APPLE_QUOTES = [
+    {"symbol": "AAPL", "quoteType": "EQUITY", "longname": "Apple Inc.",
+     "exchDisp": "NASDAQ", "typeDisp": "Equity"},
+    {"symbol": "APP", "quoteType": "EQUITY", "longname": "AppLovin Corporation",
+     "exchDisp": "NASDAQ", "typeDisp": "Equity"},
+    {"symbol": "APPN", "quoteType": "EQUITY", "longname": "Appian Corporation",
+     "exchDisp": "NASDAQ", "typeDisp": "Equity"},
+]
+
+
+def test_longer_query_is_served_from_an_exhaustive_prefix():
+    mock = _mock_search(APPLE_QUOTES)   # 3 quotes < 8 requested: exhaustive
+    with patch.object(symbol_search.yf, "Search", mock):
+        symbol_search.search_symbols("app")
+        results = symbol_search.search_symbols("appl")
+        assert [r["symbol"] for r in symbol_search.search_symbols("apple inc")] == ["AAPL"]
+    assert mock.call_count == 1
+    assert [r["symbol"] for r in results] == ["AAPL", "APP"]
+
+
+def test_truncated_prefix_results_go_to_the_network():
+    mock = _mock_search(APPLE_QUOTES)
+    with patch.object(symbol_search.yf, "Search", mock):
+        symbol_search.search_symbols("app", max_results=3)   # full page: maybe truncated
+        symbol_search.search_symbols("appl", max_results=3)
+    assert mock.call_count == 2
+
+
+def test_lru_keeps_hot_entries_and_counts_lookups(monkeypatch):
+    monkeypatch.setattr(symbol_search._cache, "max_entries", 2)
+    before = symbol_search.cache_stats()
+    mock = _mock_search([])
+    with patch.object(symbol_search.yf, "Search", mock):
+        symbol_search.search_symbols("hot")
+        symbol_search.search_symbols("x1")
+        symbol_search.search_symbols("hot")    # refresh recency
+        symbol_search.search_symbols("y2")     # evicts x1, not hot
+        symbol_search.search_symbols("hot")
+    assert mock.call_count == 3
+
+    stats = symbol_search.cache_stats()
+    assert stats["lookups"] - before["lookups"] == 5
+    assert stats["exact_hits"] - before["exact_hits"] == 2
+    assert stats["misses"] - before["misses"] == 3
+    assert stats["entries"] == 2
+
+
+def test_overlapping_identical_lookups_share_one_yahoo_call():
+    release = threading.Event()
+
+    def slow_search(*args, **kwargs):
+        release.wait(5)
+        return _mock_search(APPLE_QUOTES)()
+
+    mock = MagicMock(side_effect=slow_search)
+    before = symbol_search.cache_stats()["coalesced"]
+    results = []
+    with patch.object(symbol_search.yf, "Search", mock):
+        threads = [threading.Thread(target=lambda: results.append(symbol_search.search_symbols("appx")))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 5
+        while symbol_search.cache_stats()["coalesced"] < before + 2 and time.time() < deadline:
+            time.sleep(0.005)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+    assert mock.call_count == 1
+    assert len(results) == 3 and results[0] == results[1] == results[2]
+
+
+def test_network_gate_can_defer_the_yahoo_lookup():
+    class Superseded:
+        def __enter__(self):
+            raise symbol_search.LookupDeferred("superseded")
+
+        def __exit__(self, *exc_info):
+            return False
+
+    with patch.object(symbol_search.yf, "Search", side_effect=AssertionError("no network")):
+        with pytest.raises(symbol_search.LookupDeferred):
+            symbol_search.search_symbols("zzz", network_gate=Superseded)
+
+
+def test_typeahead_route_skips_superseded_and_caps_busy_clients(monkeypatch):
+    import app as app_module
+
+    client = app_module.app.test_client()
+    monkeypatch.setattr(app_module, "_typeahead_latest_seq", {("127.0.0.1", "tab"): 5})
+    monkeypatch.setattr(app_module, "_typeahead_active", {})
+    with patch.object(symbol_search.yf, "Search", side_effect=AssertionError("no network")):
+        stale = client.get("/api/symbol-search?q=zzq&client=tab&seq=3")
+        assert stale.get_json() == {"results": [], "deferred": "superseded"}
+
+        app_module._typeahead_active[("127.0.0.1", "tab")] = app_module.TYPEAHEAD_MAX_PER_CLIENT
+        busy = client.get("/api/symbol-search?q=zzq&client=tab&seq=6")
+        assert busy.status_code == 429 and busy.headers["Retry-After"] == "1"
+    assert app_module._typeahead_active == {("127.0.0.1", "tab"): app_module.TYPEAHEAD_MAX_PER_CLIENT}
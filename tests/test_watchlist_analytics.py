@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as app_module
+import watchlist
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(watchlist, "WATCHLIST_PATH", tmp_path / "watchlist.json")
+    app_module._watchlist_analytics_cache.clear()
+    return app_module.app.test_client()
+
+
+def _history(seed):
+    index = pd.date_range("2024-06-03", periods=260, freq="B")
+    closes = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, 260)))
+    return pd.DataFrame({"Close": closes}, index=index)
+
+
+def test_analytics_scores_watchlist_in_one_batch_and_caches(client):
+    watchlist.add_to_watchlist("AAPL")
+    watchlist.add_to_watchlist("MSFT", shares=3)
+    watchlist.add_to_watchlist("BTC")
+    fetched = ({"AAPL": _history(1), "MSFT": _history(2)}, {"BTC-USD": "No data found"})
+    with patch.object(app_module.data_fetch, "fetch_price_histories",
+                      return_value=fetched) as batch:
+        first = client.get("/api/watchlist/analytics").get_json()
+        second = client.get("/api/watchlist/analytics").get_json()
+
+    batch.assert_called_once_with(["AAPL", "MSFT", "BTC-USD"], "1y")
+    assert first == second
+    rows = {row["ticker"]: row for row in first["rows"]}
+    assert list(rows) == ["AAPL", "MSFT", "BTC"]
+    assert rows["AAPL"]["available"] and rows["AAPL"]["return_1y_text"] != "N/A"
+    assert rows["BTC"]["available"] is False and rows["BTC"]["return_1m_text"] == "N/A"
+    assert first["errors"] == {"BTC-USD": "No data found"}
+
+
+def test_degraded_scores_are_retried_after_a_short_ttl(client):
+    watchlist.add_to_watchlist("AAPL")
+    watchlist.add_to_watchlist("MSFT")
+    responses = iter([({"AAPL": _history(1)}, {"MSFT": "Yahoo rate limit: quotes call deferred"}),
+                      ({"AAPL": _history(1), "MSFT": _history(2)}, {})])
+    with patch.object(app_module.data_fetch, "fetch_price_histories",
+                      side_effect=lambda *args: next(responses)) as batch:
+        assert client.get("/api/watchlist/analytics").get_json()["errors"]
+        client.get("/api/watchlist/analytics")              # inside the retry TTL: cached
+        assert batch.call_count == 1
+
+        for entry in app_module._watchlist_analytics_cache.values():
+            entry["expires_at"] -= app_module.WATCHLIST_ERROR_RETRY_SECONDS + 1
+        healed = client.get("/api/watchlist/analytics").get_json()
+        client.get("/api/watchlist/analytics")              # clean: cached for the day
+    assert batch.call_count == 2
+    assert healed["errors"] == {}
+
+
+def test_clean_scores_expire_with_the_price_cache(client):
+    watchlist.add_to_watchlist("AAPL")
+    with patch.object(app_module.data_fetch, "fetch_price_histories",
+                      return_value=({"AAPL": _history(1)}, {})) as batch, \
+            patch.object(app_module.market_calendar, "cache_expiry",
+                         side_effect=lambda fetched_at, ttl: fetched_at + 5) as expiry:
+        client.get("/api/watchlist/analytics")
+        client.get("/api/watchlist/analytics")              # before the close: cached
+        for entry in app_module._watchlist_analytics_cache.values():
+            entry["expires_at"] -= 10                       # the session closed
+        client.get("/api/watchlist/analytics")
+    assert batch.call_count == 2
+    assert expiry.call_args.args[1] == app_module.data_fetch.CACHE_MAX_AGE_SECONDS
@@ -14,7 +14,7 @@ from pathlib import Path
 import logging
 
 from tools import charts, data_fetch, metrics
-from tools import analyst, earnings, fundamentals, news
+from tools import analyst, asset_prefetch, earnings, fundamentals, news, risk
 from tools.crypto import CRYPTO_NAME_TO_SYMBOL, is_crypto_symbol, normalize_crypto_symbol
 from tools.symbol_search import search_symbols
 
@@ -34,7 +34,7 @@ TOOL_SCHEMAS = [
         "name": "fetch_price_history",
         "description": "Fetch historical prices for one ticker and store them in the "
                        "workspace. Must be called before any other per-ticker tool. "
-                       "At most two distinct tickers per run.",
+                       "At most 20 distinct tickers per run.",
         "parameters": {"type": "object", "properties": {
             "ticker": {"type": "string"},
             "period": {"type": "string",
@@ -44,10 +44,25 @@ TOOL_SCHEMAS = [
             "end_date": {"type": "string", "description": "YYYY-MM-DD (custom range only)."},
         }, "required": ["ticker", "period"]},
     }},
+    {"type": "function", "function": {
+        "name": "fetch_price_histories",
+        "description": "Fetch historical prices for several tickers in one batched "
+                       "request. Prefer this over repeated fetch_price_history calls "
+                       "when the user names more than one ticker.",
+        "parameters": {"type": "object", "properties": {
+            "tickers": {"type": "array", "items": {"type": "string"}},
+            "period": {"type": "string",
+                       "description": "Relative window like 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y. "
+                                      "Ignored when start_date/end_date are given."},
+            "start_date": {"type": "string", "description": "YYYY-MM-DD (custom range only)."},
+            "end_date": {"type": "string", "description": "YYYY-MM-DD (custom range only)."},
+        }, "required": ["tickers", "period"]},
+    }},
     {"type": "function", "function": {
         "name": "compute_metrics",
-        "description": "Compute return, volatility, Sharpe, CAGR, max drawdown and "
-                       "moving averages for a fetched ticker.",
+        "description": "Compute return, volatility, Sharpe, CAGR, max drawdown, "
+                       "moving averages and the risk pack (Sortino, Calmar, "
+                       "VaR/CVaR, beta vs SPY or BTC) for a fetched ticker.",
         "parameters": {"type": "object", "properties": {
             "ticker": {"type": "string"},
         }, "required": ["ticker"]},
@@ -91,12 +106,13 @@ TOOL_SCHEMAS = [
     }},
     {"type": "function", "function": {
         "name": "compare_tickers",
-        "description": "Compare two analyzed tickers (winner + normalized growth chart). "
-                       "Call only when exactly two tickers have metrics.",
+        "description": "Rank two or more analyzed tickers (winner, ranking, return "
+                       "correlation matrix, normalized growth chart). Call once, after "
+                       "every ticker has metrics.",
         "parameters": {"type": "object", "properties": {
-            "ticker_a": {"type": "string"},
-            "ticker_b": {"type": "string"},
-        }, "required": ["ticker_a", "ticker_b"]},
+            "tickers": {"type": "array", "items": {"type": "string"},
+                        "description": "Every analyzed ticker to include."},
+        }, "required": ["tickers"]},
     }},
     {"type": "function", "function": {
         "name": "finish",
@@ -113,7 +129,7 @@ TOOL_SCHEMAS = [
 
 
 class ToolExecutor:
-    MAX_TICKERS = 2
+    MAX_TICKERS = metrics.MAX_COMPARISON_TICKERS
 
     def __init__(self, memory, tracer):
         self.memory = memory
@@ -159,33 +175,74 @@ class ToolExecutor:
                      detail, started=started)
         return {"results": results}
 
+    def _cap_error(self):
+        return {"error": f"At most {self.MAX_TICKERS} tickers per analysis. "
+                         f"Already analyzing: {', '.join(self.tickers)}."}
+
+    @staticmethod
+    def _period_label(period, start_date, end_date):
+        if start_date and end_date:
+            return f"{start_date} to {end_date}", start_date, end_date
+        return period, None, None
+
     def _tool_fetch_price_history(self, ticker, period="1y", start_date=None, end_date=None):
         symbol = normalize_crypto_symbol(str(ticker or "").strip().upper())
         if not symbol:
             return {"error": "ticker is required"}
         if symbol not in self.tickers and len(self.tickers) >= self.MAX_TICKERS:
-            return {"error": "At most two tickers per analysis. "
-                             f"Already analyzing: {', '.join(self.tickers)}."}
-        if start_date and end_date:
-            period_label = f"{start_date} to {end_date}"
-        else:
-            period_label, start_date, end_date = period, None, None
+            return self._cap_error()
+        period_label, start_date, end_date = self._period_label(period, start_date, end_date)
 
         started = self.tracer.now()
         try:
             price_data = data_fetch.fetch_price_history(symbol, period_label, start_date, end_date)
         except Exception as exc:
-            self.memory.set(f"{symbol}_status", "error")
-            self.memory.set(f"{symbol}_error", str(exc))
-            logging.error(f"Failed to fetch data for {symbol}: {exc}")
-            self._record("data", "Fetch price history", "error", str(exc), symbol, started)
-            return {"error": f"Could not fetch {symbol}: {exc}"}
+            return self._fetch_failed(symbol, str(exc), started)
+        return self._store_price_data(symbol, price_data, period_label, started)
+
+    def _tool_fetch_price_histories(self, tickers, period="1y", start_date=None, end_date=None):
+        symbols = []
+        for ticker in tickers or []:
+            symbol = normalize_crypto_symbol(str(ticker or "").strip().upper())
+            if symbol and symbol not in symbols:
+                symbols.append(symbol)
+        if not symbols:
+            return {"error": "tickers is required"}
+        room = self.MAX_TICKERS - len(self.tickers)
+        new_symbols = [symbol for symbol in symbols if symbol not in self.tickers]
+        if len(new_symbols) > room:
+            return self._cap_error()
+        period_label, start_date, end_date = self._period_label(period, start_date, end_date)
+
+        started = self.tracer.now()
+        fetched, errors = data_fetch.fetch_price_histories(
+            symbols, period_label, start_date, end_date)
+        self._record("data", "Batch fetch price histories", "ok" if fetched else "error",
+                     f"{len(fetched)}/{len(symbols)} tickers in one batch", started=started)
+        results = {}
+        for symbol in symbols:
+            if symbol in fetched:
+                results[symbol] = self._store_price_data(symbol, fetched[symbol], period_label)
+            else:
+                results[symbol] = self._fetch_failed(
+                    symbol, errors.get(symbol, "No data returned"))
+        return {"results": results}
+
+    def _fetch_failed(self, symbol, message, started=None):
+        self.memory.set(f"{symbol}_status", "error")
+        self.memory.set(f"{symbol}_error", message)
+        logging.error(f"Failed to fetch data for {symbol}: {message}")
+        self._record("data", "Fetch price history", "error", message, symbol, started)
+        return {"error": f"Could not fetch {symbol}: {message}"}
 
+    def _store_price_data(self, symbol, price_data, period_label, started=None):
         self.memory.set(f"{symbol}_data", price_data)
         self.memory.set(f"{symbol}_status", "ok")
         self.memory.set(f"{symbol}_period", period_label)
         if symbol not in self.tickers:
             self.tickers.append(symbol)
+            # Warm logo + brand colour off the render path as soon as it's known.
+            asset_prefetch.prefetch_assets([symbol])
 
         first = round(float(price_data["Close"].iloc[0]), 2)
         last = round(float(price_data["Close"].iloc[-1]), 2)
@@ -206,8 +263,15 @@ class ToolExecutor:
         symbol, err = self._require_data(ticker)
         if err:
             return err
+        price_data = self.memory.get(f"{symbol}_data")
+        benchmark_data = risk.benchmark_for_metrics(
+            symbol, price_data, self.memory, self.tracer,
+            label=self._label_prefix + "Fetch benchmark history")
         started = self.tracer.now()
-        computed = metrics.compute_all_metrics(self.memory.get(f"{symbol}_data"))
+        computed = metrics.compute_all_metrics_incremental(
+            price_data, (symbol, self.memory.get(f"{symbol}_period")),
+        )
+        computed.update(risk.compute_risk_metrics(price_data, benchmark_data, computed))
         self.memory.set(f"{symbol}_metrics", computed)
         detail = (f"Return {computed['total_return'] * 100:+.1f}% · "
                   f"Max DD {(computed['max_drawdown'] or 0) * 100:+.1f}%")
@@ -312,27 +376,46 @@ class ToolExecutor:
         return self._enrichment(ticker, "news", "Pull market news", "_news",
                                 fetch, summarize)
 
-    def _tool_compare_tickers(self, ticker_a, ticker_b):
-        symbol_a = normalize_crypto_symbol(str(ticker_a or "").strip().upper())
-        symbol_b = normalize_crypto_symbol(str(ticker_b or "").strip().upper())
-        metrics_a = self.memory.get(f"{symbol_a}_metrics")
-        metrics_b = self.memory.get(f"{symbol_b}_metrics")
-        if not metrics_a or not metrics_b:
-            missing = symbol_a if not metrics_a else symbol_b
-            return {"error": f"Cannot compare: no metrics for {missing}. "
+    def _tool_compare_tickers(self, tickers=None, ticker_a=None, ticker_b=None):
+        requested = list(tickers or []) or [ticker_a, ticker_b]
+        symbols = []
+        for ticker in requested:
+            symbol = normalize_crypto_symbol(str(ticker or "").strip().upper())
+            if symbol and symbol not in symbols:
+                symbols.append(symbol)
+        metrics_by_ticker = {}
+        missing = []
+        for symbol in symbols:
+            ticker_metrics = self.memory.get(f"{symbol}_metrics")
+            if ticker_metrics:
+                metrics_by_ticker[symbol] = ticker_metrics
+            else:
+                missing.append(symbol)
+        if len(metrics_by_ticker) < 2:
+            missing_label = ", ".join(missing) or "a second ticker"
+            return {"error": f"Cannot compare: no metrics for {missing_label}. "
                              "The run can complete with the remaining ticker."}
+
         started = self.tracer.now()
-        comparison = metrics.compare_metrics(metrics_a, metrics_b, symbol_a, symbol_b)
+        compared = list(metrics_by_ticker)
+        price_data_by_ticker = {symbol: self.memory.get(f"{symbol}_data") for symbol in compared}
+        comparison = metrics.rank_metrics(metrics_by_ticker)
+        comparison["correlation"] = metrics.compute_correlation_matrix(
+            metrics.build_close_frame(price_data_by_ticker))
         self.memory.set("comparison", comparison)
-        period = self.memory.get(f"{symbol_a}_period", "unknown")
-        chart_path = charts.plot_comparison_normalized(
-            self.memory.get(f"{symbol_a}_data"), self.memory.get(f"{symbol_b}_data"),
-            symbol_a, symbol_b, period, CHARTS_DIR)
+        period = self.memory.get(f"{compared[0]}_period", "unknown")
+        chart_path = charts.plot_growth_comparison(price_data_by_ticker, period, CHARTS_DIR)
         self.memory.set("comparison_chart_path", str(Path(chart_path).resolve()))
-        detail = f"{symbol_a} vs {symbol_b} · winner: {comparison.get('winner') or 'tie'}"
+        label = (" vs ".join(compared) if len(compared) == 2
+                 else f"{len(compared)} tickers ranked")
+        detail = f"{label} · winner: {comparison.get('winner') or 'tie'}"
         self._record("compare", "Compare & build growth chart", "ok", detail,
                      started=started)
-        return {"winner": comparison.get("winner"), "reason": comparison.get("reason")}
+        summary = {"winner": comparison.get("winner"), "reason": comparison.get("reason"),
+                   "ranking": [row["ticker"] for row in comparison["ranking"]]}
+        if missing:
+            summary["skipped"] = missing
+        return summary
 
     def _tool_finish(self, tickers, period, use_llm_summary):
         cleaned = []
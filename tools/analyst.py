@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import io
-import json
-import threading
-import urllib.request
 from pathlib import Path
 from urllib.parse import urlparse
 
-import yfinance as yf
 from tools.crypto import crypto_domain, is_crypto_symbol
+from tools.http_session import fetch, shared_session
+from tools.lazy_modules import lazy_module
+from tools.persistent_cache import MISSING, PersistentCache
+from tools.swr import SWRCache
 
+np = lazy_module("numpy")
+yf = lazy_module("yfinance")
+
+
+_DAY = 24 * 60 * 60
+_CACHE_MAX_ENTRIES = 5000
 
 RECOMMENDATION_LABELS = {
     "strong_buy": "Strong Buy",
@@ -69,36 +75,18 @@ def _domain_from_website(website):
 # ── Logo domain resolution ──────────────────────────────────────────────────
 # Resolving a company's website via yfinance is slow, so the ticker→domain
 # mapping is cached on disk (domains essentially never change). A blank string
-# is cached for tickers with no known website, so we don't re-query them.
+# is cached for tickers with no known website, so we don't re-query them for
+# a week.
 _LOGO_CACHE_PATH = Path("output") / "logo_cache.json"
-_logo_cache = None
-_logo_cache_lock = threading.Lock()
-
-
-def _load_logo_cache():
-    global _logo_cache
-    if _logo_cache is None:
-        try:
-            with open(_LOGO_CACHE_PATH, "r", encoding="utf-8") as f:
-                _logo_cache = json.load(f)
-        except Exception:
-            _logo_cache = {}
-    return _logo_cache
-
-
-def _save_logo_cache():
-    try:
-        _LOGO_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(_LOGO_CACHE_PATH, "w", encoding="utf-8") as f:
-            json.dump(_logo_cache, f, indent=2, sort_keys=True)
-    except Exception:
-        pass
+_logo_cache = PersistentCache(
+    _LOGO_CACHE_PATH, negative_ttl=7 * _DAY, max_entries=_CACHE_MAX_ENTRIES,
+)
 
 
 def _fetch_website_domain(symbol):
     """Look up the company's website via yfinance and return its bare domain."""
     try:
-        info = yf.Ticker(symbol).get_info() or {}
+        info = yf.Ticker(symbol, session=shared_session()).get_info() or {}
     except Exception:
         return None
     website = info.get("website") or info.get("irWebsite")
@@ -128,17 +116,15 @@ def resolve_logo_domain(ticker, website=None, allow_network=True):
     if crypto:
         return crypto
 
-    cache = _load_logo_cache()
-    if symbol in cache:
-        return cache[symbol] or None
+    cached = _logo_cache.get(symbol)
+    if cached is not MISSING:
+        return cached or None
 
     if not allow_network:
         return None
 
     domain = _fetch_website_domain(symbol)
-    with _logo_cache_lock:
-        cache[symbol] = domain or ""   # cache misses too, to avoid re-querying
-        _save_logo_cache()
+    _logo_cache.set(symbol, domain or "")   # cache misses too, to avoid re-querying
     return domain
 
 
@@ -164,34 +150,16 @@ def logo_candidates_for_domain(domain):
 # with a 200 status. A blank image loads fine, so the browser's onerror never
 # fires and the user is left with an invisible logo (e.g. UBER). We probe each
 # ticker's logo once, detect blanks, and cache the verdict so a blank source is
-# dropped from the candidate list instead of silently winning.
+# dropped from the candidate list instead of silently winning. A blank verdict
+# is re-checked after a week in case FMP has since added the art.
 _FMP_LOGO_URL = "https://financialmodelingprep.com/image-stock/{symbol}.png"
 _FMP_CACHE_PATH = Path("output") / "fmp_logo_cache.json"
-_fmp_cache = None
-_fmp_cache_lock = threading.Lock()
-
-
-def _load_fmp_cache():
-    global _fmp_cache
-    if _fmp_cache is None:
-        try:
-            with open(_FMP_CACHE_PATH, "r", encoding="utf-8") as f:
-                _fmp_cache = json.load(f)
-        except Exception:
-            _fmp_cache = {}
-    return _fmp_cache
+_fmp_cache = PersistentCache(
+    _FMP_CACHE_PATH, negative_ttl=7 * _DAY, max_entries=_CACHE_MAX_ENTRIES,
+)
 
 
-def _save_fmp_cache():
-    try:
-        _FMP_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(_FMP_CACHE_PATH, "w", encoding="utf-8") as f:
-            json.dump(_fmp_cache, f, indent=2, sort_keys=True)
-    except Exception:
-        pass
-
-
-def _image_is_blank(data):
+def _image_is_blank(data, sample_size=32):
     """True if image bytes are an effectively empty placeholder.
 
     Catches fully-transparent images and ones whose every visible pixel is
@@ -200,37 +168,30 @@ def _image_is_blank(data):
     """
     try:
         from PIL import Image
-        im = Image.open(io.BytesIO(data)).convert("RGBA").resize((32, 32))
+        im = Image.open(io.BytesIO(data)).convert("RGBA").resize((sample_size, sample_size))
     except Exception:
         return False
 
-    visible = [(r, g, b) for (r, g, b, a) in im.getdata() if a > 16]
-    if not visible:
-        return True
-    return all(r > 244 and g > 244 and b > 244 for r, g, b in visible)
+    pixels = np.asarray(im).reshape(-1, 4)
+    visible = pixels[pixels[:, 3] > 16, :3]
+    return bool((visible > 244).all())   # also True when nothing is visible
 
 
 def _fmp_logo_is_real(symbol, allow_network=True):
     """Whether FMP serves a real (non-blank) logo for this ticker, cached."""
-    cache = _load_fmp_cache()
-    if symbol in cache:
-        return cache[symbol]
+    cached = _fmp_cache.get(symbol)
+    if cached is not MISSING:
+        return cached
     if not allow_network:
         return True   # unknown — don't suppress a logo we haven't checked
 
     try:
-        req = urllib.request.Request(
-            _FMP_LOGO_URL.format(symbol=symbol),
-            headers={"User-Agent": "Mozilla/5.0"},
-        )
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            real = resp.status == 200 and not _image_is_blank(resp.read())
+        resp = fetch(_FMP_LOGO_URL.format(symbol=symbol), timeout=8)
+        real = resp.status_code == 200 and not _image_is_blank(resp.content)
     except Exception:
         return True   # transient failure — leave it unjudged, retry next time
 
-    with _fmp_cache_lock:
-        cache[symbol] = real
-        _save_fmp_cache()
+    _fmp_cache.set(symbol, real)
     return real
 
 
@@ -255,14 +216,14 @@ def logo_candidates_for_ticker(ticker, website=None, allow_network=True):
     return domain_candidates
 
 
-def logo_url_for_ticker(ticker, website=None):
+def logo_url_for_ticker(ticker, website=None, allow_network=True):
     """Single best logo URL — the highest-quality source verified to exist.
 
     Returns the first candidate from the same chain the watchlist uses, so a
     plain <img> tag gets the real brand logo (e.g. Google's "G", not Alphabet's
     generic favicon) and never a known-blank placeholder.
     """
-    candidates = logo_candidates_for_ticker(ticker, website)
+    candidates = logo_candidates_for_ticker(ticker, website, allow_network)
     return candidates[0] if candidates else None
 
 
@@ -273,74 +234,59 @@ def logo_url_for_ticker(ticker, website=None):
 # discarded and the most common saturated hue wins. The verdict is cached on
 # disk per ticker — a color never changes — so the logo is downloaded at most
 # once. Tickers whose logo has no vivid color (monochrome marks like Apple) get
-# a blank cache entry and simply render with the default card surface.
+# a blank cache entry and simply render with the default card surface; that
+# entry is re-checked after 30 days in case the logo source changes.
 _BRAND_CACHE_PATH = Path("output") / "brand_color_cache.json"
-_brand_cache = None
-_brand_cache_lock = threading.Lock()
-
-
-def _load_brand_cache():
-    global _brand_cache
-    if _brand_cache is None:
-        try:
-            with open(_BRAND_CACHE_PATH, "r", encoding="utf-8") as f:
-                _brand_cache = json.load(f)
-        except Exception:
-            _brand_cache = {}
-    return _brand_cache
-
-
-def _save_brand_cache():
-    try:
-        _BRAND_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(_BRAND_CACHE_PATH, "w", encoding="utf-8") as f:
-            json.dump(_brand_cache, f, indent=2, sort_keys=True)
-    except Exception:
-        pass
+_brand_cache = PersistentCache(
+    _BRAND_CACHE_PATH, negative_ttl=30 * _DAY, max_entries=_CACHE_MAX_ENTRIES,
+)
 
 
-def _dominant_brand_color(data):
+def _dominant_brand_color(data, sample_size=48):
     """Extract the most representative vivid color from logo bytes as "r,g,b".
 
     Ignores transparent, near-white, near-black, and low-saturation (gray)
     pixels, buckets the rest by coarse hue, then averages the exact pixels of
     the most populous bucket for a smooth, on-brand tint. Returns None when the
     logo has no meaningful color (e.g. a black-and-white wordmark).
+
+    Works on the whole pixel array at once, so a larger `sample_size` buys
+    color fidelity for little extra CPU. Ties between equally populous
+    buckets go to the one seen first in scan order.
     """
     try:
-        from collections import Counter
-
         from PIL import Image
 
-        im = Image.open(io.BytesIO(data)).convert("RGBA").resize((48, 48))
+        im = Image.open(io.BytesIO(data)).convert("RGBA").resize((sample_size, sample_size))
     except Exception:
         return None
 
-    buckets = Counter()
-    members = {}
-    for (r, g, b, a) in im.getdata():
-        if a < 128:
-            continue
-        hi, lo = max(r, g, b), min(r, g, b)
-        if hi > 240 and lo > 240:      # near-white
-            continue
-        if hi < 28:                     # near-black
-            continue
-        if hi == 0 or (hi - lo) / hi < 0.22:   # grayscale / washed out
-            continue
-        key = (r // 24, g // 24, b // 24)
-        buckets[key] += 1
-        members.setdefault(key, []).append((r, g, b))
-
-    if not buckets:
+    pixels = np.asarray(im).reshape(-1, 4).astype(np.int64)
+    rgb = pixels[:, :3]
+    hi, lo = rgb.max(axis=1), rgb.min(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        saturation = np.where(hi > 0, (hi - lo) / hi, 0.0)
+    keep = (
+        (pixels[:, 3] >= 128)
+        & ~((hi > 240) & (lo > 240))   # near-white
+        & (hi >= 28)                    # near-black
+        & (hi > 0) & (saturation >= 0.22)   # grayscale / washed out
+    )
+    rgb = rgb[keep]
+    if not len(rgb):
         return None
 
-    key, _ = buckets.most_common(1)[0]
-    pixels = members[key]
-    n = len(pixels)
-    r = sum(p[0] for p in pixels) // n
-    g = sum(p[1] for p in pixels) // n
-    b = sum(p[2] for p in pixels) // n
+    # 24-wide channel buckets (0..10 each) packed into one integer key.
+    coarse = rgb // 24
+    keys = coarse[:, 0] * 121 + coarse[:, 1] * 11 + coarse[:, 2]
+    counts = np.bincount(keys)
+    tied = np.flatnonzero(counts == counts.max())
+    unique_keys, first_seen = np.unique(keys, return_index=True)
+    tied_first_seen = first_seen[np.searchsorted(unique_keys, tied)]
+    winner = tied[np.argmin(tied_first_seen)]
+
+    members = rgb[keys == winner]
+    r, g, b = (members.sum(axis=0) // len(members)).tolist()
     return f"{r},{g},{b}"
 
 
@@ -355,9 +301,9 @@ def brand_color_for_ticker(ticker, logo_url=None, allow_network=True):
     if not symbol:
         return None
 
-    cache = _load_brand_cache()
-    if symbol in cache:
-        return cache[symbol] or None
+    cached = _brand_cache.get(symbol)
+    if cached is not MISSING:
+        return cached or None
 
     if not allow_network:
         return None
@@ -367,18 +313,27 @@ def brand_color_for_ticker(ticker, logo_url=None, allow_network=True):
         return None
 
     try:
-        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            color = _dominant_brand_color(resp.read())
+        color = _dominant_brand_color(fetch(url, timeout=8).content)
     except Exception:
         return None   # transient — retry next time rather than caching a miss
 
-    with _brand_cache_lock:
-        cache[symbol] = color or ""
-        _save_brand_cache()
+    _brand_cache.set(symbol, color or "")
     return color
 
 
+def remember_brand_color_from_logo(ticker, data):
+    """Cache the brand color from logo bytes already downloaded elsewhere.
+
+    The logo image store fetches the same bytes brand_color_for_ticker would,
+    so it hands them over here instead of a second download. No-op when the
+    ticker's color is already cached.
+    """
+    symbol = str(ticker or "").strip().upper()
+    if not symbol or _brand_cache.get(symbol) is not MISSING:
+        return
+    _brand_cache.set(symbol, _dominant_brand_color(data) or "")
+
+
 def _fetch_rating_counts(ticker_obj):
     """Per-rating analyst counts (Strong Buy … Strong Sell) for the most recent
     period, or None when yfinance has no recommendation breakdown.
@@ -420,6 +375,14 @@ def _fetch_rating_counts(ticker_obj):
     return counts if sum(counts.values()) > 0 else None
 
 
+# Ratings and targets move a few times a week: fresh for 6 hours, served
+# stale (while refreshing in the background) for up to 3 days. The cached view
+# is per symbol, so it holds nothing derived from the caller's latest close:
+# current_price and upside are worked out on every read (_with_upside).
+_view_cache = SWRCache("analyst", ttl=6 * 60 * 60, stale_ttl=3 * _DAY,
+                       cacheable=lambda view: view.get("available"))
+
+
 def fetch_analyst_view(ticker, latest_close=None):
     """
     Fetch analyst recommendation and price-target data when yfinance provides it.
@@ -427,9 +390,28 @@ def fetch_analyst_view(ticker, latest_close=None):
     analyst data.
     """
     symbol = ticker.upper()
-    latest_close = _as_float(latest_close)
+    view = _view_cache.get(symbol, lambda: _download_analyst_view(symbol))
+    return _with_upside(view, _as_float(latest_close))
+
+
+def _with_upside(view, latest_close):
+    """A copy of the cached view with current_price and upside filled in,
+    falling back to latest_close when Yahoo had no currentPrice."""
+    if "target_mean" not in view:
+        return view      # the error payload
+    view = dict(view)
+    current_price = view.pop("quoted_price", None) or latest_close
+    target_mean = view["target_mean"]
+    upside = None
+    if target_mean is not None and current_price not in (None, 0):
+        upside = (target_mean / current_price) - 1
+    view["current_price"] = current_price
+    view["upside"] = upside
+    return view
 
-    ticker_obj = yf.Ticker(symbol)
+
+def _download_analyst_view(symbol):
+    ticker_obj = yf.Ticker(symbol, session=shared_session())
     try:
         info = ticker_obj.get_info() or {}
     except Exception as exc:
@@ -450,12 +432,6 @@ def fetch_analyst_view(ticker, latest_close=None):
     target_mean = _as_float(info.get("targetMeanPrice"))
     target_low = _as_float(info.get("targetLowPrice"))
     target_high = _as_float(info.get("targetHighPrice"))
-    current_price = _as_float(info.get("currentPrice")) or latest_close
-
-    upside = None
-    if target_mean is not None and current_price not in (None, 0):
-        upside = (target_mean / current_price) - 1
-
     available = any(
         value not in (None, "Unavailable")
         for value in (recommendation, analyst_count, target_mean, target_low, target_high)
@@ -473,6 +449,5 @@ def fetch_analyst_view(ticker, latest_close=None):
         "target_mean": target_mean,
         "target_low": target_low,
         "target_high": target_high,
-        "current_price": current_price,
-        "upside": upside,
+        "quoted_price": _as_float(info.get("currentPrice")),
     }
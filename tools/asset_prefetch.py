@@ -0,0 +1,87 @@
+"""Background warmup of per-ticker display assets (logo sources, brand colour).
+
+Resolving a logo can mean a yfinance website lookup plus an FMP probe, and the
+brand colour a logo download — each with an 8-second timeout. None of that
+belongs on a request that renders a page. Callers that learn about a ticker
+early (the agent, as soon as a symbol's prices are in; the watchlist poll)
+call `prefetch_assets()`, and render paths use the /logo route and
+`cached_brand_color()`, which never touch the network. Until a warmup lands
+the brand colour is None — the placeholder that renders the default card
+surface.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tools import rate_limit
+from tools.analyst import brand_color_for_ticker, logo_url_for_ticker
+from tools.logo_images import fetch_logo_image
+
+PREFETCH_WORKERS = 4
+# A warmup that couldn't finish (transient network failure) may be retried
+# after this long; successful results live in the analyst disk caches.
+RETRY_AFTER_SECONDS = 15 * 60
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = set()
+_warmed_at = {}              # ticker -> last warmup, only within RETRY_AFTER_SECONDS
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS,
+                                               thread_name_prefix="asset-prefetch")
+    return _executor
+
+
+def _warm(ticker):
+    try:
+        with rate_limit.priority("background"):
+            # Also seeds the brand colour from the same bytes when it succeeds.
+            fetch_logo_image(ticker)
+            brand_color_for_ticker(ticker, logo_url_for_ticker(ticker, allow_network=False))
+    except Exception:
+        pass   # best effort; the render path falls back to the placeholder
+    finally:
+        with _lock:
+            _in_flight.discard(ticker)
+            now = time.time()
+            # Entries past the retry window no longer block anything; drop
+            # them so the table only holds recent warmups.
+            for symbol in [s for s, at in _warmed_at.items() if now - at >= RETRY_AFTER_SECONDS]:
+                del _warmed_at[symbol]
+            _warmed_at[ticker] = now
+
+
+def prefetch_assets(tickers):
+    """Queue logo + brand-colour warmups for tickers not recently warmed.
+
+    Returns the tickers actually queued; never blocks on the network.
+    """
+    now = time.time()
+    queued = []
+    with _lock:
+        for ticker in tickers or []:
+            symbol = str(ticker or "").strip().upper()
+            if not symbol or symbol in _in_flight or symbol in queued:
+                continue
+            if now - _warmed_at.get(symbol, 0) < RETRY_AFTER_SECONDS:
+                continue
+            _in_flight.add(symbol)
+            queued.append(symbol)
+        if queued:
+            executor = _get_executor()
+            for symbol in queued:
+                executor.submit(_warm, symbol)
+    return queued
+
+
+def cached_brand_color(ticker, logo_url=None):
+    """Cached "r,g,b" brand colour, or None (placeholder) if not warmed yet."""
+    return brand_color_for_ticker(ticker, logo_url, allow_network=False)
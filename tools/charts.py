@@ -1,15 +1,19 @@
 # tools/charts.py
 from __future__ import annotations
 
+import os
 from pathlib import Path
 from typing import Optional
 
-import matplotlib
+from tools.lazy_modules import lazy_module
+from tools.metrics import build_growth_frame
+
 # Use a non-GUI backend so charts can be saved without a display.
-# This is important when running on servers or from scripts.
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import pandas as pd
+# This is important when running on servers or from scripts. Set through the
+# environment so it applies whenever pyplot is first (lazily) imported.
+os.environ["MPLBACKEND"] = "Agg"
+plt = lazy_module("matplotlib.pyplot")
+pd = lazy_module("pandas")
 
 """
 Make sure a directory exists.
@@ -75,31 +79,54 @@ def plot_comparison_normalized(
     """
     Plots two tickers on the same chart, normalized to start at 1.0.
     """
-    ensure_dir(out_dir)
-
     if price_data_a is None or price_data_b is None:
         raise ValueError("Price data missing for comparison chart.")
+    return plot_growth_comparison(
+        {ticker_a: price_data_a, ticker_b: price_data_b}, period, out_dir
+    )
 
-    # Normalize prices
-    close_a = _clean_close_series(price_data_a)
-    close_b = _clean_close_series(price_data_b)
-    norm_a = close_a / close_a.iloc[0]
-    norm_b = close_b / close_b.iloc[0]
 
-    ticker_a = ticker_a.upper()
-    ticker_b = ticker_b.upper()
-    # Build the output filename and path
-    filename = f"compare_{ticker_a}_{ticker_b}_{period}.png"
+def plot_growth_comparison(
+    price_data_by_ticker,
+    period: str,
+    out_dir: Path,
+) -> Path:
+    """
+    Plots any number of tickers on one chart, normalized to start at 1.0 on a
+    common date so every line measures growth over the same window.
+    """
+    ensure_dir(out_dir)
+
+    if len(price_data_by_ticker) < 2 or any(
+        price_data is None for price_data in price_data_by_ticker.values()
+    ):
+        raise ValueError("Price data missing for comparison chart.")
+
+    price_data_by_ticker = {
+        ticker.upper(): price_data for ticker, price_data in price_data_by_ticker.items()
+    }
+    growth, _ = build_growth_frame(price_data_by_ticker)
+    tickers = list(growth.columns)
+
+    # Build the output filename and path; long lists get a count instead of
+    # every symbol so the filename stays a sane length.
+    if len(tickers) <= 4:
+        filename = f"compare_{'_'.join(tickers)}_{period}.png"
+    else:
+        filename = f"compare_{tickers[0]}_{len(tickers)}_tickers_{period}.png"
     out_path = out_dir / filename
 
     plt.figure()
-    plt.plot(norm_a.index, norm_a, label=ticker_a)
-    plt.plot(norm_b.index, norm_b, label=ticker_b)
+    for ticker in tickers:
+        plt.plot(growth.index, growth[ticker], label=ticker)
     # Add labels and legend for clarity
-    plt.title(f"{ticker_a} vs {ticker_b} (Normalized, {period})")
+    if len(tickers) == 2:
+        plt.title(f"{tickers[0]} vs {tickers[1]} (Normalized, {period})")
+    else:
+        plt.title(f"{len(tickers)} Tickers (Normalized, {period})")
     plt.xlabel("Date")
     plt.ylabel("Growth (Start = 1.0)")
-    plt.legend()
+    plt.legend(fontsize="small", ncol=2 if len(tickers) > 6 else 1)
     plt.tight_layout()
     # Save the chart as an image file
     plt.savefig(out_path, dpi=150)
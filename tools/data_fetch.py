@@ -1,17 +1,39 @@
-import yfinance as yf
-import pandas as pd
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
+import os
+import threading
 import time
 from tools.crypto import normalize_crypto_symbol, is_crypto_symbol
+from tools.http_session import shared_session
+from tools import market_calendar
+from tools.io_executor import run_all
+from tools.lazy_modules import lazy_module
+from tools.swr import note_stale, revalidate
+
+yf = lazy_module("yfinance")
+pd = lazy_module("pandas")
 
 # Cache settings
 CACHE_DIR = Path("output") / "cache" # This is the folder where cached price data lives
 CACHE_MAX_AGE_SECONDS = 60 * 60 * 24  # 24 hours for standard periods
+# Cache files keep full bars, so volume/range features don't refetch them.
+OHLCV_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+PRICE_DTYPE = "float32"
+VOLUME_DTYPE = "int64"
+# Intraday periods share one file of the finest bars we fetch per symbol;
+# each period's bars are resampled from it locally (see _intraday_view).
+INTRADAY_PERIODS = ("1d", "5d")
+INTRADAY_BASE_INTERVAL = "5m"
+INTRADAY_BASE_PERIOD = "5d"
+# How each column aggregates when bars are resampled to a coarser interval.
+BAR_AGGREGATIONS = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
 
 
 def _bar_interval_for_period(period):
-    """Return the yfinance bar interval appropriate for the requested period."""
+    """Return the bar interval appropriate for the requested period.
+
+    Intraday intervals are resampled locally from INTRADAY_BASE_INTERVAL bars.
+    """
     if period == "1d":
         return "5m"   # ~78 five-minute bars — high-resolution intraday view
     if period == "5d":
@@ -20,7 +42,11 @@ def _bar_interval_for_period(period):
 
 
 def _cache_max_age_seconds(period, is_crypto=False):
-    """Intraday data goes stale quickly; use a shorter TTL for short periods."""
+    """Intraday data goes stale quickly; use a shorter TTL for short periods.
+
+    For equities this only applies while the market is open; see
+    _cache_expires_at.
+    """
     if period == "1d":
         return 60 * 10    # 10 minutes
     if period == "5d":
@@ -32,17 +58,76 @@ def _cache_max_age_seconds(period, is_crypto=False):
 def _safe_cache_part(value):
     return "".join(char if char.isalnum() or char in {"-", "_"} else "_" for char in value)
 
-# If the user asks for AAPL and 1y, this returns 'output/cache/AAPL_1y.csv'
+def _is_intraday(period):
+    return period in INTRADAY_PERIODS
+
+
+# If the user asks for AAPL and 1y, this returns 'output/cache/AAPL_1y.csv'.
+# 1d and 5d both read 'output/cache/AAPL_intraday_5m.csv'.
 def _get_cache_path(ticker, period):
     ticker = ticker.upper()
+    if _is_intraday(period):
+        return CACHE_DIR / f"{ticker}_intraday_{INTRADAY_BASE_INTERVAL}.csv"
     safe_period = _safe_cache_part(period)
     return CACHE_DIR / f"{ticker}_{safe_period}.csv"
 
-def _is_cache_fresh(cache_path, period="", is_crypto=False):
-    if not cache_path.exists():
-        return False
-    file_age_seconds = time.time() - cache_path.stat().st_mtime
-    return file_age_seconds < _cache_max_age_seconds(period, is_crypto)
+def _stale_window_seconds(period, is_crypto=False):
+    """Once expired, a cache file is still served (and refreshed in the
+    background) for this long; after that, callers wait on the fetch."""
+    if period == "1d":
+        return 60 * 50        # 50 minutes
+    if period == "5d":
+        return 60 * 150       # 2.5 hours
+    if is_crypto:
+        return 60 * 60 * 5    # 5 hours
+    return 60 * 60 * 24 * 2   # 2 days
+
+
+def _cache_expires_at(fetched_at, period, is_crypto=False):
+    """When data fetched at `fetched_at` may be out of date.
+
+    Crypto trades around the clock, so it is a plain TTL. Equities expire at
+    the next possible new bar: the TTL during a session, otherwise the next
+    session's open (see tools/market_calendar.py).
+    """
+    ttl = _cache_max_age_seconds(period, is_crypto)
+    if is_crypto:
+        return fetched_at + ttl
+    return market_calendar.cache_expiry(fetched_at, ttl)
+
+
+def _cache_state(cache_path, period="", is_crypto=False, now=None):
+    """("fresh" | "stale" | "expired", age in seconds), or (None, None) if uncached.
+
+    "stale" means expired but still inside the stale-while-revalidate window.
+    """
+    try:
+        fetched_at = cache_path.stat().st_mtime
+    except OSError:
+        return None, None
+    now = time.time() if now is None else now
+    expires_at = _cache_expires_at(fetched_at, period, is_crypto)
+    if now < expires_at:
+        return "fresh", now - fetched_at
+    window = _stale_window_seconds(period, is_crypto)
+    # A 1-day chart fetched after the close shows the previous session;
+    # once a new session has opened it isn't worth serving, even briefly.
+    if period == "1d" and not is_crypto and not market_calendar.in_session(fetched_at):
+        window = 0
+    return ("stale" if now < expires_at + window else "expired"), now - fetched_at
+
+
+def _is_cache_servable(cache_path, period="", is_crypto=False):
+    """Fresh, or stale but still inside the stale-while-revalidate window."""
+    return _cache_state(cache_path, period, is_crypto)[0] in ("fresh", "stale")
+
+
+# Write to a temp file and rename, so a reader (or a background refresh racing
+# a request) never sees a half-written CSV.
+def _write_cache(bars, cache_path):
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    bars.to_csv(tmp_path)
+    os.replace(tmp_path, cache_path)
 
 
 def _rolling_period_bounds(period, now=None):
@@ -78,43 +163,134 @@ def _clip_to_rolling_period(price_data, period, now=None):
     clipped = price_data.loc[mask].copy()
     return clipped if not clipped.empty else price_data
 
-def _clean_close_prices(price_data):
-    close_prices = price_data[["Close"]].copy()
-    idx = pd.to_datetime(close_prices.index, errors="coerce")
+def _clean_ohlcv(price_data):
+    """The OHLCV columns present in `price_data`, compact: float32 prices and
+    int64 volume on a tz-naive index, rows without a numeric close dropped."""
+    columns = [column for column in OHLCV_COLUMNS if column in price_data.columns]
+    bars = price_data[columns].copy()
+    idx = pd.to_datetime(bars.index, errors="coerce")
     # Strip timezone if present; preserve the actual timestamp values as-is.
     if idx.tz is not None:
         idx = idx.tz_localize(None)
-    close_prices.index = idx
-    close_prices["Close"] = pd.to_numeric(close_prices["Close"], errors="coerce")
-    close_prices = close_prices.dropna(subset=["Close"])
-    close_prices = close_prices[~close_prices.index.isna()]
+    bars.index = idx
+    for column in columns:
+        bars[column] = pd.to_numeric(bars[column], errors="coerce")
+    bars = bars.dropna(subset=["Close"])
+    bars = bars[~bars.index.isna()]
 
-    if close_prices.empty:
+    if bars.empty:
         raise ValueError("Price data did not include valid numeric close prices.")
 
-    return close_prices
+    dtypes = {column: PRICE_DTYPE for column in columns if column != "Volume"}
+    if "Volume" in columns:
+        bars["Volume"] = bars["Volume"].fillna(0)
+        dtypes["Volume"] = VOLUME_DTYPE
+    return bars.astype(dtypes)
+
+
+def _pandas_rule(interval):
+    """yfinance interval ("5m", "1h", "1d") -> pandas offset alias."""
+    count, unit = interval[:-1], interval[-1]
+    return count + {"m": "min", "h": "h", "d": "D"}[unit]
+
+
+def resample_bars(bars, interval, is_crypto=False):
+    """Aggregate OHLCV bars to a coarser `interval` ("15m", "1h", "1d", ...).
+
+    Equity bins start at the 9:30 open, the way Yahoo labels its own hourly
+    bars; crypto bins are aligned to the clock. Empty bins (overnight,
+    weekends) are dropped. Bars already at `interval` are returned as-is.
+    """
+    if interval == INTRADAY_BASE_INTERVAL:
+        return bars
+    rule = _pandas_rule(interval)
+    offset = None
+    if not is_crypto and not interval.endswith("d"):
+        offset = pd.Timedelta(hours=9, minutes=30)
+    aggregations = {column: how for column, how in BAR_AGGREGATIONS.items() if column in bars.columns}
+    resampled = bars.resample(rule, offset=offset).agg(aggregations)
+    return resampled.dropna(subset=["Close"])
+
+
+def _intraday_view(bars, period, is_crypto=False):
+    """The bars a 1d/5d chart shows, derived from the shared intraday file.
+
+    1d is the latest session for equities and a rolling 24 hours for crypto.
+    """
+    if period == "1d" and not is_crypto:
+        bars = bars[bars.index >= bars.index[-1].normalize()]
+    elif is_crypto:
+        bars = _clip_to_rolling_period(bars, period)
+    return resample_bars(bars, _bar_interval_for_period(period), is_crypto)
+
+
+def _close_view(bars):
+    """The Close-only frame existing callers expect. Under pandas 3's
+    copy-on-write (requirements.txt pins pandas>=3) this shares the bars'
+    memory; nothing is copied unless a caller writes to it."""
+    return bars[["Close"]]
+
+def _read_cache(cache_path, ticker, period, is_crypto, start_date=None, end_date=None):
+    cached_data = pd.read_csv(cache_path, index_col=0, parse_dates=True)
+
+    if cached_data.empty or "Close" not in cached_data.columns:
+        raise ValueError(f"Cached data for ticker {ticker} is invalid.")
+
+    cached_data = _clean_ohlcv(cached_data)
+    if _is_intraday(period):
+        return _intraday_view(cached_data, period, is_crypto)
+    if is_crypto and not (start_date and end_date):
+        cached_data = _clip_to_rolling_period(cached_data, period)
+    return cached_data
+
 
-# Fetch historical price data for a given stock ticker.
+# Fetch historical price data for a given stock ticker, as a Close-only frame.
 def fetch_price_history(ticker, period, start_date=None, end_date=None):
+    return _close_view(fetch_price_bars(ticker, period, start_date, end_date))
+
+
+# Fetch full OHLCV bars (float32 prices, int64 volume) for a ticker.
+# Fresh cache files are served as-is (equity files stay fresh until the next
+# possible new bar, so off-hours requests never refetch). A file past its
+# expiry but inside the stale window is served too, while a background refresh rewrites it; the
+# run's trace marks that step "served stale". Files cached before bars were
+# stored in full only have Close until their next refresh.
+def fetch_price_bars(ticker, period, start_date=None, end_date=None):
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
     yahoo_symbol = normalize_crypto_symbol(ticker)
     is_crypto = is_crypto_symbol(yahoo_symbol)
     cache_path = _get_cache_path(yahoo_symbol, period)
 
     # Use cached data if it exists and is still fresh
-    if _is_cache_fresh(cache_path, period, is_crypto):
-        cached_data = pd.read_csv(cache_path, index_col=0, parse_dates=True)
+    state, age = _cache_state(cache_path, period, is_crypto)
+    if state == "fresh":
+        return _read_cache(cache_path, ticker, period, is_crypto, start_date, end_date)
 
-        if cached_data.empty or "Close" not in cached_data.columns:
-            raise ValueError(f"Cached data for ticker {ticker} is invalid.")
+    if state == "stale":
+        try:
+            cached_data = _read_cache(cache_path, ticker, period, is_crypto, start_date, end_date)
+        except ValueError:
+            cached_data = None   # unreadable — fall through to a blocking fetch
+        if cached_data is not None:
+            note_stale("data", ticker, age)
+            revalidate(("prices", str(cache_path)),
+                       lambda: _download_price_history(ticker, period, start_date, end_date))
+            return cached_data
 
-        cached_data = _clean_close_prices(cached_data)
-        if is_crypto and not (start_date and end_date):
-            cached_data = _clip_to_rolling_period(cached_data, period)
-        return cached_data
+    return _download_price_history(ticker, period, start_date, end_date)
 
-    # Otherwise fetch fresh data from Yahoo Finance
-    stock = yf.Ticker(yahoo_symbol)
+
+# Fetch from Yahoo Finance and rewrite the cache file.
+def _download_price_history(ticker, period, start_date=None, end_date=None):
+    yahoo_symbol = normalize_crypto_symbol(ticker)
+    is_crypto = is_crypto_symbol(yahoo_symbol)
+    cache_path = _get_cache_path(yahoo_symbol, period)
+
+    stock = yf.Ticker(yahoo_symbol, session=shared_session())
+    intraday = _is_intraday(period)
+    # Intraday periods all download the shared base bars once.
+    fetch_period = INTRADAY_BASE_PERIOD if intraday else period
+    bar_interval = INTRADAY_BASE_INTERVAL if intraday else _bar_interval_for_period(period)
     if start_date and end_date:
         # yfinance treats end as exclusive; user-facing custom ranges are inclusive.
         exclusive_end = (
@@ -122,8 +298,7 @@ def fetch_price_history(ticker, period, start_date=None, end_date=None):
         ).isoformat()
         history = stock.history(start=start_date, end=exclusive_end, interval="1d")
     elif is_crypto:
-        bar_interval = _bar_interval_for_period(period)
-        bounds = _rolling_period_bounds(period)
+        bounds = _rolling_period_bounds(fetch_period)
         if bounds:
             start_dt, end_dt = bounds
             history = stock.history(
@@ -131,40 +306,139 @@ def fetch_price_history(ticker, period, start_date=None, end_date=None):
                 end=end_dt + timedelta(minutes=1),
                 interval=bar_interval,
             )
-            history = _clip_to_rolling_period(history, period, now=end_dt)
+            history = _clip_to_rolling_period(history, fetch_period, now=end_dt)
         else:
-            history = stock.history(period=period, interval=bar_interval)
+            history = stock.history(period=fetch_period, interval=bar_interval)
     else:
-        bar_interval = _bar_interval_for_period(period)
-        history = stock.history(period=period, interval=bar_interval)
+        history = stock.history(period=fetch_period, interval=bar_interval)
 
     if history.empty:
         raise ValueError(f"No data found for ticker: {ticker}")
 
-    # For intraday periods, normalise timestamps before caching.
-    # Stocks  → convert to US/Eastern so "09:30" renders as 9:30 AM, not 2:30 PM UTC.
-    # Crypto  → strip tz only, keep UTC values; 24/7 markets are naturally UTC-based.
-    if period in ("1d", "5d"):
-        try:
-            if is_crypto:
-                if history.index.tz is not None:
-                    history.index = history.index.tz_localize(None)
+    _normalize_intraday_index(history, period, is_crypto)
+    bars = _clean_ohlcv(history)
+    _write_cache(bars, cache_path)
+
+    if intraday:
+        return _intraday_view(bars, period, is_crypto)
+    return bars
+
+
+# For intraday periods, normalise timestamps before caching.
+# Stocks  → convert to US/Eastern so "09:30" renders as 9:30 AM, not 2:30 PM UTC.
+# Crypto  → strip tz only, keep UTC values; 24/7 markets are naturally UTC-based.
+def _normalize_intraday_index(history, period, is_crypto):
+    if period not in ("1d", "5d"):
+        return
+    try:
+        if is_crypto:
+            if history.index.tz is not None:
+                history.index = history.index.tz_localize(None)
+        else:
+            if history.index.tz is not None:
+                history.index = history.index.tz_convert("America/New_York").tz_localize(None)
             else:
-                if history.index.tz is not None:
-                    history.index = history.index.tz_convert("America/New_York").tz_localize(None)
-                else:
-                    history.index = (
-                        history.index.tz_localize("UTC")
-                        .tz_convert("America/New_York")
-                        .tz_localize(None)
-                    )
+                history.index = (
+                    history.index.tz_localize("UTC")
+                    .tz_convert("America/New_York")
+                    .tz_localize(None)
+                )
+    except Exception:
+        pass  # fall back to whatever timezone the index already has
+
+
+# Fallback fetches (crypto, batch misses) run on the shared I/O pool under the
+# "analysis" budget; any still running after this long are reported as errors.
+SINGLE_FETCH_DEADLINE_SECONDS = 90
+
+
+# Fetch historical price data for many tickers at once.
+# Servable cache hits (fresh or stale-while-revalidate) are read from disk; the remaining stocks are downloaded in
+# ONE multi-symbol yfinance request and written to the same per-ticker cache
+# files fetch_price_history uses. Crypto (rolling 24/7 windows) and anything
+# the batch could not deliver go through fetch_price_history concurrently, so
+# a miss still surfaces the usual per-ticker error.
+# Returns ({ticker: price_data}, {ticker: error message}), keyed as passed in.
+def fetch_price_histories(tickers, period, start_date=None, end_date=None):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    results, errors = {}, {}
+    batch, single = {}, []
+
+    for ticker in dict.fromkeys(tickers):
+        yahoo_symbol = normalize_crypto_symbol(ticker)
+        is_crypto = is_crypto_symbol(yahoo_symbol)
+        cache_path = _get_cache_path(yahoo_symbol, period)
+        if is_crypto or _is_cache_servable(cache_path, period, is_crypto):
+            single.append(ticker)
+        else:
+            batch[yahoo_symbol] = ticker
+
+    if len(batch) > 1:
+        try:
+            downloaded = _download_batch(list(batch), period, start_date, end_date)
         except Exception:
-            pass  # fall back to whatever timezone the index already has
+            downloaded = {}  # the per-ticker path below reports the real errors
+        for yahoo_symbol, ticker in batch.items():
+            history = downloaded.get(yahoo_symbol)
+            if history is None:
+                single.append(ticker)
+                continue
+            _normalize_intraday_index(history, period, False)
+            try:
+                bars = _clean_ohlcv(history)
+            except ValueError:
+                single.append(ticker)
+                continue
+            _write_cache(bars, _get_cache_path(yahoo_symbol, period))
+            if _is_intraday(period):
+                bars = _intraday_view(bars, period)
+            results[ticker] = _close_view(bars)
+    else:
+        single.extend(batch.values())
+
+    def fetch_one(ticker):
+        return fetch_price_history(ticker, period, start_date, end_date)
+
+    for ticker, price_data, error in run_all("analysis", fetch_one, single,
+                                             timeout=SINGLE_FETCH_DEADLINE_SECONDS):
+        if error is None:
+            results[ticker] = price_data
+        else:
+            errors[ticker] = str(error)
+
+    ordered = [ticker for ticker in dict.fromkeys(tickers) if ticker in results]
+    return {ticker: results[ticker] for ticker in ordered}, errors
 
-    close_prices = _clean_close_prices(history)
-    close_prices.to_csv(cache_path)
 
-    return close_prices
+# One yf.download call for several stock symbols; returns {symbol: history}
+# for every symbol that came back with at least one bar.
+def _download_batch(symbols, period, start_date=None, end_date=None):
+    kwargs = {"group_by": "ticker", "auto_adjust": True, "threads": True, "progress": False,
+              "session": shared_session()}
+    if start_date and end_date:
+        exclusive_end = (
+            datetime.strptime(end_date, "%Y-%m-%d").date() + timedelta(days=1)
+        ).isoformat()
+        history = yf.download(symbols, start=start_date, end=exclusive_end,
+                              interval="1d", **kwargs)
+    elif _is_intraday(period):
+        history = yf.download(symbols, period=INTRADAY_BASE_PERIOD,
+                              interval=INTRADAY_BASE_INTERVAL, **kwargs)
+    else:
+        history = yf.download(symbols, period=period,
+                              interval=_bar_interval_for_period(period), **kwargs)
+
+    if history is None or history.empty or history.columns.nlevels < 2:
+        return {}
+    available = set(history.columns.get_level_values(0))
+    frames = {}
+    for symbol in symbols:
+        if symbol not in available:
+            continue
+        frame = history[symbol].dropna(how="all")
+        if not frame.empty and "Close" in frame.columns:
+            frames[symbol] = frame
+    return frames
 
 
 
@@ -0,0 +1,197 @@
+"""Size and age budgets for the files the app writes, enforced in the background.
+
+Price caches, charts, logos, reports and migrated history files were never
+deleted, so on a small instance volume they slowly filled the disk. Each
+category below has a directory, a file pattern and optional budgets:
+
+- max_age_days: files not used for this long are removed;
+- max_bytes: beyond this, the least recently used files go first.
+
+"Used" is the later of a file's access and modification times, so a cache
+file that is still being read survives even if it was written long ago.
+Files modified in the last MIN_IDLE_SECONDS are never size-evicted (a run may
+still be writing or serving them). Categories without budgets are measured
+only: the SQLite history and the JSON caches, which bound themselves.
+
+start_janitor() sweeps every SWEEP_INTERVAL_SECONDS on a daemon thread (set
+DISK_JANITOR=0 to disable). /api/disk-usage shows per-category usage and what
+a sweep would remove right now, without removing it; so does
+
+    python -m tools.disk_janitor            # dry run
+    python -m tools.disk_janitor --apply    # sweep now
+"""
+
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+MB = 1024 * 1024
+DAY = 24 * 60 * 60
+
+CATEGORIES = {
+    "price_cache":     {"path": Path("output") / "cache", "pattern": "*.csv",
+                        "max_bytes": 200 * MB, "max_age_days": 30},
+    "charts":          {"path": Path("output") / "charts", "pattern": "*.png",
+                        "max_bytes": 200 * MB, "max_age_days": 30},
+    "logos":           {"path": Path("output") / "logos", "pattern": "*.png",
+                        "max_bytes": 50 * MB, "max_age_days": 90},
+    "reports":         {"path": Path("reports") / "generated", "pattern": "*.txt",
+                        "max_bytes": 100 * MB, "max_age_days": 180},
+    "history_archive": {"path": Path("output") / "history" / "migrated", "pattern": "*.json",
+                        "max_bytes": 50 * MB, "max_age_days": 30},
+    "history_db":      {"path": Path("output") / "history", "pattern": "history.db*",
+                        "max_bytes": None, "max_age_days": None},
+    "json_caches":     {"path": Path("output"), "pattern": "*.json",
+                        "max_bytes": None, "max_age_days": None},
+}
+# Leftover temp files from interrupted atomic writes (".AAPL_1y.csv.123.456.tmp").
+TEMP_PATTERN = ".*.tmp"
+MIN_IDLE_SECONDS = 60 * 60
+SWEEP_INTERVAL_SECONDS = 6 * 60 * 60
+# The first sweep waits, so a restart (or a test importing app) doesn't scan at once.
+FIRST_SWEEP_DELAY_SECONDS = 10 * 60
+# Paths listed per category in a report.
+REPORT_PATH_LIMIT = 20
+
+_last_sweep = None
+_last_sweep_lock = threading.Lock()
+_thread = None
+
+
+def _scan(config):
+    """[(path, size, last_used, modified)] for the category's files."""
+    directory = config["path"]
+    if not directory.is_dir():
+        return []
+    files = []
+    for pattern in (config["pattern"], TEMP_PATTERN):
+        for path in directory.glob(pattern):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue      # removed since the glob
+            if path.is_file():
+                files.append((path, stat.st_size, max(stat.st_atime, stat.st_mtime), stat.st_mtime))
+    return files
+
+
+def _plan(config, files, now):
+    """The files to evict: expired ones, then LRU until under max_bytes."""
+    evict = []
+    keep = []
+    max_age = config["max_age_days"]
+    for entry in files:
+        path, _, last_used, modified = entry
+        is_temp = path.name.startswith(".") and path.name.endswith(".tmp")
+        if (max_age is not None and now - last_used > max_age * DAY) or \
+                (is_temp and now - modified > MIN_IDLE_SECONDS):
+            evict.append(entry)
+        else:
+            keep.append(entry)
+
+    max_bytes = config["max_bytes"]
+    if max_bytes is not None:
+        total = sum(size for _, size, _, _ in keep)
+        for entry in sorted(keep, key=lambda item: item[2]):
+            if total <= max_bytes:
+                break
+            if now - entry[3] < MIN_IDLE_SECONDS:
+                continue
+            evict.append(entry)
+            total -= entry[1]
+    return evict
+
+
+def sweep(dry_run=False, now=None, categories=None):
+    """Apply the budgets (or just report them) and return per-category usage.
+
+    {category: {"path", "files", "bytes", "max_bytes", "max_age_days",
+                "evicted_files", "evicted_bytes", "evicted": [first paths]}}
+    "files"/"bytes" are what remains after the sweep (or would remain).
+    """
+    now = time.time() if now is None else now
+    report = {}
+    for name, config in (categories or CATEGORIES).items():
+        files = _scan(config)
+        evict = _plan(config, files, now)
+        evicted_bytes = 0
+        evicted = []
+        for path, size, _, _ in evict:
+            if not dry_run:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as exc:
+                    logging.warning("Disk janitor could not remove %s: %s", path, exc)
+                    continue
+            evicted_bytes += size
+            evicted.append(path)
+        report[name] = {
+            "path": str(config["path"]),
+            "files": len(files) - len(evicted),
+            "bytes": sum(size for _, size, _, _ in files) - evicted_bytes,
+            "max_bytes": config["max_bytes"],
+            "max_age_days": config["max_age_days"],
+            "evicted_files": len(evicted),
+            "evicted_bytes": evicted_bytes,
+            "evicted": [str(path) for path in evicted[:REPORT_PATH_LIMIT]],
+        }
+    return report
+
+
+def usage_report():
+    """Current usage per category plus what a sweep would remove (dry run)."""
+    return {"dry_run": True, "categories": sweep(dry_run=True), "last_sweep": stats()}
+
+
+def _sweep_and_record():
+    started = time.time()
+    report = sweep()
+    freed = sum(category["evicted_bytes"] for category in report.values())
+    removed = sum(category["evicted_files"] for category in report.values())
+    if removed:
+        logging.info("Disk janitor removed %d files (%.1f MB)", removed, freed / MB)
+    global _last_sweep
+    with _last_sweep_lock:
+        _last_sweep = {
+            "at": started,
+            "removed_files": removed,
+            "freed_bytes": freed,
+            "bytes": {name: category["bytes"] for name, category in report.items()},
+        }
+
+
+def _run_forever():
+    time.sleep(FIRST_SWEEP_DELAY_SECONDS)
+    while True:
+        try:
+            _sweep_and_record()
+        except Exception:
+            logging.exception("Disk janitor sweep failed")
+        time.sleep(SWEEP_INTERVAL_SECONDS)
+
+
+def start_janitor():
+    """Start the background sweeper once per process."""
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_run_forever, name="disk-janitor", daemon=True)
+        _thread.start()
+    return _thread
+
+
+def stats():
+    """The last background sweep (for /api/stats), or None before the first."""
+    with _last_sweep_lock:
+        return dict(_last_sweep) if _last_sweep else None
+
+
+if __name__ == "__main__":
+    apply = "--apply" in sys.argv[1:]
+    for name, category in sweep(dry_run=not apply).items():
+        verb = "removed" if apply else "would remove"
+        print(f"{name:16} {category['files']:6} files {category['bytes'] / MB:9.1f} MB"
+              f"  ({verb} {category['evicted_files']} files, {category['evicted_bytes'] / MB:.1f} MB)")
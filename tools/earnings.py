@@ -1,6 +1,15 @@
 from datetime import date, datetime, timezone
 
-import yfinance as yf
+from tools.http_session import shared_session
+from tools.lazy_modules import lazy_module
+from tools.swr import SWRCache
+
+yf = lazy_module("yfinance")
+
+# Earnings data changes a few times a quarter: fresh for 12 hours, served
+# stale (while refreshing in the background) for up to a week.
+_cache = SWRCache("earnings", ttl=12 * 60 * 60, stale_ttl=7 * 24 * 60 * 60,
+                  cacheable=lambda snapshot: snapshot.get("available"))
 
 
 def _as_float(value):
@@ -366,7 +375,11 @@ def fetch_earnings_snapshot(ticker):
     Data availability varies by ticker and Yahoo Finance response shape.
     """
     symbol = ticker.upper()
-    ticker_client = yf.Ticker(symbol)
+    return _cache.get(symbol, lambda: _download_earnings_snapshot(symbol))
+
+
+def _download_earnings_snapshot(symbol):
+    ticker_client = yf.Ticker(symbol, session=shared_session())
 
     try:
         info = ticker_client.get_info() or {}
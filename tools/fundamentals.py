@@ -1,4 +1,13 @@
-import yfinance as yf
+from tools.http_session import shared_session
+from tools.lazy_modules import lazy_module
+from tools.swr import SWRCache
+
+yf = lazy_module("yfinance")
+
+# Company profile fields barely move day to day: fresh for a day, served
+# stale (while refreshing in the background) for up to a week.
+_cache = SWRCache("fundamentals", ttl=24 * 60 * 60, stale_ttl=7 * 24 * 60 * 60,
+                  cacheable=lambda payload: payload.get("available"))
 
 
 def _as_float(value):
@@ -35,9 +44,12 @@ def fetch_company_fundamentals(ticker):
     Missing fields are returned as None so callers can render N/A cleanly.
     """
     symbol = ticker.upper()
+    return _cache.get(symbol, lambda: _download_fundamentals(symbol))
+
 
+def _download_fundamentals(symbol):
     try:
-        info = yf.Ticker(symbol).get_info() or {}
+        info = yf.Ticker(symbol, session=shared_session()).get_info() or {}
     except Exception as exc:
         return {
             "ticker": symbol,
@@ -0,0 +1,220 @@
+"""One pooled, keep-alive HTTP session for every outbound call.
+
+yfinance keeps a process-wide singleton session, but `yf.download` installs
+a brand-new one on every call, and the logo / FMP / spark helpers used bare
+`urllib.request.urlopen`. So a single run kept paying for TCP + TLS
+handshakes and renegotiating Yahoo's cookie and crumb. Now every caller goes
+through shared_session():
+
+    yf.Ticker(symbol, session=shared_session())
+    data = fetch(url, timeout=8).content
+
+The session is curl_cffi's Chrome-impersonating one (what yfinance would
+build itself), falling back to `requests` without curl_cffi. curl_cffi keeps
+one handle per thread, and each handle caches up to POOL_CONNECTIONS
+connections. With `requests`, the adapter keeps POOL_MAXSIZE connections
+per host, enough for every shared I/O pool worker at once.
+
+Requests to Yahoo hosts first take a token from tools/rate_limit.py, and
+every request goes through tools/resilience.py's per-endpoint circuit
+breaker, retries and hedging.
+
+Every request is timed. With curl_cffi, that includes whether it opened a
+new connection and how long connecting (DNS + TCP + TLS) took before the
+read. Totals go to /api/stats via stats(). record_timings() collects one
+run's requests for the execution trace, following the run into the shared
+I/O pool's threads.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from tools import rate_limit, resilience
+from tools.io_executor import BUDGETS
+
+USER_AGENT = "Mozilla/5.0"
+# Distinct hosts kept warm per curl handle (Yahoo query1/query2/fc, FMP, favicons, ...).
+POOL_CONNECTIONS = 16
+# Connections kept per host with `requests`: one per shared I/O pool worker.
+POOL_MAXSIZE = sum(BUDGETS.values())
+
+_session = None
+_backend = None               # "curl_cffi" or "requests", once the session exists
+_session_lock = threading.Lock()
+_current_timings = contextvars.ContextVar("http_timings", default=None)
+
+
+class HttpTimings:
+    """Request / connection counters, either process-wide or for one run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.connect_ms = 0.0
+        self.read_ms = 0.0
+        self.hosts = set()
+
+    def add(self, host, new_connections, connect_ms, read_ms, failed):
+        with self._lock:
+            self.requests += 1
+            self.errors += int(failed)
+            self.hosts.add(host)
+            self.read_ms += read_ms
+            if new_connections is None:
+                return          # backend can't tell (requests)
+            if new_connections:
+                self.new_connections += new_connections
+                self.connect_ms += connect_ms
+            else:
+                self.reused_connections += 1
+
+    def snapshot(self):
+        with self._lock:
+            tracked = self.new_connections + self.reused_connections
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "hosts": len(self.hosts),
+                "new_connections": self.new_connections,
+                "reused_connections": self.reused_connections,
+                "reuse_rate": round(self.reused_connections / tracked, 4) if tracked else None,
+                "avg_connect_ms": (round(self.connect_ms / self.new_connections, 1)
+                                   if self.new_connections else None),
+                "avg_read_ms": round(self.read_ms / self.requests, 1) if self.requests else None,
+            }
+
+    def summary(self):
+        """One-line description for the execution trace."""
+        s = self.snapshot()
+        parts = [f"{s['requests']} requests to {s['hosts']} hosts"]
+        if s["new_connections"] or s["reused_connections"]:
+            parts.append(f"{s['new_connections']} new connections"
+                         + (f" (avg {s['avg_connect_ms']:.0f} ms connect)" if s["new_connections"] else ""))
+            parts.append(f"{s['reused_connections']} reused")
+        if s["avg_read_ms"] is not None:
+            parts.append(f"avg {s['avg_read_ms']:.0f} ms read")
+        if s["errors"]:
+            parts.append(f"{s['errors']} failed")
+        return " · ".join(parts)
+
+
+_totals = HttpTimings()
+
+
+def _observe(url, started, new_connections=None, connect_s=0.0, failed=False):
+    total_ms = (time.perf_counter() - started) * 1000
+    connect_ms = connect_s * 1000 if new_connections else 0.0
+    host = urlparse(url).hostname or ""
+    sample = (host, new_connections, connect_ms, max(0.0, total_ms - connect_ms), failed)
+    _totals.add(*sample)
+    run_timings = _current_timings.get()
+    if run_timings is not None:
+        run_timings.add(*sample)
+
+
+def _take_rate_token(url):
+    """Yahoo requests go through the process-wide limiter (may raise RateLimited)."""
+    if rate_limit.is_yahoo_host(urlparse(url).hostname):
+        rate_limit.acquire()
+
+
+def _build_curl_session():
+    from curl_cffi import requests as curl_requests
+    from curl_cffi.const import CurlInfo, CurlOpt
+
+    class TimedSession(curl_requests.Session):
+        def request(self, method, url, *args, **kwargs):
+            return resilience.call(method, url, lambda: self._attempt(method, url, *args, **kwargs))
+
+        def _attempt(self, method, url, *args, **kwargs):
+            _take_rate_token(url)
+            started = time.perf_counter()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except Exception:
+                _observe(url, started, failed=True)
+                raise
+            infos = response.infos
+            # Cumulative from the start of the request; TLS done = APPCONNECT.
+            connect_s = max(infos.get(CurlInfo.CONNECT_TIME) or 0.0,
+                            infos.get(CurlInfo.APPCONNECT_TIME) or 0.0)
+            _observe(url, started, int(infos.get(CurlInfo.NUM_CONNECTS) or 0), connect_s,
+                     failed=response.status_code >= 400)
+            return response
+
+    return TimedSession(
+        impersonate="chrome",
+        curl_infos=[CurlInfo.NUM_CONNECTS, CurlInfo.CONNECT_TIME, CurlInfo.APPCONNECT_TIME],
+        curl_options={CurlOpt.MAXCONNECTS: POOL_CONNECTIONS},
+    )
+
+
+def _build_requests_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    class TimedSession(requests.Session):
+        def request(self, method, url, *args, **kwargs):
+            return resilience.call(method, url, lambda: self._attempt(method, url, *args, **kwargs))
+
+        def _attempt(self, method, url, *args, **kwargs):
+            _take_rate_token(url)
+            started = time.perf_counter()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except Exception:
+                _observe(url, started, failed=True)
+                raise
+            _observe(url, started, failed=response.status_code >= 400)
+            return response
+
+    session = TimedSession()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def shared_session():
+    """The process-wide session, created on first use."""
+    global _session, _backend
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                try:
+                    _session, _backend = _build_curl_session(), "curl_cffi"
+                except ImportError:
+                    _session, _backend = _build_requests_session(), "requests"
+    return _session
+
+
+def fetch(url, timeout, **kwargs):
+    """GET through the shared session. Like urlopen, raises on HTTP errors."""
+    response = shared_session().get(url, timeout=timeout, **kwargs)
+    response.raise_for_status()
+    return response
+
+
+@contextmanager
+def record_timings():
+    """Collect the requests made inside the block (and its I/O pool tasks)."""
+    timings = HttpTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def stats():
+    """Process-wide request and connection-reuse counters (for /api/stats)."""
+    snapshot = _totals.snapshot()
+    snapshot["backend"] = _backend
+    return snapshot
@@ -2,14 +2,22 @@ from __future__ import annotations
 
 import json
 
-import pandas as pd
-import plotly.graph_objects as go
-from plotly.utils import PlotlyJSONEncoder
-
 from tools.crypto import is_crypto_symbol
+from tools.lazy_modules import lazy_module
+from tools.metrics import build_growth_frame
+
+pd = lazy_module("pandas")
+go = lazy_module("plotly.graph_objects")
+plotly_utils = lazy_module("plotly.utils")
 
 
-CHART_COLORS = ["#0EA5E9", "#F97316", "#7C3AED", "#10B981"]
+# The first four are the long-standing palette; the rest extend it so an N-way
+# comparison keeps distinct lines (cycled beyond that).
+CHART_COLORS = [
+    "#0EA5E9", "#F97316", "#7C3AED", "#10B981",
+    "#E11D48", "#CA8A04", "#0891B2", "#DB2777",
+    "#65A30D", "#4F46E5", "#EA580C", "#0D9488",
+]
 
 # Transparent paper/plot: charts render directly on the glass card behind them.
 _BG      = "rgba(0,0,0,0)"
@@ -27,7 +35,7 @@ def _close_series(price_data):
 
 
 def _figure_to_json(fig: go.Figure) -> str:
-    return json.dumps(fig, cls=PlotlyJSONEncoder)
+    return json.dumps(fig, cls=plotly_utils.PlotlyJSONEncoder)
 
 
 def _padded_x_range(*indexes, frac: float = 0.025):
@@ -173,33 +181,43 @@ def build_comparison_chart_json(
 ) -> str:
     if price_data_a is None or price_data_b is None:
         raise ValueError("Both price series are required for an interactive comparison chart.")
+    return build_growth_comparison_chart_json(
+        {ticker_a: price_data_a, ticker_b: price_data_b}, period
+    )
 
-    ticker_a = ticker_a.upper()
-    ticker_b = ticker_b.upper()
 
-    fig = go.Figure()
-    for i, (ticker, close_prices) in enumerate(
-        (
-            (ticker_a, _close_series(price_data_a)),
-            (ticker_b, _close_series(price_data_b)),
-        )
+def build_growth_comparison_chart_json(price_data_by_ticker, period: str) -> str:
+    """Growth-since-start (%) lines for any number of tickers on a common index."""
+    if len(price_data_by_ticker) < 2 or any(
+        price_data is None for price_data in price_data_by_ticker.values()
     ):
-        growth = (close_prices / close_prices.iloc[0] - 1) * 100
+        raise ValueError("At least two price series are required for an interactive comparison chart.")
+
+    price_data_by_ticker = {
+        ticker.upper(): price_data for ticker, price_data in price_data_by_ticker.items()
+    }
+    growth, close_frame = build_growth_frame(price_data_by_ticker)
+    tickers = list(growth.columns)
+
+    fig = go.Figure()
+    for i, ticker in enumerate(tickers):
         fig.add_trace(
             go.Scatter(
-                x=close_prices.index,
-                y=growth,
+                x=growth.index,
+                y=(growth[ticker] - 1) * 100,
                 mode="lines",
                 name=ticker,
-                line={"color": CHART_COLORS[i], "width": 2.2},
+                line={"color": CHART_COLORS[i % len(CHART_COLORS)],
+                      "width": 2.2 if len(tickers) <= 4 else 1.6},
                 hoverinfo="none",
-                customdata=close_prices,
+                customdata=close_frame[ticker],
             )
         )
 
     # Place the legend in its own band above the plot so it never collides with
-    # the x-axis date labels at the bottom. The extra top margin gives it room.
-    _apply_layout(fig, top_margin=40)
+    # the x-axis date labels at the bottom. The extra top margin gives it room
+    # (one more legend row for every ~8 tickers).
+    _apply_layout(fig, top_margin=40 + 22 * ((len(tickers) - 1) // 8))
     fig.update_layout(
         legend={
             "orientation": "h",
@@ -213,8 +231,8 @@ def build_comparison_chart_json(
         },
     )
     fig.update_yaxes(ticksuffix="%", tickformat=",.1f")
-    x_range = _padded_x_range(_close_series(price_data_a).index, _close_series(price_data_b).index)
+    x_range = _padded_x_range(growth.index)
     if x_range:
         fig.update_xaxes(range=x_range)
-    _apply_rangebreaks(fig, period, ticker_a, ticker_b)
+    _apply_rangebreaks(fig, period, *tickers)
     return _figure_to_json(fig)
@@ -0,0 +1,148 @@
+"""Process-wide thread pool for network fan-out, with named budgets.
+
+Quote polling, the ticker tape, and an analysis's per-ticker price fetches
+all fan out blocking yfinance calls. Each used to build its own
+ThreadPoolExecutor per request: hundreds of short-lived threads a minute
+under concurrent polling, no overall cap, and no deadline. Instead, they all
+share one long-lived pool, and each caller draws from a named budget:
+
+    for ticker, quote, error in run_all("tape", fetch_live_quote, tickers, timeout=8):
+        ...
+
+A budget caps how many of that caller's tasks run at once across every
+request, so a burst of tape polls can't take the threads an analysis needs.
+`timeout` is a deadline for the whole fan-out; tasks that haven't started or
+finished by then are reported as TimeoutError (a running task can't be
+interrupted, but it keeps its budget slot until it really ends, so the
+accounting stays honest).
+
+stats() reports per-budget saturation, and app.py adds how many of
+Gunicorn's request threads are busy, for /api/stats.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Concurrent tasks per budget. The pool is sized to their sum, so a task
+# admitted by its budget never queues behind another budget's work.
+BUDGETS = {
+    "quotes": 10,      # /api/quotes
+    "tape": 10,        # /api/tape-quotes
+    "watchlist": 10,   # watchlist poll quotes
+    "analysis": 8,     # per-ticker price fetches inside an analysis
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class _Budget:
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = capacity
+        self.slots = threading.BoundedSemaphore(capacity)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.peak_active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    def started(self):
+        with self.lock:
+            self.active += 1
+            self.submitted += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+    def finished(self, future):
+        with self.lock:
+            self.active -= 1
+            self.completed += 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+        self.slots.release()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "capacity": self.capacity,
+                "active": self.active,
+                "waiting": self.waiting,
+                "utilization": round(self.active / self.capacity, 3),
+                "peak_active": self.peak_active,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+            }
+
+
+_budgets = {name: _Budget(name, capacity) for name, capacity in BUDGETS.items()}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=sum(BUDGETS.values()),
+                                               thread_name_prefix="io")
+    return _executor
+
+
+def run_all(budget, fn, items, timeout):
+    """Run fn(item) for every item under `budget`, within `timeout` seconds.
+
+    Returns [(item, result, error)] in item order; error is the exception
+    raised (TimeoutError if the deadline passed first) or None.
+    """
+    items = list(items)
+    if not items:
+        return []
+    pool_budget = _budgets[budget]
+    executor = _get_executor()
+    deadline = time.monotonic() + timeout
+
+    futures = []
+    for item in items:
+        remaining = deadline - time.monotonic()
+        with pool_budget.lock:
+            pool_budget.waiting += 1
+        admitted = remaining > 0 and pool_budget.slots.acquire(timeout=remaining)
+        with pool_budget.lock:
+            pool_budget.waiting -= 1
+        if not admitted:
+            futures.append(None)
+            continue
+        pool_budget.started()
+        # The caller's context travels with the task (e.g. http_session run timings).
+        future = executor.submit(contextvars.copy_context().run, fn, item)
+        future.add_done_callback(pool_budget.finished)
+        futures.append(future)
+
+    wait([f for f in futures if f is not None],
+         timeout=max(0.0, deadline - time.monotonic()))
+
+    results = []
+    expired = 0
+    for item, future in zip(items, futures):
+        if future is None or not future.done():
+            expired += 1
+            results.append((item, None, TimeoutError(f"timed out after {timeout:g}s")))
+        elif future.exception() is not None:
+            results.append((item, None, future.exception()))
+        else:
+            results.append((item, future.result(), None))
+    if expired:
+        with pool_budget.lock:
+            pool_budget.timed_out += expired
+    return results
+
+
+def stats():
+    """Per-budget saturation counters."""
+    return {name: budget.snapshot() for name, budget in _budgets.items()}
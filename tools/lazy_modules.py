@@ -0,0 +1,68 @@
+"""Deferred imports for the app's heavy third-party libraries.
+
+pandas, NumPy, yfinance, Matplotlib, Plotly, and the OpenAI SDK together cost
+several seconds to import — on a t3.micro that delay lands on every Gunicorn
+worker boot, before the first request can be served. Modules bind those
+libraries through `lazy_module()` instead: the name behaves like the real
+module, but the import only happens on the first attribute access.
+
+Attributes are never cached on the proxy, so `unittest.mock.patch.object` on
+either the proxy or the real module behaves exactly as it did before.
+`preload()` imports everything up front (the boot-time warmup hook).
+"""
+
+import importlib
+import types
+
+# Imported lazily across the tool layer; preload() warms these by default.
+HEAVY_MODULES = (
+    "numpy",
+    "pandas",
+    "yfinance",
+    "matplotlib.pyplot",
+    "plotly.graph_objects",
+    "openai",
+)
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute use."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_target"]
+        if module is None:
+            # importlib's per-module locks make concurrent first use safe: one
+            # thread runs the import, the others wait for the finished module.
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_target"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_module(name):
+    """Return a proxy for `name` that defers the import until first use."""
+    return LazyModule(name)
+
+
+def preload(names=HEAVY_MODULES):
+    """Import the heavy libraries now; returns {name: error} for any failures."""
+    errors = {}
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except Exception as exc:  # a missing optional extra must not kill boot
+            errors[name] = str(exc)
+    return errors
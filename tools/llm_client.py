@@ -3,8 +3,6 @@ from __future__ import annotations
 import json
 import os
 
-from openai import OpenAI
-
 """
 Generates a structured AI summary of the analysis in `payload`.
 
@@ -93,6 +91,8 @@ def generate_llm_summary(payload, use_llm: bool = True):
         return None
 
     try:
+        from openai import OpenAI  # deferred: the SDK is slow to import
+
         client = OpenAI()
 
         # default=str keeps the request safe if a stray date or numpy scalar
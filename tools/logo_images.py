@@ -0,0 +1,139 @@
+"""Server-side logo images: one download, cached on disk, served same-origin.
+
+The browser used to fetch each logo straight from FMP / DuckDuckGo / Google
+and walk the fallback chain itself, one failed round trip at a time. Here the
+chain from `logo_candidates_for_ticker` is evaluated once on the server: the
+first candidate that decodes and isn't a blank placeholder is resized to the
+largest size the UI displays (2x for high-DPI screens) and written to
+output/logos/. app.py's /logo/<ticker> route serves that file with long-lived
+caching headers. The downloaded bytes also seed the brand-color cache, so
+the colour never costs a second download.
+
+Without Pillow nothing is cached: the downloaded bytes could be JPEG, SVG or
+ICO and can't be re-encoded, so fetch_logo_image returns None and the route
+redirects the browser to the remote logo instead.
+"""
+
+import importlib.util
+import io
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from tools.analyst import _image_is_blank, logo_candidates_for_ticker, remember_brand_color_from_logo
+from tools.http_session import fetch
+from tools.persistent_cache import PersistentCache
+
+LOGO_IMAGE_DIR = Path("output") / "logos"
+# .ticker-logo renders at 32 CSS px; 64 keeps it crisp on 2x displays.
+LOGO_IMAGE_SIZE = 64
+DOWNLOAD_TIMEOUT_SECONDS = 8
+# Tickers with no usable logo anywhere; retried after this long.
+MISS_TTL_SECONDS = 6 * 60 * 60
+
+_SAFE_SYMBOL = re.compile(r"^[A-Z0-9.\-^=]{1,20}$")
+_misses = PersistentCache(ttl=MISS_TTL_SECONDS, negative_ttl=MISS_TTL_SECONDS, max_entries=2000)
+_ticker_locks = {}            # symbol -> [lock, holders + waiters]
+_ticker_locks_guard = threading.Lock()
+
+
+def normalize_logo_symbol(ticker):
+    """Upper-cased symbol, or None if it isn't a plausible ticker (path-safe)."""
+    symbol = str(ticker or "").strip().upper()
+    return symbol if _SAFE_SYMBOL.match(symbol) else None
+
+
+def logo_image_path(symbol):
+    return LOGO_IMAGE_DIR / f"{symbol}.png"
+
+
+def _download(url):
+    try:
+        resp = fetch(url, timeout=DOWNLOAD_TIMEOUT_SECONDS)
+        return resp.content if resp.status_code == 200 else None
+    except Exception:
+        return None
+
+
+def _pillow_available():
+    return importlib.util.find_spec("PIL") is not None
+
+
+def _prepare_image(data):
+    """PNG bytes scaled to fit LOGO_IMAGE_SIZE, or None for blank/undecodable."""
+    from PIL import Image
+
+    try:
+        im = Image.open(io.BytesIO(data))
+        im.load()
+    except Exception:
+        return None
+    if _image_is_blank(data):
+        return None
+
+    im = im.convert("RGBA")
+    im.thumbnail((LOGO_IMAGE_SIZE, LOGO_IMAGE_SIZE), Image.LANCZOS)
+    out = io.BytesIO()
+    im.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _ticker_lock(symbol):
+    """Serialize one ticker's download. The lock is dropped once nobody holds
+    or waits on it, so the table only has entries for fetches in progress."""
+    with _ticker_locks_guard:
+        entry = _ticker_locks.setdefault(symbol, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _ticker_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _ticker_locks[symbol]
+
+
+def fetch_logo_image(ticker, allow_network=True):
+    """Path to the cached logo image for a ticker, downloading it if needed.
+
+    Returns None when no candidate yields a real logo (cached for a few
+    hours), with allow_network=False when it isn't on disk yet, and always
+    when Pillow isn't installed (see the module docstring).
+    """
+    symbol = normalize_logo_symbol(ticker)
+    if symbol is None or not _pillow_available():
+        return None
+    path = logo_image_path(symbol)
+    if path.exists():
+        return path
+    if not allow_network or symbol in _misses:
+        return None
+
+    # One download per ticker even when the page and the prefetcher race.
+    with _ticker_lock(symbol):
+        if path.exists():
+            return path
+        for url in logo_candidates_for_ticker(symbol, allow_network=True):
+            data = _download(url)
+            image = _prepare_image(data) if data else None
+            if image is None:
+                continue
+            try:
+                _write_atomic(path, image)
+            except OSError:
+                return None
+            remember_brand_color_from_logo(symbol, data)
+            return path
+        _misses.set(symbol, True)
+    return None
@@ -0,0 +1,174 @@
+"""NYSE session calendar, used to expire equity caches at the next possible bar.
+
+A fixed TTL re-downloads intraday bars at 9 pm or on a Sunday, when nothing
+can have changed. cache_expiry() instead asks: when could Yahoo next have a
+new bar? During a session that is the usual TTL (capped at the close plus a
+short settle period, so the final bars are picked up once). Outside a
+session it is the next session's open: overnight, over weekends and
+holidays, and after early closes. Crypto trades 24/7 and doesn't use this.
+
+Regular holidays and early closes are derived from the NYSE rules, so no
+network lookup or yearly update is needed. Unscheduled closures (days of
+mourning, weather) and any rule exceptions live in
+data/nyse_calendar_overrides.csv:
+
+    date,session,close,reason
+    2025-01-09,closed,,National Day of Mourning (President Carter)
+"""
+
+import csv
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+# Yahoo keeps amending the last bars for a few minutes after the bell.
+SETTLE_SECONDS = 20 * 60
+OVERRIDES_PATH = Path(__file__).resolve().parent.parent / "data" / "nyse_calendar_overrides.csv"
+
+MON, TUE, WED, THU, FRI, SAT, SUN = range(7)
+
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year, month, weekday):
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Saturday holidays close the Friday before, Sunday ones the Monday after."""
+    if day.weekday() == SAT:
+        return day - timedelta(days=1)
+    if day.weekday() == SUN:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=64)
+def _holidays(year):
+    holidays = {
+        _nth_weekday(year, 1, MON, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, MON, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _last_weekday(year, 5, MON): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, MON, 1): "Labor Day",
+        _nth_weekday(year, 11, THU, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    # NYSE doesn't observe New Year's Day on the preceding Friday (Dec 31).
+    if date(year, 1, 1).weekday() != SAT:
+        holidays[_observed(date(year, 1, 1))] = "New Year's Day"
+    if year >= 2022:
+        holidays[_observed(date(year, 6, 19))] = "Juneteenth"
+    return holidays
+
+
+@lru_cache(maxsize=64)
+def _early_closes(year):
+    closes = {_nth_weekday(year, 11, THU, 4) + timedelta(days=1): EARLY_CLOSE}
+    for day in (date(year, 7, 3), date(year, 12, 24)):
+        if day.weekday() <= THU:     # Friday the 3rd/24th is a holiday or a full day
+            closes[day] = EARLY_CLOSE
+    return closes
+
+
+@lru_cache(maxsize=1)
+def _overrides():
+    """{date: close time, or None when closed all day} from the overrides file."""
+    overrides = {}
+    try:
+        with open(OVERRIDES_PATH, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                day = date.fromisoformat(row["date"].strip())
+                if row["session"].strip().lower() == "closed":
+                    overrides[day] = None
+                else:
+                    overrides[day] = time.fromisoformat(row["close"].strip())
+    except (OSError, KeyError, ValueError):
+        pass
+    return overrides
+
+
+def session_bounds(day):
+    """(open, close) as New York datetimes for a trading day, else None."""
+    overrides = _overrides()
+    if day in overrides:
+        close = overrides[day]
+        if close is None:
+            return None
+    else:
+        if day.weekday() >= SAT or day in _holidays(day.year):
+            return None
+        close = _early_closes(day.year).get(day, REGULAR_CLOSE)
+    return (datetime.combine(day, REGULAR_OPEN, tzinfo=EXCHANGE_TZ),
+            datetime.combine(day, close, tzinfo=EXCHANGE_TZ))
+
+
+def is_trading_day(day):
+    return session_bounds(day) is not None
+
+
+def in_session(timestamp):
+    """Whether `timestamp` (epoch seconds) falls in a session or its settle period."""
+    moment = datetime.fromtimestamp(timestamp, EXCHANGE_TZ)
+    bounds = session_bounds(moment.date())
+    return bounds is not None and bounds[0] <= moment < bounds[1] + timedelta(seconds=SETTLE_SECONDS)
+
+
+def next_session_open(moment):
+    """The first session open strictly after `moment` (an aware datetime)."""
+    day = moment.astimezone(EXCHANGE_TZ).date()
+    for _ in range(15):          # longest closure on record is well under two weeks
+        bounds = session_bounds(day)
+        if bounds is not None and bounds[0] > moment:
+            return bounds[0]
+        day += timedelta(days=1)
+    return moment + timedelta(days=1)
+
+
+def last_trading_day(now=None):
+    """Today in New York if it is a trading day, else the most recent one."""
+    day = (now or datetime.now(EXCHANGE_TZ)).astimezone(EXCHANGE_TZ).date()
+    for _ in range(15):
+        if is_trading_day(day):
+            return day
+        day -= timedelta(days=1)
+    return day
+
+
+def cache_expiry(fetched_at, ttl):
+    """Epoch seconds after which equity data fetched at `fetched_at` may be out of date.
+
+    In a session (or its settle period): `ttl` later, but no later than the
+    close plus the settle period. Otherwise: the next session's open.
+    """
+    moment = datetime.fromtimestamp(fetched_at, EXCHANGE_TZ)
+    bounds = session_bounds(moment.date())
+    if bounds is not None:
+        settled = bounds[1] + timedelta(seconds=SETTLE_SECONDS)
+        if bounds[0] <= moment < settled:
+            return min(fetched_at + ttl, settled.timestamp())
+    return next_session_open(moment).timestamp()
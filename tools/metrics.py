@@ -1,7 +1,13 @@
 import math
-import pandas as pd
+import threading
+from collections import deque
 
-def _close_series(price_data):
+from tools.lazy_modules import lazy_module
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+def close_series(price_data):
     close = pd.to_numeric(price_data["Close"], errors="coerce").dropna()
     if close.empty:
         raise ValueError("Price data did not include valid numeric close prices.")
@@ -11,14 +17,14 @@ def _close_series(price_data):
 # price_data (pandas.DataFrame): DataFrame with a 'Close' column
 def compute_daily_returns(price_data):
     # Select the closing price, then compute percent change from previous row 
-    daily_returns = _close_series(price_data).pct_change()
+    daily_returns = close_series(price_data).pct_change()
     return daily_returns
 
 # Compute total return over the entire period.
 # price_data (pandas.DataFrame): DataFrame with a 'Close' column
 def compute_total_return(price_data):
     # First closing price
-    close = _close_series(price_data)
+    close = close_series(price_data)
     start_price = close.iloc[0]
     # Last closing price
     end_price = close.iloc[-1]
@@ -71,7 +77,7 @@ def compute_annualized_sharpe_ratio(daily_returns, risk_free_rate=0.0):
 # Measures the yearly compound growth rate over the period.
 # price_data (pandas.DataFrame): DataFrame with a 'Close' column and datetime index
 def compute_cagr(price_data):
-    close = _close_series(price_data)
+    close = close_series(price_data)
     start_price = close.iloc[0]
     end_price = close.iloc[-1]
 
@@ -95,7 +101,7 @@ def compute_cagr(price_data):
 # Finds the worst drop from a previous peak.
 # price_data (pandas.DataFrame): DataFrame with a 'Close' column
 def compute_max_drawdown(price_data):
-    close = _close_series(price_data)
+    close = close_series(price_data)
     running_max = close.cummax()
     drawdowns = (close - running_max) / running_max
     max_drawdown = drawdowns.min()
@@ -105,7 +111,7 @@ def compute_max_drawdown(price_data):
 # Returns the latest 20-day and 50-day moving averages
 # price_data (pandas.DataFrame): DataFrame with a 'Close' column
 def compute_moving_averages(price_data):
-    close = _close_series(price_data)
+    close = close_series(price_data)
     ma_20_series = close.rolling(window=20).mean()
     ma_50_series = close.rolling(window=50).mean()
 
@@ -120,34 +126,355 @@ def compute_moving_averages(price_data):
 
     return {"ma_20": ma_20, "ma_50": ma_50}
 
+TRADING_DAYS_PER_YEAR = 252
+MOVING_AVERAGE_WINDOWS = (20, 50)
+METRIC_KEYS = (
+    "total_return", "volatility", "sharpe_ratio",
+    "annualized_volatility", "annualized_sharpe_ratio",
+    "cagr", "max_drawdown", "ma_20", "ma_50",
+)
+
+
+def none_if_nan(value):
+    """float(value), or None for None, NaN and ±inf (not JSON-safe)."""
+    if value is None:
+        return None
+    value = float(value)
+    return None if math.isnan(value) or math.isinf(value) else value
+
+
+# Align many tickers' closes into one wide frame (one column per ticker) on
+# the union of their timestamps — the input compute_metrics_batch expects.
+# price_data_by_ticker (dict): {ticker: DataFrame with a 'Close' column}
+def build_close_frame(price_data_by_ticker):
+    columns = {}
+    for ticker, price_data in price_data_by_ticker.items():
+        try:
+            columns[ticker] = close_series(price_data)
+        except (KeyError, TypeError, ValueError):
+            continue  # one unusable ticker must not sink the whole batch
+    if not columns:
+        raise ValueError("No ticker had valid numeric close prices.")
+    return pd.concat(columns, axis=1, sort=True).sort_index()
+
+
+# Compute every metric for many tickers at once, in single NumPy passes.
+# close_frame (pandas.DataFrame): aligned closes, one column per ticker. Gaps
+# (NaN) are allowed — each column is measured over its own valid prices only,
+# exactly as if it had been passed to compute_all_metrics on its own.
+# Returns {ticker: metrics dict} with the same keys as compute_all_metrics.
+def compute_metrics_batch(close_frame, risk_free_rate=0.0):
+    try:
+        values = close_frame.to_numpy(dtype=float)
+    except (TypeError, ValueError):
+        values = close_frame.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    dates = pd.to_datetime(close_frame.index, errors="coerce", utc=True).tz_localize(None)
+    n_rows, n_cols = values.shape
+    if n_rows == 0:
+        return {ticker: dict.fromkeys(METRIC_KEYS) for ticker in close_frame.columns}
+
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+
+    # Pack each column's valid prices to the bottom, keeping their order, so
+    # every column becomes "NaN prefix + contiguous series" and the per-ticker
+    # statistics below reduce to plain axis-0 array operations.
+    order = np.argsort(valid, axis=0, kind="stable")
+    packed = np.take_along_axis(values, order, axis=0)
+    packed_dates = dates.to_numpy(dtype="datetime64[ns]")[order]
+
+    cols = np.arange(n_cols)
+    first_pos = np.minimum(n_rows - counts, n_rows - 1)
+    start_price, end_price = packed[first_pos, cols], packed[-1]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total_return = (end_price - start_price) / start_price
+
+        # Daily returns; NaN wherever the previous packed row is padding.
+        returns = packed[1:] / packed[:-1] - 1
+        return_counts = np.maximum(counts - 1, 0)
+        mean_return = np.nansum(returns, axis=0) / return_counts
+        squared_dev = np.nansum((returns - mean_return) ** 2, axis=0)
+        volatility = np.sqrt(squared_dev / (return_counts - 1))
+        volatility[return_counts < 2] = np.nan
+
+        annualized_volatility = volatility * math.sqrt(TRADING_DAYS_PER_YEAR)
+        sharpe = mean_return / volatility
+        annualized_sharpe = (
+            (mean_return - risk_free_rate / TRADING_DAYS_PER_YEAR) / volatility
+        ) * math.sqrt(TRADING_DAYS_PER_YEAR)
+
+        running_max = np.fmax.accumulate(packed, axis=0)
+        drawdowns = (packed - running_max) / running_max
+        max_drawdown = np.where(np.isnan(drawdowns), np.inf, drawdowns).min(axis=0)
+        max_drawdown[counts == 0] = np.nan
+
+        # CAGR over each ticker's own first → last valid timestamp.
+        num_days = (packed_dates[-1] - packed_dates[first_pos, cols]) // np.timedelta64(1, "D")
+        num_years = np.where(num_days > 0, num_days / 365.25, 1.0)
+        cagr = (end_price / start_price) ** (1 / num_years) - 1
+        cagr[~(num_days > 0)] = np.nan
+
+    # Trailing moving averages: the mean of each column's last `window` prices.
+    moving_averages = {}
+    for window in MOVING_AVERAGE_WINDOWS:
+        tail_mean = packed[-window:].mean(axis=0)
+        moving_averages[window] = np.where(counts >= window, tail_mean, np.nan)
+
+    results = {}
+    for col, ticker in enumerate(close_frame.columns):
+        if counts[col] == 0:
+            results[ticker] = dict.fromkeys(METRIC_KEYS)
+            continue
+        zero_vol = volatility[col] == 0
+        results[ticker] = {
+            "total_return": none_if_nan(total_return[col]),
+            "volatility": none_if_nan(volatility[col]),
+            "sharpe_ratio": None if zero_vol else none_if_nan(sharpe[col]),
+            "annualized_volatility": none_if_nan(annualized_volatility[col]),
+            "annualized_sharpe_ratio": None if zero_vol else none_if_nan(annualized_sharpe[col]),
+            "cagr": none_if_nan(cagr[col]),
+            "max_drawdown": none_if_nan(max_drawdown[col]),
+            "ma_20": none_if_nan(moving_averages[20][col]),
+            "ma_50": none_if_nan(moving_averages[50][col]),
+        }
+    return results
+
+
 # Compute all relevant metrics for a stock.
 # price_data (pandas.DataFrame): DataFrame with a 'Close' column
+# A thin wrapper over compute_metrics_batch: the close column is coerced once
+# and every statistic comes out of the same single pass.
 def compute_all_metrics(price_data):
-    daily_returns = compute_daily_returns(price_data)
-
-    total_return = compute_total_return(price_data)
-    volatility = compute_volatility(daily_returns)
-    sharpe_ratio = compute_sharpe_ratio(daily_returns)
-
-    annualized_volatility = compute_annualized_volatility(daily_returns)
-    annualized_sharpe_ratio = compute_annualized_sharpe_ratio(daily_returns)
-    cagr = compute_cagr(price_data)
-    max_drawdown = compute_max_drawdown(price_data)
-    moving_averages = compute_moving_averages(price_data)
-
-    metrics = {
-        "total_return": total_return,
-        "volatility": volatility,
-        "sharpe_ratio": sharpe_ratio,
-        "annualized_volatility": annualized_volatility,
-        "annualized_sharpe_ratio": annualized_sharpe_ratio,
-        "cagr": cagr,
-        "max_drawdown": max_drawdown,
-        "ma_20": moving_averages["ma_20"],
-        "ma_50": moving_averages["ma_50"],
-    }
+    close = close_series(price_data)
+    return compute_metrics_batch(close.to_frame("Close"))["Close"]
+
+# ── Incremental metrics ──
+# Re-running an analysis usually re-reads the same cached series, or the same
+# series plus a bar or two. IncrementalMetrics keeps the running state every
+# metric needs — first/last bar, return mean and sum of squared deviations
+# (Welford's update, the numerically stable form of running sums / sums of
+# squares), the running max and worst drawdown, and fixed-size buffers with
+# running sums for the moving averages — so each appended bar costs O(1) and
+# the results agree with compute_all_metrics to floating-point tolerance.
+# A series continues the state only if its first bar and the last closes held
+# in the moving-average buffers are unchanged — split/dividend adjustments
+# move the first bar, a corrected recent print moves the tail — so checking
+# costs O(longest window), not O(n). Anything else is rebuilt in one
+# vectorized numpy pass.
+class IncrementalMetrics:
+    # Re-sum a moving-average buffer from scratch after this many O(1)
+    # add/evict updates, so floating-point drift can never accumulate.
+    _RESUM_EVERY = 256
+
+    def __init__(self, windows=MOVING_AVERAGE_WINDOWS):
+        self.windows = tuple(windows)
+        self._reset()
+
+    def _reset(self):
+        self.count = 0
+        self.first_date = None
+        self.first_price = None
+        self.last_date = None
+        self.last_price = None
+        self.return_count = 0
+        self.return_mean = 0.0
+        self.return_m2 = 0.0
+        self.running_max = None
+        self.max_drawdown = None
+        self._buffers = {window: deque(maxlen=window) for window in self.windows}
+        self._sums = {window: 0.0 for window in self.windows}
+        self._updates_since_resum = 0
+
+    @staticmethod
+    def _as_timestamp(value):
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert("UTC").tz_localize(None)
+        return ts
+
+    def update(self, timestamp, price):
+        """Fold one new bar into the state in O(1)."""
+        price = float(price)
+        timestamp = self._as_timestamp(timestamp)
+
+        if self.count == 0:
+            self.first_date, self.first_price = timestamp, price
+            self.running_max, self.max_drawdown = price, 0.0
+        else:
+            daily_return = price / self.last_price - 1
+            self.return_count += 1
+            delta = daily_return - self.return_mean
+            self.return_mean += delta / self.return_count
+            self.return_m2 += delta * (daily_return - self.return_mean)
+
+            self.running_max = max(self.running_max, price)
+            drawdown = (price - self.running_max) / self.running_max
+            self.max_drawdown = min(self.max_drawdown, drawdown)
+
+        for window, buffer in self._buffers.items():
+            if len(buffer) == window:
+                self._sums[window] -= buffer[0]
+            buffer.append(price)
+            self._sums[window] += price
+        self._updates_since_resum += 1
+        if self._updates_since_resum >= self._RESUM_EVERY:
+            self._sums = {window: math.fsum(buffer) for window, buffer in self._buffers.items()}
+            self._updates_since_resum = 0
+
+        self.count += 1
+        self.last_date, self.last_price = timestamp, price
+        return self
+
+    def extend(self, close):
+        """Fold every bar of a close-price Series (in index order) into the state."""
+        if self.count == 0:
+            return self.rebuild(close)
+        for timestamp, price in zip(close.index, close.to_numpy(dtype=float)):
+            self.update(timestamp, price)
+        return self
+
+    def rebuild(self, close):
+        """Replace the state with one built from `close` in a single vectorized pass."""
+        self._reset()
+        values = close.to_numpy(dtype=float)
+        if not len(values):
+            return self
+
+        returns = values[1:] / values[:-1] - 1
+        peaks = np.maximum.accumulate(values)
+        self.count = len(values)
+        self.first_date, self.first_price = self._as_timestamp(close.index[0]), float(values[0])
+        self.last_date, self.last_price = self._as_timestamp(close.index[-1]), float(values[-1])
+        self.return_count = len(returns)
+        if len(returns):
+            self.return_mean = float(returns.mean())
+            self.return_m2 = float(np.square(returns - self.return_mean).sum())
+        self.running_max = float(peaks[-1])
+        self.max_drawdown = float(((values - peaks) / peaks).min())
+        for window, buffer in self._buffers.items():
+            buffer.extend(values[-window:].tolist())
+            self._sums[window] = math.fsum(buffer)
+        return self
+
+    def continues(self, close):
+        """True if `close` is the series this state was built from plus zero
+        or more appended bars: same first bar, and the same last closes as
+        the moving-average buffers hold, ending at the last known date."""
+        if self.count == 0 or len(close) < self.count:
+            return False
+        if (self._as_timestamp(close.index[0]) != self.first_date
+                or float(close.iloc[0]) != self.first_price
+                or self._as_timestamp(close.index[self.count - 1]) != self.last_date):
+            return False
+        tail = max(self._buffers.values(), key=len, default=())
+        known = close.iloc[self.count - len(tail):self.count].to_numpy(dtype=float)
+        return bool(np.array_equal(known, np.fromiter(tail, dtype=float, count=len(tail))))
+
+    def sync(self, close):
+        """Bring the state up to date with `close`: append only the new bars
+        when it continues the known series, otherwise rebuild it."""
+        if not self.continues(close):
+            return self.rebuild(close)
+        return self.extend(close.iloc[self.count:])
+
+    def metrics(self, risk_free_rate=0.0):
+        """The same metrics dict compute_all_metrics returns for the series."""
+        if self.count == 0:
+            return dict.fromkeys(METRIC_KEYS)
+
+        volatility = None
+        if self.return_count > 1:
+            volatility = math.sqrt(max(self.return_m2, 0.0) / (self.return_count - 1))
+        mean_return = self.return_mean if self.return_count else None
+
+        sharpe = annualized_sharpe = None
+        if volatility and mean_return is not None:
+            sharpe = mean_return / volatility
+            annualized_sharpe = (
+                (mean_return - risk_free_rate / TRADING_DAYS_PER_YEAR) / volatility
+            ) * math.sqrt(TRADING_DAYS_PER_YEAR)
+
+        cagr = None
+        num_days = (self.last_date - self.first_date).days
+        if num_days > 0:
+            cagr = (self.last_price / self.first_price) ** (1 / (num_days / 365.25)) - 1
+
+        moving_averages = {
+            window: (self._sums[window] / window if len(buffer) == window else None)
+            for window, buffer in self._buffers.items()
+        }
+
+        return {
+            "total_return": (self.last_price - self.first_price) / self.first_price,
+            "volatility": volatility,
+            "sharpe_ratio": sharpe,
+            "annualized_volatility": (
+                volatility * math.sqrt(TRADING_DAYS_PER_YEAR) if volatility is not None else None
+            ),
+            "annualized_sharpe_ratio": annualized_sharpe,
+            "cagr": cagr,
+            "max_drawdown": self.max_drawdown,
+            "ma_20": moving_averages.get(20),
+            "ma_50": moving_averages.get(50),
+        }
+
+    def to_dict(self):
+        """JSON-able snapshot of the state (see from_dict)."""
+        return {
+            "windows": list(self.windows),
+            "count": self.count,
+            "first_date": self.first_date.isoformat() if self.first_date is not None else None,
+            "first_price": self.first_price,
+            "last_date": self.last_date.isoformat() if self.last_date is not None else None,
+            "last_price": self.last_price,
+            "return_count": self.return_count,
+            "return_mean": self.return_mean,
+            "return_m2": self.return_m2,
+            "running_max": self.running_max,
+            "max_drawdown": self.max_drawdown,
+            "buffers": {str(window): list(buffer) for window, buffer in self._buffers.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(windows=data.get("windows") or MOVING_AVERAGE_WINDOWS)
+        for field in ("count", "first_price", "last_price", "return_count",
+                      "return_mean", "return_m2", "running_max", "max_drawdown"):
+            setattr(state, field, data.get(field, getattr(state, field)))
+        for field in ("first_date", "last_date"):
+            if data.get(field):
+                setattr(state, field, cls._as_timestamp(data[field]))
+        for window, values in (data.get("buffers") or {}).items():
+            window = int(window)
+            if window in state._buffers:
+                state._buffers[window].extend(float(value) for value in values)
+                state._sums[window] = math.fsum(state._buffers[window])
+        return state
+
+
+# Incremental states live in-process next to the data_fetch cache, keyed by
+# (ticker, period) — the same identity as the cached CSV. Bounded so a long
+# session analysing many symbols can't grow it without limit.
+_INCREMENTAL_STATES_MAX = 256
+_incremental_states = {}
+_incremental_lock = threading.Lock()
+
+
+# Compute all metrics, reusing the running state from the previous run of the
+# same series so only newly appended bars are processed.
+# price_data (pandas.DataFrame): DataFrame with a 'Close' column
+# state_key (hashable): identity of the series, e.g. (ticker, period)
+def compute_all_metrics_incremental(price_data, state_key):
+    close = close_series(price_data)
+    with _incremental_lock:
+        state = _incremental_states.pop(state_key, None) or IncrementalMetrics()
+        state.sync(close)
+        _incremental_states[state_key] = state   # re-insert as most recent
+        while len(_incremental_states) > _INCREMENTAL_STATES_MAX:
+            _incremental_states.pop(next(iter(_incremental_states)))
+        return state.metrics()
 
-    return metrics 
 
 # Compare metrics for two stocks and determine a winner.
 def compare_metrics(metrics_a, metrics_b, ticker_a, ticker_b):
@@ -193,3 +520,161 @@ def compare_metrics(metrics_a, metrics_b, ticker_a, ticker_b):
     comparison = {"winner": winner, "reason": reason, "metrics_compared": {ticker_a: metrics_a, ticker_b: metrics_b}}
 
     return comparison
+
+
+# ── N-way comparison ──
+# Analyses may cover up to this many tickers; the planner, the LLM tool layer
+# and the batched fetch all share the cap.
+MAX_COMPARISON_TICKERS = 20
+
+
+def _ranking_key(item):
+    # Tickers with a Sharpe ratio rank ahead of those without; within each
+    # group, higher Sharpe first, then higher total return. Missing values
+    # sort last.
+    ticker, metrics = item
+    sharpe = metrics.get("sharpe_ratio")
+    total_return = metrics.get("total_return")
+    return (
+        sharpe is None,
+        -sharpe if sharpe is not None else 0.0,
+        total_return is None,
+        -total_return if total_return is not None else 0.0,
+    )
+
+
+# Rank any number of tickers and determine a winner.
+# metrics_by_ticker (dict): {ticker: compute_all_metrics dict}, in request order
+# Returns the compare_metrics shape (winner, reason, metrics_compared) plus a
+# "ranking" list. Two tickers are judged by compare_metrics itself, so their
+# winner and reason are exactly what a two-way comparison reports.
+def rank_metrics(metrics_by_ticker):
+    items = [(ticker, metrics or {}) for ticker, metrics in metrics_by_ticker.items()]
+    if len(items) < 2:
+        raise ValueError("Ranking requires at least two tickers.")
+
+    ordered = sorted(items, key=_ranking_key)
+    ranking = [
+        {
+            "rank": position,
+            "ticker": ticker,
+            "sharpe_ratio": metrics.get("sharpe_ratio"),
+            "total_return": metrics.get("total_return"),
+            "volatility": metrics.get("volatility"),
+            "max_drawdown": metrics.get("max_drawdown"),
+        }
+        for position, (ticker, metrics) in enumerate(ordered, start=1)
+    ]
+
+    if len(items) == 2:
+        (ticker_a, metrics_a), (ticker_b, metrics_b) = items
+        comparison = compare_metrics(metrics_a, metrics_b, ticker_a, ticker_b)
+    else:
+        leader, runner_up = ranking[0], ranking[1]
+        if leader["sharpe_ratio"] is not None:
+            if leader["sharpe_ratio"] != runner_up["sharpe_ratio"]:
+                winner, reason = leader["ticker"], (
+                    f"Highest risk-adjusted return (Sharpe ratio) of {len(items)} tickers")
+            elif leader["total_return"] != runner_up["total_return"]:
+                winner, reason = leader["ticker"], "Higher total return among equal Sharpe ratios"
+            else:
+                winner, reason = "Tie", "Top tickers performed equally"
+        elif leader["total_return"] is not None and leader["total_return"] != runner_up["total_return"]:
+            winner, reason = leader["ticker"], "Highest total return (Sharpe ratio unavailable)"
+        else:
+            winner, reason = "Tie", "Sharpe ratio and total return unavailable or equal"
+        comparison = {"winner": winner, "reason": reason,
+                      "metrics_compared": dict(items)}
+
+    comparison["ranking"] = ranking
+    return comparison
+
+
+# Correlation of daily returns between every pair of tickers.
+# close_frame (pandas.DataFrame): aligned closes from build_close_frame
+# Each pair uses the timestamps where both tickers traded; a return spans a
+# ticker's own previous close, so an equity's Monday return still lines up
+# with a 24/7 crypto series. Returns {"tickers": [...], "matrix": [[...]]}
+# with None where a pair has too little overlap.
+def compute_correlation_matrix(close_frame):
+    tickers = list(close_frame.columns)
+    filled = close_frame.ffill()
+    returns = (filled / filled.shift(1) - 1).where(close_frame.notna())
+    matrix = returns.corr(min_periods=3).to_numpy(dtype=float)
+    return {
+        "tickers": tickers,
+        "matrix": [[none_if_nan(value) for value in row] for row in matrix],
+    }
+
+
+# Normalized growth for many tickers on one common index (start = 1.0).
+# price_data_by_ticker (dict): {ticker: DataFrame with a 'Close' column}
+# The series are aligned on the union of their timestamps, start together at
+# the first timestamp every ticker has a price for, and carry the last close
+# across another ticker's non-trading bars (e.g. weekends next to crypto).
+# Returns (growth_frame, close_frame), both restricted to that common window.
+def build_growth_frame(price_data_by_ticker):
+    close_frame = build_close_frame(price_data_by_ticker).ffill()
+    complete = close_frame.notna().all(axis=1).to_numpy()
+    if not complete.any():
+        raise ValueError("Price histories do not overlap; cannot align a comparison.")
+    close_frame = close_frame.iloc[int(complete.argmax()):]
+    return close_frame / close_frame.iloc[0], close_frame
+
+
+# ── Watchlist horizon scores ──
+# Trailing returns over calendar horizons (months back from the latest bar).
+HORIZON_RETURNS = (("return_1m", 1), ("return_3m", 3), ("return_1y", 12))
+HORIZON_SCORE_KEYS = (
+    "last_close", "return_1m", "return_3m", "return_1y",
+    "volatility", "sharpe_ratio", "max_drawdown",
+)
+# A horizon counts as covered if history starts within this many days of it
+# (a "1y" download begins on the first trading day after the anniversary).
+_HORIZON_SLACK_DAYS = 7
+
+
+# Score many tickers at once for the watchlist table, in single NumPy passes.
+# close_frame (pandas.DataFrame): aligned closes from build_close_frame
+# Volatility and Sharpe are annualized over the whole frame; max drawdown is
+# over the whole frame too. Each horizon return compares a ticker's latest
+# close with its close on the first bar at or after the horizon start.
+# Returns {ticker: {HORIZON_SCORE_KEYS...}} with None where data is missing.
+def compute_horizon_scores(close_frame):
+    tickers = list(close_frame.columns)
+    if close_frame.empty:
+        return {ticker: dict.fromkeys(HORIZON_SCORE_KEYS) for ticker in tickers}
+
+    dates = pd.DatetimeIndex(close_frame.index)
+    filled = close_frame.ffill()
+    values = filled.to_numpy(dtype=float)
+    last = values[-1]
+
+    columns = {"last_close": last}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for key, months in HORIZON_RETURNS:
+            start = dates[-1] - pd.DateOffset(months=months)
+            if dates[0] > start + pd.Timedelta(days=_HORIZON_SLACK_DAYS):
+                columns[key] = np.full(len(tickers), np.nan)
+                continue
+            columns[key] = last / values[dates.searchsorted(start, side="left")] - 1
+
+        # A return spans each ticker's own previous close (see
+        # compute_correlation_matrix), so weekend gaps don't break the series.
+        returns = (filled / filled.shift(1) - 1).where(close_frame.notna()).to_numpy(dtype=float)
+        counts = (~np.isnan(returns)).sum(axis=0)
+        mean = np.nansum(returns, axis=0) / counts
+        std = np.sqrt(np.nansum((returns - mean) ** 2, axis=0) / (counts - 1))
+        std[counts < 2] = np.nan
+        columns["volatility"] = std * math.sqrt(TRADING_DAYS_PER_YEAR)
+        columns["sharpe_ratio"] = np.where(std > 0, mean / std, np.nan) * math.sqrt(TRADING_DAYS_PER_YEAR)
+
+        running_max = np.fmax.accumulate(values, axis=0)
+        drawdowns = (values - running_max) / running_max
+        columns["max_drawdown"] = np.where(np.isnan(drawdowns), np.inf, drawdowns).min(axis=0)
+        columns["max_drawdown"][np.isinf(columns["max_drawdown"])] = np.nan
+
+    return {
+        ticker: {key: none_if_nan(columns[key][col]) for key in HORIZON_SCORE_KEYS}
+        for col, ticker in enumerate(tickers)
+    }
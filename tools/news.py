@@ -2,8 +2,12 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-import yfinance as yf
 from tools.crypto import normalize_crypto_symbol
+from tools.http_session import shared_session
+from tools.lazy_modules import lazy_module
+from tools.swr import SWRCache
+
+yf = lazy_module("yfinance")
 
 
 def _extract_news_item(raw_item):
@@ -48,11 +52,19 @@ def _extract_news_item(raw_item):
     }
 
 
+# Headlines: fresh for 15 minutes, served stale (while refreshing in the
+# background) for up to 6 hours. Empty results aren't cached.
+_cache = SWRCache("news", ttl=15 * 60, stale_ttl=6 * 60 * 60)
+
+
 def fetch_stock_news(ticker, limit=3):
     symbol = normalize_crypto_symbol(ticker)
+    return _cache.get(f"{symbol}:{limit}", lambda: _download_news(symbol, limit), symbol=symbol)
+
 
+def _download_news(symbol, limit):
     try:
-        raw_news = yf.Ticker(symbol).news or []
+        raw_news = yf.Ticker(symbol, session=shared_session()).news or []
     except Exception:
         return []
 
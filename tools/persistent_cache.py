@@ -0,0 +1,208 @@
+"""Thread-safe key/value cache persisted to a JSON file.
+
+Backs the small "resolve once, remember" caches (logo domains, FMP logo
+verdicts, brand colours) and, memory-only, the symbol-search cache. Compared
+with rewriting the whole file on every miss:
+
+- reads and writes are guarded by one lock, and the file is loaded lazily
+  on first use;
+- writes are coalesced: a set() marks the cache dirty and schedules a single
+  flush `flush_delay` seconds later, so a burst of misses costs one write;
+- flushes write a temp file and os.replace() it, so a crash mid-write can
+  never leave a truncated JSON file behind;
+- "negative" values (a cached miss) expire after `negative_ttl`, positive
+  ones after `ttl` (None = never);
+- at most `max_entries` are kept: expired entries go first, then the least
+  recently used;
+- hit/miss counters are available through stats().
+
+Files written by the old plain {key: value} caches are read transparently.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+
+# Sentinel for get(): distinguishes "not cached" from a cached falsy value.
+MISSING = object()
+
+_live_caches = weakref.WeakSet()
+
+
+def _default_is_negative(value):
+    return value in ("", None, False)
+
+
+class PersistentCache:
+    def __init__(self, path=None, ttl=None, negative_ttl=None, max_entries=None,
+                 flush_delay=2.0, is_negative=_default_is_negative):
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.flush_delay = flush_delay
+        self.is_negative = is_negative
+
+        self._entries = None          # key -> (value, stored_at); least recently used first
+        self._lock = threading.RLock()
+        # Serializes snapshot + write + rename, so concurrent flushes (the
+        # debounce timer vs. an explicit or atexit flush) can't interleave or
+        # let an older snapshot replace a newer one.
+        self._write_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._timer = None
+        _live_caches.add(self)
+
+    # ── reads ────────────────────────────────────────────────────────────
+    def get(self, key, default=MISSING):
+        """Cached value for key, or `default` if absent or expired."""
+        with self._lock:
+            value = self.peek(key)
+            if value is MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries[key] = self._entries.pop(key)   # most recently used
+            return value
+
+    def peek(self, key):
+        """Like get(), but without touching recency or the hit/miss counters."""
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None:
+                return MISSING
+            value, stored_at = entry
+            if self._expired(value, stored_at, time.time()):
+                del self._entries[key]
+                self._dirty = True
+                return MISSING
+            return value
+
+    def __contains__(self, key):
+        return self.peek(key) is not MISSING
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._load()),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+    # ── writes ───────────────────────────────────────────────────────────
+    def set(self, key, value):
+        with self._lock:
+            entries = self._load()
+            entries.pop(key, None)
+            now = time.time()
+            entries[key] = (value, now)
+            if self.max_entries is not None and len(entries) > self.max_entries:
+                self._evict(now)
+            flush_now = self._mark_dirty()
+        if flush_now:
+            self.flush()   # outside _lock: flush takes _write_lock first
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            flush_now = self._mark_dirty()
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        """Write pending changes now (atomic temp-file + rename)."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty or self.path is None or self._entries is None:
+                    self._dirty = False
+                    return
+                payload = {
+                    "entries": {
+                        key: {"value": value, "stored_at": stored_at}
+                        for key, (value, stored_at) in self._entries.items()
+                    }
+                }
+                self._dirty = False
+
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(
+                    f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, separators=(",", ":"), default=str)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                with self._lock:
+                    self._dirty = True   # keep the changes; the next flush retries
+
+    # ── internals ────────────────────────────────────────────────────────
+    def _load(self):
+        if self._entries is None:
+            self._entries = self._read_file()
+        return self._entries
+
+    def _read_file(self):
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            loaded_at = self.path.stat().st_mtime
+        except Exception:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+
+        if isinstance(data.get("entries"), dict):
+            entries = {}
+            for key, entry in data["entries"].items():
+                if isinstance(entry, dict) and "value" in entry:
+                    entries[key] = (entry["value"], float(entry.get("stored_at") or loaded_at))
+            return dict(sorted(entries.items(), key=lambda item: item[1][1]))
+        # Legacy {key: value} file: date every entry by the file's mtime.
+        return {key: (value, loaded_at) for key, value in data.items()}
+
+    def _evict(self, now):
+        entries = self._entries
+        for key in [k for k, (v, t) in entries.items() if self._expired(v, t, now)]:
+            del entries[key]
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
+
+    def _expired(self, value, stored_at, now):
+        ttl = self.negative_ttl if self.is_negative(value) else self.ttl
+        return ttl is not None and now - stored_at >= ttl
+
+    def _mark_dirty(self):
+        """Flag pending changes; True if the caller should flush right away."""
+        self._dirty = True
+        if self.path is None or self._timer is not None:
+            return False
+        if self.flush_delay <= 0:
+            return True
+        self._timer = threading.Timer(self.flush_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+        return False
+
+
+@atexit.register
+def _flush_all():
+    for cache in list(_live_caches):
+        cache.flush()
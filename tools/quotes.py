@@ -0,0 +1,96 @@
+"""Batch last-price / previous-close lookups for many symbols at once.
+
+A per-symbol `yf.Ticker(...).fast_info` read (plus the `get_info()` fallback
+when a field is missing) costs one or more HTTP calls per symbol, so a
+60-symbol tape refresh was 60+ calls. Yahoo's spark endpoint returns the
+intraday closes and previous close for up to SPARK_BATCH_SIZE symbols per
+request. The chunks run in parallel on the shared I/O pool under the
+caller's budget. Symbols missing from the response are left out of the result,
+so callers can fall back to the per-symbol path for just those.
+"""
+
+import math
+
+from tools.http_session import fetch
+from tools.io_executor import run_all
+
+SPARK_URL = "https://query1.finance.yahoo.com/v8/finance/spark"
+SPARK_BATCH_SIZE = 20
+SPARK_TIMEOUT_SECONDS = 5
+
+
+def _finite(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) or math.isinf(number) else number
+
+
+def _last_finite(values):
+    for value in reversed(values or []):
+        number = _finite(value)
+        if number is not None:
+            return number
+    return None
+
+
+def _parse_spark(payload):
+    """{symbol: {"price", "previous_close"}} from either spark response shape."""
+    prices = {}
+    if not isinstance(payload, dict):
+        return prices
+
+    # Older shape: {"spark": {"result": [{"symbol", "response": [chart]}]}}
+    if isinstance(payload.get("spark"), dict):
+        for result in payload["spark"].get("result") or []:
+            symbol = str(result.get("symbol") or "").upper()
+            charts = result.get("response") or []
+            if not symbol or not charts:
+                continue
+            meta = charts[0].get("meta") or {}
+            quote = ((charts[0].get("indicators") or {}).get("quote") or [{}])[0]
+            prices[symbol] = {
+                "price": _finite(meta.get("regularMarketPrice")) or _last_finite(quote.get("close")),
+                "previous_close": _finite(meta.get("previousClose"))
+                or _finite(meta.get("chartPreviousClose")),
+            }
+        return prices
+
+    # Current shape: {"AAPL": {"symbol", "close": [...], "previousClose", "chartPreviousClose"}}
+    for key, series in payload.items():
+        if not isinstance(series, dict):
+            continue
+        symbol = str(series.get("symbol") or key).upper()
+        prices[symbol] = {
+            "price": _last_finite(series.get("close")),
+            "previous_close": _finite(series.get("previousClose"))
+            or _finite(series.get("chartPreviousClose")),
+        }
+    return prices
+
+
+def _fetch_spark_chunk(symbols):
+    params = {"symbols": ",".join(symbols), "range": "1d", "interval": "5m"}
+    return _parse_spark(fetch(SPARK_URL, timeout=SPARK_TIMEOUT_SECONDS, params=params).json())
+
+
+def fetch_batch_prices(symbols, budget="quotes"):
+    """Last price and previous close for Yahoo symbols, a few requests total.
+
+    Returns {symbol: {"price": float, "previous_close": float | None}} for the
+    symbols the batch answered with a price; failed chunks are simply absent.
+    """
+    symbols = list(dict.fromkeys(str(s).strip().upper() for s in symbols if str(s).strip()))
+    chunks = [symbols[i:i + SPARK_BATCH_SIZE] for i in range(0, len(symbols), SPARK_BATCH_SIZE)]
+
+    prices = {}
+    for _, chunk_prices, error in run_all(budget, _fetch_spark_chunk, chunks,
+                                          timeout=SPARK_TIMEOUT_SECONDS + 1):
+        if error is None:
+            prices.update(chunk_prices)
+    return {
+        symbol: prices[symbol]
+        for symbol in symbols
+        if symbol in prices and prices[symbol]["price"] is not None
+    }
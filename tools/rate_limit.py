@@ -0,0 +1,166 @@
+"""Process-wide token bucket for Yahoo Finance calls, with priorities.
+
+Quote polling, the ticker tape, typeahead, background warmers and analysis
+runs all hit Yahoo. When they did so independently, a burst got the process
+throttled, and the throttling surfaced as "No data found" errors. Every
+request to a Yahoo host now takes a token first. tools/http_session.py does
+this for yfinance and the spark quote endpoint alike.
+
+Callers tag their work with a priority:
+
+    with rate_limit.priority("typeahead"):
+        search_symbols(query)
+
+It follows the work into the shared I/O pool via contextvars. When tokens
+run short, the lower priorities go without first:
+
+- each priority may only spend tokens down to a reserve kept for the ones
+  above it;
+- it never takes a token while a higher priority is waiting;
+- it waits at most `max_wait` seconds, and no more than `max_queued` of its
+  calls wait at once.
+
+A call that can't get a token in time is shed: it raises RateLimited
+instead of reaching Yahoo. stats() counts throttled calls (waited for a
+token) and deferred calls (shed) per priority, served by /api/stats.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Sustained Yahoo requests per second, and how many may go out back to back.
+RATE_PER_SECOND = float(os.getenv("YAHOO_RATE_PER_SECOND", "8"))
+BURST = int(os.getenv("YAHOO_BURST", "20"))
+
+# Highest first. reserve: share of BURST left for the priorities above.
+PRIORITIES = {
+    "analysis":   {"reserve": 0.0,  "max_wait": 30.0, "max_queued": None},
+    "quotes":     {"reserve": 0.1,  "max_wait": 4.0,  "max_queued": 32},
+    "typeahead":  {"reserve": 0.25, "max_wait": 1.0,  "max_queued": 4},
+    "background": {"reserve": 0.5,  "max_wait": 15.0, "max_queued": 4},
+}
+DEFAULT_PRIORITY = "quotes"
+
+_current_priority = contextvars.ContextVar("yahoo_priority", default=DEFAULT_PRIORITY)
+
+
+class RateLimited(Exception):
+    """A Yahoo call was shed by the limiter instead of being sent."""
+
+    def __init__(self, priority):
+        super().__init__(f"Yahoo rate limit: {priority} call deferred")
+        self.priority = priority
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, priorities=PRIORITIES, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.priorities = priorities
+        self._rank = {name: rank for rank, name in enumerate(priorities)}
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._cond = threading.Condition()
+        self._waiting = {name: 0 for name in priorities}
+        self._counters = {name: {"admitted": 0, "throttled": 0, "deferred": 0, "wait_ms": 0.0}
+                          for name in priorities}
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _higher_waiting(self, priority):
+        rank = self._rank[priority]
+        return any(count for name, count in self._waiting.items() if self._rank[name] < rank)
+
+    def acquire(self, priority):
+        """Take a token for `priority`, waiting if needed; raises RateLimited."""
+        config = self.priorities[priority]
+        floor = config["reserve"] * self.burst
+        counters = self._counters[priority]
+        started = self._clock()
+        deadline = started + config["max_wait"]
+
+        with self._cond:
+            self._refill(started)
+            if self._tokens - 1 >= floor and not self._higher_waiting(priority):
+                self._tokens -= 1
+                counters["admitted"] += 1
+                return 0.0
+
+            if config["max_queued"] is not None and self._waiting[priority] >= config["max_queued"]:
+                counters["deferred"] += 1
+                raise RateLimited(priority)
+
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = self._clock()
+                    self._refill(now)
+                    if self._tokens - 1 >= floor and not self._higher_waiting(priority):
+                        self._tokens -= 1
+                        waited = now - started
+                        counters["admitted"] += 1
+                        counters["throttled"] += 1
+                        counters["wait_ms"] += waited * 1000
+                        return waited
+                    if now >= deadline:
+                        counters["deferred"] += 1
+                        raise RateLimited(priority)
+                    shortfall = max(0.0, floor + 1 - self._tokens) / self.rate
+                    self._cond.wait(min(deadline - now, max(shortfall, 0.005)))
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            self._refill(self._clock())
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "tokens": round(self._tokens, 2),
+                "priorities": {
+                    name: {
+                        "admitted": c["admitted"],
+                        "throttled": c["throttled"],
+                        "deferred": c["deferred"],
+                        "waiting": self._waiting[name],
+                        "avg_wait_ms": round(c["wait_ms"] / c["throttled"], 1) if c["throttled"] else None,
+                    }
+                    for name, c in self._counters.items()
+                },
+            }
+
+
+_bucket = TokenBucket(RATE_PER_SECOND, BURST)
+
+
+def is_yahoo_host(host):
+    host = (host or "").lower()
+    return host == "yahoo.com" or host.endswith(".yahoo.com")
+
+
+@contextmanager
+def priority(name):
+    """Run the block's Yahoo calls (and its I/O pool tasks) at `name` priority."""
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {name}")
+    token = _current_priority.set(name)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def acquire():
+    """Take a token at the current priority; raises RateLimited if shed."""
+    return _bucket.acquire(_current_priority.get())
+
+
+def stats():
+    return _bucket.stats()
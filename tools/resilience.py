@@ -0,0 +1,318 @@
+"""Circuit breakers, jittered retries and hedged requests for upstream calls.
+
+When Yahoo (or FMP, or a favicon host) was slow, every call waited out its
+full timeout, one after another, and a degraded run could outlast
+Gunicorn's 120 s worker timeout. Every request made through the shared HTTP
+session (tools/http_session.py) now goes through call(), which tracks each
+endpoint: a host plus its path prefix, so query2's chart and quoteSummary
+are judged separately.
+
+- Circuit breaker: FAILURE_THRESHOLD consecutive failures open the circuit.
+  Failures are network errors, timeouts, 429s and 5xx. While it is open,
+  calls to that endpoint fail fast with CircuitOpen instead of waiting on a
+  timeout. After OPEN_SECONDS one probe is let through; it closes the
+  circuit, or reopens it for twice as long (up to MAX_OPEN_SECONDS).
+- Retries: connection errors and 5xx on GET/HEAD are retried up to
+  MAX_RETRIES times with full-jitter exponential backoff. Timeouts and 429s
+  are not retried, since that would only stack more waiting on a struggling
+  upstream.
+- Hedging: once an endpoint has HEDGE_MIN_SAMPLES latencies, a GET still
+  running after its p95 gets a duplicate. The duplicate runs at the rate
+  limiter's background priority, so it is shed first under load, and the
+  first good answer wins. Set HTTP_HEDGING=0 to turn this off.
+
+record_events() collects one run's trips, fast failures, retries and hedges
+for the execution trace, and stats() serves every endpoint's state under
+/api/stats.
+"""
+
+import contextvars
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from tools import rate_limit
+
+FAILURE_THRESHOLD = 5
+OPEN_SECONDS = 30
+MAX_OPEN_SECONDS = 300
+MAX_RETRIES = 2
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_CAP_SECONDS = 2.0
+HEDGING_ENABLED = os.getenv("HTTP_HEDGING", "1") != "0"
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY_SECONDS = 0.2
+HEDGE_WORKERS = 64
+
+_RETRYABLE_METHODS = {"GET", "HEAD"}
+# Leading path segments that name an API rather than a symbol or file.
+_ENDPOINT_SEGMENT = re.compile(r"^[a-z][A-Za-z0-9_-]*$")
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+_hedge_executor = None
+_hedge_lock = threading.Lock()
+_current_events = contextvars.ContextVar("upstream_events", default=None)
+
+
+class CircuitOpen(Exception):
+    """The endpoint's circuit is open; the call failed fast without a request."""
+
+    def __init__(self, endpoint, retry_in):
+        super().__init__(f"{endpoint} is failing; circuit open, retry in {retry_in:.0f}s")
+        self.endpoint = endpoint
+
+
+def endpoint_for(url):
+    parsed = urlparse(url)
+    segments = []
+    for segment in parsed.path.split("/"):
+        if not segment:
+            continue
+        if not _ENDPOINT_SEGMENT.match(segment) or len(segments) == 3:
+            break
+        segments.append(segment)
+    return "/".join([parsed.hostname or "", *segments])
+
+
+class UpstreamEvents:
+    """Breaker trips and retry/hedge counts, process-wide or for one run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.trips = []            # endpoints whose circuit opened
+        self.fast_failures = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def add(self, field, value=1):
+        with self._lock:
+            if field == "trips":
+                if value not in self.trips:
+                    self.trips.append(value)
+            else:
+                setattr(self, field, getattr(self, field) + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {"trips": list(self.trips), "fast_failures": self.fast_failures,
+                    "retries": self.retries, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+    @property
+    def degraded(self):
+        return bool(self.trips or self.fast_failures)
+
+    def summary(self):
+        """One-line description for the execution trace."""
+        s = self.snapshot()
+        parts = []
+        if s["trips"]:
+            parts.append("circuit opened for " + ", ".join(s["trips"]))
+        if s["fast_failures"]:
+            parts.append(f"{s['fast_failures']} calls failed fast")
+        if s["retries"]:
+            parts.append(f"{s['retries']} retries")
+        if s["hedges"]:
+            parts.append(f"{s['hedges']} hedged ({s['hedge_wins']} won)")
+        return " · ".join(parts)
+
+
+_totals = UpstreamEvents()
+
+
+def _note(field, value=1):
+    _totals.add(field, value)
+    run_events = _current_events.get()
+    if run_events is not None:
+        run_events.add(field, value)
+
+
+@contextmanager
+def record_events():
+    """Collect the upstream events of the calls made inside the block."""
+    events = UpstreamEvents()
+    token = _current_events.set(events)
+    try:
+        yield events
+    finally:
+        _current_events.reset(token)
+
+
+class _Breaker:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.open_until = 0.0
+        self.open_seconds = OPEN_SECONDS
+        self.probing = False
+        self.trips = 0
+        self.latencies = deque(maxlen=200)
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go out now. True if this call
+        is the half-open probe."""
+        with self.lock:
+            now = time.monotonic()
+            if self.failures < FAILURE_THRESHOLD:
+                return False
+            if now < self.open_until or self.probing:
+                raise CircuitOpen(self.endpoint, max(0.0, self.open_until - now))
+            self.probing = True     # half-open: this call is the probe
+            return True
+
+    def release_probe(self):
+        """The call never reached the endpoint; let the next one probe instead."""
+        with self.lock:
+            self.probing = False
+
+    def succeeded(self, seconds):
+        with self.lock:
+            self.failures = 0
+            self.probing = False
+            self.open_seconds = OPEN_SECONDS
+            self.latencies.append(seconds)
+
+    def failed(self):
+        with self.lock:
+            was_probe = self.probing
+            self.probing = False
+            self.failures += 1
+            if self.failures < FAILURE_THRESHOLD:
+                return False
+            if was_probe:
+                self.open_seconds = min(MAX_OPEN_SECONDS, self.open_seconds * 2)
+            elif self.failures > FAILURE_THRESHOLD:
+                return False    # already open (a call that started before the trip)
+            self.open_until = time.monotonic() + self.open_seconds
+            self.trips += 1
+            return True
+
+    def hedge_delay(self):
+        with self.lock:
+            if len(self.latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return max(HEDGE_MIN_DELAY_SECONDS, ordered[int(len(ordered) * 0.95) - 1])
+
+    def snapshot(self):
+        with self.lock:
+            open_for = max(0.0, self.open_until - time.monotonic())
+            state = ("closed" if self.failures < FAILURE_THRESHOLD
+                     else "half_open" if self.probing or open_for == 0 else "open")
+            ordered = sorted(self.latencies)
+            return {
+                "state": state,
+                "consecutive_failures": self.failures,
+                "trips": self.trips,
+                "open_for_seconds": round(open_for, 1) if state == "open" else 0,
+                "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 1) if ordered else None,
+            }
+
+
+def _breaker(endpoint):
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = _Breaker(endpoint)
+        return breaker
+
+
+def _is_timeout(exc):
+    return any("Timeout" in cls.__name__ for cls in type(exc).__mro__)
+
+
+def _get_hedge_executor():
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS,
+                                                     thread_name_prefix="hedge")
+    return _hedge_executor
+
+
+def _hedged(breaker, attempt):
+    """attempt(), duplicated if it outlives the endpoint's p95."""
+    delay = breaker.hedge_delay() if HEDGING_ENABLED else None
+    if delay is None:
+        return attempt()
+
+    executor = _get_hedge_executor()
+    primary = executor.submit(contextvars.copy_context().run, attempt)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    def duplicate():
+        with rate_limit.priority("background"):
+            return attempt()
+
+    _note("hedges")
+    secondary = executor.submit(contextvars.copy_context().run, duplicate)
+    pending = {primary, secondary}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is secondary:
+                    _note("hedge_wins")
+                return future.result()
+    return primary.result()   # both failed: surface the original error
+
+
+def call(method, url, attempt):
+    """Run attempt() (one request, returning a response) with the endpoint's
+    breaker, retries and hedging. Raises CircuitOpen when failing fast."""
+    endpoint = endpoint_for(url)
+    breaker = _breaker(endpoint)
+    retryable = method.upper() in _RETRYABLE_METHODS
+
+    for retry in range(MAX_RETRIES + 1):
+        try:
+            is_probe = breaker.before_call()
+        except CircuitOpen:
+            _note("fast_failures")
+            raise
+
+        started = time.monotonic()
+        try:
+            response = _hedged(breaker, attempt) if retryable else attempt()
+        except rate_limit.RateLimited:
+            if is_probe:
+                breaker.release_probe()
+            raise     # shed locally; says nothing about the upstream's health
+        except Exception as exc:
+            if breaker.failed():
+                _note("trips", endpoint)
+            if not retryable or _is_timeout(exc) or retry == MAX_RETRIES:
+                raise
+        else:
+            status = response.status_code
+            if status != 429 and status < 500:
+                breaker.succeeded(time.monotonic() - started)
+                return response
+            if breaker.failed():
+                _note("trips", endpoint)
+            if not retryable or status == 429 or retry == MAX_RETRIES:
+                return response
+
+        _note("retries")
+        time.sleep(random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** retry)))
+
+
+def stats():
+    """Per-endpoint breaker state and latency, plus process-wide counters."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {
+        "endpoints": {breaker.endpoint: breaker.snapshot() for breaker in breakers},
+        **_totals.snapshot(),
+    }
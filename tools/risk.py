@@ -0,0 +1,149 @@
+"""Extended risk analytics: Sortino, Calmar, VaR/CVaR, beta vs a benchmark.
+
+Everything is derived from one daily-returns array with NumPy reductions, so
+the whole pack adds well under a millisecond to a run's metrics stage. The
+benchmark is SPY for equities and BTC-USD for crypto; its history goes
+through the normal data_fetch cache, so repeat runs don't refetch it.
+
+VaR and CVaR are reported as positive fractions of loss over one bar at the
+given confidence level (0.023 means "a 2.3% loss").
+"""
+
+import logging
+import math
+from statistics import NormalDist
+
+from tools import data_fetch
+from tools.crypto import is_crypto_symbol, normalize_crypto_symbol
+from tools.lazy_modules import lazy_module
+from tools.metrics import TRADING_DAYS_PER_YEAR, close_series, none_if_nan
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+EQUITY_BENCHMARK = "SPY"
+CRYPTO_BENCHMARK = "BTC-USD"
+DEFAULT_CONFIDENCE = 0.95
+
+RISK_METRIC_KEYS = (
+    "downside_deviation", "sortino_ratio", "calmar_ratio",
+    "var_95", "cvar_95", "var_95_parametric", "cvar_95_parametric",
+    "beta", "correlation",
+)
+
+
+def benchmark_symbol_for(ticker):
+    """SPY for equities, BTC-USD for crypto."""
+    return CRYPTO_BENCHMARK if is_crypto_symbol(ticker) else EQUITY_BENCHMARK
+
+
+def fetch_benchmark_history(ticker, period):
+    """Benchmark price history over the same window as `ticker`'s analysis.
+
+    `period` is the label stored in memory: a relative period ("1y") or a
+    custom "YYYY-MM-DD to YYYY-MM-DD" range. Returns (symbol, price_data);
+    price_data is None when the ticker is its own benchmark.
+    """
+    symbol = benchmark_symbol_for(ticker)
+    if normalize_crypto_symbol(ticker) == symbol:
+        return symbol, None
+    start_date, _, end_date = str(period or "").partition(" to ")
+    if end_date:
+        return symbol, data_fetch.fetch_price_history(symbol, period, start_date, end_date)
+    return symbol, data_fetch.fetch_price_history(symbol, period or "1y")
+
+
+def benchmark_for_metrics(ticker, price_data, memory, tracer,
+                          label="Fetch benchmark history"):
+    """Benchmark prices for `ticker`'s beta, shared by Agent and ToolExecutor.
+
+    Uses the ticker's period from memory, stores the benchmark symbol there
+    and records a trace step under `label`. Returns price_data itself when
+    the ticker is its own benchmark, and None (beta skipped) when the
+    benchmark can't be fetched.
+    """
+    started = tracer.now()
+    try:
+        benchmark, benchmark_data = fetch_benchmark_history(ticker, memory.get(f"{ticker}_period"))
+    except Exception as exc:
+        logging.warning(f"Benchmark unavailable for {ticker}: {exc}")
+        tracer.record("data", label, "warn", detail="Benchmark unavailable — beta skipped",
+                      ticker=ticker, duration_ms=tracer.elapsed_ms(started))
+        return None
+
+    memory.set(f"{ticker}_benchmark", benchmark)
+    if benchmark_data is None:
+        return price_data   # the ticker is its own benchmark
+    tracer.record("data", label, "ok", detail=f"{benchmark} · {len(benchmark_data)} bars",
+                  ticker=ticker, duration_ms=tracer.elapsed_ms(started))
+    return benchmark_data
+
+
+def compute_risk_metrics(price_data, benchmark_data=None, metrics=None,
+                         confidence=DEFAULT_CONFIDENCE):
+    """Risk pack for one ticker; missing inputs yield None, never raise.
+
+    price_data: DataFrame with a 'Close' column.
+    benchmark_data: benchmark DataFrame with a 'Close' column, or None to skip
+        beta/correlation. Pass price_data itself when the ticker is its own
+        benchmark.
+    metrics: the compute_all_metrics dict, reused for Calmar (CAGR / drawdown).
+    """
+    risk = dict.fromkeys(RISK_METRIC_KEYS)
+    close = close_series(price_data)
+    returns = close.pct_change().to_numpy(dtype=float)[1:]
+    returns = returns[np.isfinite(returns)]
+    n = returns.size
+    if n < 2:
+        return risk
+
+    alpha = 1 - confidence
+    mean = returns.mean()
+    std = returns.std(ddof=1)
+
+    downside = np.minimum(returns, 0.0)
+    downside_deviation = math.sqrt(float(np.dot(downside, downside)) / n)
+    risk["downside_deviation"] = downside_deviation
+    if downside_deviation > 0:
+        risk["sortino_ratio"] = mean / downside_deviation * math.sqrt(TRADING_DAYS_PER_YEAR)
+
+    cutoff = np.quantile(returns, alpha)
+    risk["var_95"] = -cutoff
+    risk["cvar_95"] = -returns[returns <= cutoff].mean()
+
+    z = NormalDist().inv_cdf(alpha)
+    risk["var_95_parametric"] = -(mean + z * std)
+    risk["cvar_95_parametric"] = -(mean - std * NormalDist().pdf(z) / alpha)
+
+    metrics = metrics or {}
+    cagr, max_drawdown = metrics.get("cagr"), metrics.get("max_drawdown")
+    if cagr is not None and max_drawdown:
+        risk["calmar_ratio"] = cagr / abs(max_drawdown)
+
+    if benchmark_data is not None:
+        risk.update(_beta_and_correlation(close, benchmark_data))
+
+    return {key: none_if_nan(value) for key, value in risk.items()}
+
+
+def _beta_and_correlation(close, benchmark_data):
+    """Beta and correlation on returns over the timestamps both series share."""
+    try:
+        benchmark_close = close_series(benchmark_data)
+    except (KeyError, TypeError, ValueError):
+        return {}
+    aligned = pd.concat([close, benchmark_close], axis=1, join="inner").to_numpy(dtype=float)
+    if len(aligned) < 3:
+        return {}
+    returns = aligned[1:] / aligned[:-1] - 1
+    returns = returns[np.isfinite(returns).all(axis=1)]
+    if len(returns) < 2:
+        return {}
+    cov = np.cov(returns, rowvar=False)
+    asset_var, bench_var = cov[0, 0], cov[1, 1]
+    if bench_var <= 0 or asset_var <= 0:
+        return {}
+    return {
+        "beta": cov[0, 1] / bench_var,
+        "correlation": cov[0, 1] / math.sqrt(asset_var * bench_var),
+    }
@@ -0,0 +1,149 @@
+"""Stale-while-revalidate for the price and enrichment caches.
+
+A cache entry is fresh for its TTL. Once that passes, it is still served
+as-is for a while longer (its stale window), and a background refresh
+replaces it; only entries older than that make the caller wait on Yahoo.
+TTLs expiring mid-session then cost no user-facing latency.
+
+    _cache = SWRCache("fundamentals", ttl=DAY, stale_ttl=7 * DAY)
+    payload = _cache.get(symbol, lambda: _download(symbol))
+
+data_fetch.py uses the same pieces (revalidate, note_stale) for its CSV
+files. Each stale serve is noted against the current run (track_stale()),
+and AgentTracer appends "served stale (age 12m)" to the matching trace step.
+Refreshes are single-flight per key and run on a small dedicated pool,
+outside any request's budget, at the Yahoo limiter's background priority.
+"""
+
+import contextvars
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from tools import rate_limit
+from tools.persistent_cache import MISSING, PersistentCache
+
+REFRESH_WORKERS = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = set()
+_lock = threading.Lock()
+_caches = []
+# (kind, symbol) -> age in seconds, for the run being traced.
+_stale_served = contextvars.ContextVar("stale_served", default=None)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="swr")
+    return _executor
+
+
+def _submit(task):
+    _get_executor().submit(task)
+
+
+def revalidate(key, refresh):
+    """Run refresh() in the background unless one for `key` is already queued.
+
+    Returns True if a refresh was queued. Failures are logged and dropped;
+    the stale entry stays until its window closes.
+    """
+    with _lock:
+        if key in _in_flight:
+            return False
+        _in_flight.add(key)
+
+    def run():
+        try:
+            with rate_limit.priority("background"):
+                refresh()
+        except Exception as exc:
+            logging.info("Background refresh of %s failed: %s", key, exc)
+        finally:
+            with _lock:
+                _in_flight.discard(key)
+
+    _submit(run)
+    return True
+
+
+def format_age(seconds):
+    minutes = seconds / 60
+    if minutes < 120:
+        return f"{max(1, round(minutes))}m"
+    if minutes < 48 * 60:
+        return f"{round(minutes / 60)}h"
+    return f"{round(minutes / (24 * 60))}d"
+
+
+def note_stale(kind, symbol, age_seconds):
+    """Record that `kind` data for `symbol` was served stale in this run."""
+    served = _stale_served.get()
+    if served is not None:
+        served[(kind, str(symbol or "").upper())] = age_seconds
+
+
+def pop_stale_note(kind, symbol):
+    """"served stale (age 12m)" if that data was served stale, else None."""
+    served = _stale_served.get()
+    if not served or symbol is None:
+        return None
+    age = served.pop((kind, str(symbol).upper()), None)
+    return None if age is None else f"served stale (age {format_age(age)})"
+
+
+@contextmanager
+def track_stale():
+    """Collect the stale serves made inside the block (and its I/O pool tasks)."""
+    token = _stale_served.set({})
+    try:
+        yield
+    finally:
+        _stale_served.reset(token)
+
+
+class SWRCache:
+    """In-memory SWR cache for small JSON-like payloads.
+
+    kind:      trace tool name the payload belongs to ("analyst", "news", ...)
+    ttl:       seconds an entry is fresh
+    stale_ttl: seconds (since fetch) an entry may still be served stale
+    cacheable: predicate; payloads failing it (e.g. "available": False after
+               a transient error) are returned but not cached
+    """
+
+    def __init__(self, kind, ttl, stale_ttl, max_entries=1000, cacheable=bool):
+        self.kind = kind
+        self.ttl = ttl
+        self._entries = PersistentCache(ttl=stale_ttl, max_entries=max_entries,
+                                        is_negative=lambda value: False)
+        self.cacheable = cacheable
+        _caches.append(self)
+
+    def get(self, key, fetch, symbol=None):
+        entry = self._entries.get(key)
+        if entry is MISSING:
+            return self._refresh(key, fetch)
+
+        age = time.time() - entry["fetched_at"]
+        if age >= self.ttl:
+            note_stale(self.kind, symbol or key, age)
+            revalidate((self.kind, key), lambda: self._refresh(key, fetch))
+        return copy.deepcopy(entry["value"])
+
+    def _refresh(self, key, fetch):
+        value = fetch()
+        if self.cacheable(value):
+            self._entries.set(key, {"value": copy.deepcopy(value), "fetched_at": time.time()})
+        return value
+
+    def clear(self):
+        self._entries.clear()
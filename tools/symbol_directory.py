@@ -0,0 +1,213 @@
+"""Offline symbol/name directory with a sorted-array prefix index.
+
+Typeahead and the agent's resolve_symbol tool look here first and only fall
+back to Yahoo's search endpoint (tools/symbol_search.py) when nothing local
+matches. The directory is a CSV of symbol, name, exchange, type; row order is
+the ranking among equally good matches, so list popular symbols first.
+
+data/symbol_directory.csv ships a small curated set. A fuller dump (e.g.
+Nasdaq Trader's nasdaqlisted.txt / otherlisted.txt, or any CSV with symbol
+and name columns) can be imported into output/symbol_directory.csv:
+
+    python -m tools.symbol_directory import path/to/dump.csv [more.csv ...]
+
+Lookups are two bisects over sorted key arrays (symbols, and every word of
+every name), so a query costs microseconds even with tens of thousands of rows.
+"""
+
+import csv
+import sys
+import threading
+from bisect import bisect_left
+from pathlib import Path
+
+BUNDLED_DIRECTORY_PATH = Path(__file__).resolve().parent.parent / "data" / "symbol_directory.csv"
+IMPORTED_DIRECTORY_PATH = Path("output") / "symbol_directory.csv"
+FIELDNAMES = ("symbol", "name", "exchange", "type")
+# Bounds the work for one-letter queries that prefix-match thousands of keys.
+MAX_RANGE_SCAN = 500
+
+# Header aliases seen in common listing dumps.
+_COLUMN_ALIASES = {
+    "symbol": ("symbol", "ticker", "act symbol", "nasdaq symbol"),
+    "name": ("name", "security name", "company name", "company", "description"),
+    "exchange": ("exchange", "exchdisp", "listing exchange"),
+    "type": ("type", "typedisp", "quote type", "asset type"),
+}
+
+
+class SymbolDirectory:
+    """Immutable prefix index over directory rows."""
+
+    def __init__(self, rows):
+        self.rows = []
+        seen = set()
+        for row in rows:
+            symbol = str(row.get("symbol") or "").strip().upper()
+            if not symbol or symbol in seen:
+                continue
+            seen.add(symbol)
+            self.rows.append({
+                "symbol": symbol,
+                "name": str(row.get("name") or "").strip(),
+                "exchange": str(row.get("exchange") or "").strip(),
+                "type": str(row.get("type") or "").strip(),
+            })
+
+        self._by_symbol = {row["symbol"]: i for i, row in enumerate(self.rows)}
+        self._symbol_keys = sorted(self._by_symbol)
+        name_entries = sorted(
+            (word, i)
+            for i, row in enumerate(self.rows)
+            for word in set(row["name"].upper().replace(",", " ").split())
+        )
+        self._name_keys = [word for word, _ in name_entries]
+        self._name_rows = [i for _, i in name_entries]
+
+    def __len__(self):
+        return len(self.rows)
+
+    @staticmethod
+    def _prefix_range(keys, prefix):
+        start = bisect_left(keys, prefix)
+        end = start
+        limit = min(len(keys), start + MAX_RANGE_SCAN)
+        while end < limit and keys[end].startswith(prefix):
+            end += 1
+        return start, end
+
+    def _matches(self, index, words):
+        row = self.rows[index]
+        tokens = [row["symbol"], *row["name"].upper().replace(",", " ").split()]
+        return all(any(token.startswith(word) for token in tokens) for word in words)
+
+    def lookup(self, query, max_results=8):
+        """Best matches: exact symbol, then symbol prefixes, then name words."""
+        words = str(query or "").upper().split()
+        if not words:
+            return []
+        first = words[0]
+
+        candidates = []
+        exact = self._by_symbol.get(" ".join(words))
+        if exact is not None:
+            candidates.append(exact)
+
+        start, end = self._prefix_range(self._symbol_keys, first)
+        symbol_hits = [self._by_symbol[symbol] for symbol in self._symbol_keys[start:end]]
+        candidates.extend(sorted(symbol_hits, key=lambda i: (len(self.rows[i]["symbol"]), i)))
+
+        start, end = self._prefix_range(self._name_keys, first)
+        candidates.extend(sorted(set(self._name_rows[start:end])))
+
+        results, seen = [], set()
+        for index in candidates:
+            if index in seen or not self._matches(index, words):
+                continue
+            seen.add(index)
+            results.append(dict(self.rows[index]))
+            if len(results) >= max_results:
+                break
+        return results
+
+
+def _column_map(fieldnames):
+    normalized = {str(name or "").strip().lower(): name for name in fieldnames or []}
+    mapping = {}
+    for field, aliases in _COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                mapping[field] = normalized[alias]
+                break
+    return mapping
+
+
+def read_directory_csv(path):
+    """Rows from a CSV / pipe-delimited dump, mapped onto FIELDNAMES."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",|\t;")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(f, dialect=dialect)
+        mapping = _column_map(reader.fieldnames)
+        if "symbol" not in mapping:
+            raise ValueError(f"{path}: no symbol/ticker column in {reader.fieldnames}")
+
+        rows = []
+        for raw in reader:
+            row = {field: raw.get(column) or "" for field, column in mapping.items()}
+            # Nasdaq Trader files end with a "File Creation Time" footer row.
+            if str(row["symbol"]).lower().startswith("file creation time"):
+                continue
+            if str(raw.get("Test Issue") or "").strip().upper() == "Y":
+                continue
+            rows.append(row)
+        return rows
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def directory_path():
+    return IMPORTED_DIRECTORY_PATH if IMPORTED_DIRECTORY_PATH.exists() else BUNDLED_DIRECTORY_PATH
+
+
+def get_directory():
+    """The process-wide directory, loaded on first use."""
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                try:
+                    rows = read_directory_csv(directory_path())
+                except (OSError, ValueError):
+                    rows = []
+                _directory = SymbolDirectory(rows)
+    return _directory
+
+
+def set_directory(rows):
+    """Replace the in-memory directory (tests, or after an import)."""
+    global _directory
+    with _directory_lock:
+        _directory = SymbolDirectory(rows)
+    return _directory
+
+
+def lookup_symbols(query, max_results=8):
+    return get_directory().lookup(query, max_results)
+
+
+def import_directory(*paths, destination=None):
+    """Merge the bundled list with one or more dumps into the imported CSV.
+
+    Bundled rows keep their ranking at the top; new symbols are appended in
+    file order. Returns the number of rows written.
+    """
+    rows = read_directory_csv(BUNDLED_DIRECTORY_PATH)
+    for path in paths:
+        rows.extend(read_directory_csv(path))
+    directory = SymbolDirectory(rows)
+
+    destination = Path(destination or IMPORTED_DIRECTORY_PATH)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = destination.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(directory.rows)
+    tmp_path.replace(destination)
+
+    set_directory(directory.rows)
+    return len(directory)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "import":
+        sys.exit("usage: python -m tools.symbol_directory import DUMP.csv [DUMP.csv ...]")
+    count = import_directory(*sys.argv[2:])
+    print(f"Wrote {count} symbols to {IMPORTED_DIRECTORY_PATH}")
@@ -1,38 +1,165 @@
-"""Shared Yahoo symbol lookup with a small TTL cache.
+"""Shared symbol lookup: offline directory first, then Yahoo behind a cache.
 
 Used by the /api/symbol-search typeahead route and the LLM agent's
-resolve_symbol tool, so both stay behind one throttle-friendly cache.
+resolve_symbol tool. Exact symbols and queries that fill a page from the
+local directory (tools/symbol_directory.py) never leave the process; for the
+rest, directory rows come first and Yahoo's search endpoint, behind one
+throttle-friendly bounded LRU + TTL cache, fills in the remainder.
+
+Identical Yahoo lookups that overlap are coalesced: the first caller makes
+the request and the others wait for its answer. Callers can pass a
+`network_gate` (see app.py's typeahead route) that may decline a lookup
+before any Yahoo work starts, e.g. because the client has already moved on.
+
+Typeahead sends a query per keystroke ("A", "AP", "APP", "APPL"), so a
+longer query is first answered from a cached shorter prefix when that is
+safe: either the prefix's result set was exhaustive (Yahoo returned fewer
+quotes than asked for, so nothing is missing), or filtering it still fills
+the requested number of results. Counters are exposed via cache_stats().
 """
 
 import threading
-import time
+from contextlib import nullcontext
 
-import yfinance as yf
+from tools.http_session import shared_session
+from tools.lazy_modules import lazy_module
+from tools.persistent_cache import MISSING, PersistentCache
+from tools.rate_limit import RateLimited
+from tools.symbol_directory import lookup_symbols
+
+yf = lazy_module("yfinance")
 
 _TTL_SECONDS = 600
 _MAX_ENTRIES = 500
-_cache = {}
-_lock = threading.Lock()
+# Memory-only: typeahead results are too short-lived to be worth a file.
+_cache = PersistentCache(ttl=_TTL_SECONDS, negative_ttl=_TTL_SECONDS, max_entries=_MAX_ENTRIES)
+_stats = {"lookups": 0, "directory_hits": 0, "exact_hits": 0, "prefix_hits": 0,
+          "misses": 0, "coalesced": 0, "deferred": 0}
+_stats_lock = threading.Lock()
+
+# A follower gives up waiting on the leader's Yahoo call after this long.
+COALESCE_WAIT_SECONDS = 10
+_in_flight = {}               # (query, max_results) -> {"done": Event, "results": list}
+_in_flight_lock = threading.Lock()
 
 # Quote types that make sense here; filters out options, futures, etc.
 SEARCHABLE_QUOTE_TYPES = {"EQUITY", "ETF", "CRYPTOCURRENCY", "INDEX", "MUTUALFUND"}
 
 
-def search_symbols(query, max_results=8):
-    """Return [{symbol, name, exchange, type}] for a free-text query."""
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def _matches(result, query):
+    """Local stand-in for Yahoo's matching: every query word starts the symbol
+    or a word of the name."""
+    tokens = [result["symbol"], *result["name"].upper().split()]
+    return all(any(token.startswith(word) for token in tokens) for word in query.split())
+
+
+def _from_cached_prefix(cache_key, max_results):
+    """Results for cache_key derived from the longest usable cached prefix."""
+    for end in range(len(cache_key) - 1, 0, -1):
+        entry = _cache.peek(cache_key[:end])
+        if entry is MISSING:
+            continue
+        matches = [r for r in entry["results"] if _matches(r, cache_key)]
+        if entry["exhaustive"] or len(matches) >= max_results:
+            return matches[:max_results]
+    return None
+
+
+class LookupDeferred(Exception):
+    """A network_gate declined the Yahoo lookup; `reason` says why."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def search_symbols(query, max_results=8, network_gate=None):
+    """Return [{symbol, name, exchange, type}] for a free-text query.
+
+    network_gate: optional zero-argument callable returning a context manager
+        that wraps any Yahoo work (including waiting on a coalesced call). It
+        may raise LookupDeferred, which propagates to the caller.
+    """
     query = str(query or "").strip()
     if not query:
         return []
     cache_key = query.upper()
+    _count("lookups")
 
-    now = time.time()
-    with _lock:
-        cached = _cache.get(cache_key)
-        if cached and now - cached[1] < _TTL_SECONDS:
-            return cached[0]
+    # The directory is a short curated list, so a partial hit there says
+    # little about what Yahoo knows ("bank" isn't just BAC). It only answers
+    # alone for an exact symbol or a full page; otherwise its rows lead and
+    # Yahoo's fill the rest.
+    local = lookup_symbols(query, max_results)
+    if len(local) >= max_results or any(r["symbol"] == cache_key for r in local):
+        _count("directory_hits")
+        return local
 
     try:
-        quotes = yf.Search(query, max_results=max_results, news_count=0).quotes or []
+        remote = _remote_results(query, cache_key, max_results, network_gate)
+    except LookupDeferred:
+        _count("deferred")
+        if local:
+            return local      # partial, but better than nothing
+        raise
+    return _merge(local, remote, max_results)
+
+
+def _merge(local, remote, max_results):
+    seen = {r["symbol"] for r in local}
+    return (local + [r for r in remote if r["symbol"] not in seen])[:max_results]
+
+
+def _remote_results(query, cache_key, max_results, network_gate):
+    """Yahoo's results: cached, derived from a cached prefix, or fetched."""
+    entry = _cache.get(cache_key)
+    if entry is not MISSING and (entry["exhaustive"] or entry["max_results"] >= max_results):
+        _count("exact_hits")
+        return entry["results"][:max_results]
+
+    derived = _from_cached_prefix(cache_key, max_results)
+    if derived is not None:
+        _count("prefix_hits")
+        return derived
+
+    with (network_gate or nullcontext)():
+        return _coalesced_yahoo_search(query, cache_key, max_results)
+
+
+def _coalesced_yahoo_search(query, cache_key, max_results):
+    flight_key = (cache_key, max_results)
+    with _in_flight_lock:
+        flight = _in_flight.get(flight_key)
+        leader = flight is None
+        if leader:
+            flight = _in_flight[flight_key] = {"done": threading.Event(), "results": []}
+
+    if not leader:
+        _count("coalesced")
+        flight["done"].wait(COALESCE_WAIT_SECONDS)
+        return flight["results"]
+
+    try:
+        flight["results"] = _yahoo_search(query, cache_key, max_results)
+        return flight["results"]
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(flight_key, None)
+        flight["done"].set()
+
+
+def _yahoo_search(query, cache_key, max_results):
+    _count("misses")
+    try:
+        quotes = yf.Search(query, max_results=max_results, news_count=0,
+                           session=shared_session()).quotes or []
+    except RateLimited as exc:
+        raise LookupDeferred("rate_limited") from exc
     except Exception:
         # Don't cache failures — the next call should retry.
         return []
@@ -49,8 +176,20 @@ def search_symbols(query, max_results=8):
             "type": quote.get("typeDisp") or "",
         })
 
-    with _lock:
-        if len(_cache) >= _MAX_ENTRIES:
-            _cache.clear()
-        _cache[cache_key] = (results, now)
+    _cache.set(cache_key, {
+        "results": results,
+        "max_results": max_results,
+        "exhaustive": len(quotes) < max_results,
+    })
     return results
+
+
+def cache_stats():
+    """Lookup counters for monitoring (served by /api/stats)."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["entries"] = len(_cache)
+    stats["max_entries"] = _MAX_ENTRIES
+    lookups = stats["lookups"]
+    stats["hit_rate"] = round(1 - stats["misses"] / lookups, 4) if lookups else None
+    return stats
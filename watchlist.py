@@ -4,8 +4,9 @@ Stores a single user watchlist as JSON in output/watchlist.json. Each entry is
 a ticker the user wants to follow, with an optional `shares` count so the same
 list can represent either plain favorites (shares omitted) or real holdings.
 
-The live-quote fetching lives in app.py (it owns the yfinance helpers); this
-module only stores the list and turns a set of quotes into a daily summary.
+The live-quote and history fetching lives in app.py (it owns the yfinance
+helpers); this module only stores the list and turns a set of quotes into a
+daily summary, or a set of history scores into the risk/return table.
 """
 
 import json
@@ -210,6 +211,36 @@ def build_watchlist_summary(items, quotes):
     }
 
 
+def _format_ratio(value):
+    return "N/A" if value is None else f"{value:.2f}"
+
+
+def build_watchlist_analytics(items, scores):
+    """Turn the watchlist + {ticker: horizon scores} into table rows.
+
+    `scores` values follow tools.metrics.compute_horizon_scores (fractions for
+    returns, volatility and drawdown). Raw numbers are kept next to the text so
+    the panel can sort on any column; tickers without history sort last.
+    """
+    rows = []
+    for item in items:
+        ticker = item["ticker"]
+        score = scores.get(ticker) or {}
+        row = {"ticker": ticker, "available": bool(score)}
+        for key in ("return_1m", "return_3m", "return_1y", "max_drawdown"):
+            row[key] = score.get(key)
+            row[f"{key}_text"] = _format_percent(score.get(key))
+            row[f"{key}_direction"] = _direction(score.get(key))
+        row["volatility"] = score.get("volatility")
+        row["volatility_text"] = (
+            "N/A" if score.get("volatility") is None else f"{score['volatility']:.1%}"
+        )
+        row["sharpe_ratio"] = score.get("sharpe_ratio")
+        row["sharpe_ratio_text"] = _format_ratio(score.get("sharpe_ratio"))
+        rows.append(row)
+    return rows
+
+
 def _direction(pct):
     if pct is None:
         return "neutral"